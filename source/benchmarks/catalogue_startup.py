@@ -0,0 +1,48 @@
+"""
+Benchmark: worker startup from a memory-mapped Catalogue against rebuilding an Inventory from
+pickled products, timed up to the first answered query (a price range lookup).
+
+Run from the repository root: python source/benchmarks/catalogue_startup.py [products, e.g. 100000,1000000]
+"""
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classes.Catalogue import Catalogue
+from classes.Inventory import Inventory
+from codec import make_products
+
+def main():
+    sizes = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [100000]
+    print(f"{'products':>9} {'inventory s':>12} {'catalogue s':>12} {'file bytes':>11}")
+    for count in sizes:
+        products = make_products(count)
+        with tempfile.TemporaryDirectory() as directory:
+            pickled = os.path.join(directory, "products.pickle")
+            with open(pickled, "wb") as f:
+                pickle.dump(products, f, pickle.HIGHEST_PROTOCOL)
+            path = os.path.join(directory, "catalogue.bin")
+            Catalogue.export(products, path)
+            del products
+
+            start = time.perf_counter()
+            with open(pickled, "rb") as f:
+                inventory = Inventory()
+                inventory.add_products(pickle.load(f))
+            expected = len(inventory.find_product_by_price(100, 110))
+            rebuild = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with Catalogue(path) as catalogue:
+                found = len(catalogue.find_product_by_price(100, 110))
+                mapped = time.perf_counter() - start
+            if found != expected:
+                raise AssertionError("Catalogue and inventory disagree")
+            print(f"{count:>9} {rebuild:>12.3f} {mapped:>12.4f} {os.path.getsize(path):>11}")
+
+if __name__ == "__main__":
+    main()
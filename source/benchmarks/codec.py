@@ -0,0 +1,100 @@
+"""
+Benchmark: encoding and decoding a mixed product list with BinaryCodec, pickle and JSON.
+Reports seconds per direction and the encoded size, then reads products straight out of an
+mmap'd codec file: every product, and a single record by index.
+
+Run from the repository root: python source/benchmarks/codec.py [products, e.g. 10000,100000]
+"""
+import datetime
+import json
+import mmap
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classes.Codec import BinaryCodec
+from products.Clothing import Clothing
+from products.Electronics import Electronics
+from products.Food import Food
+
+def make_products(count):
+    expiry = datetime.date.today() + datetime.timedelta(days=30)
+    products = []
+    for i in range(count):
+        if i % 3 == 0:
+            products.append(Electronics(f"Device {i}", 100.0 + i % 50, i % 1000, 12, "2 year warranty"))
+        elif i % 3 == 1:
+            products.append(Clothing(f"Shirt {i}", 20.0, i % 500, "M", "cotton", "machine wash"))
+        else:
+            products.append(Food(f"Food {i}", 2.5, i % 200, expiry))
+    return products
+
+def to_json(products):
+    records = []
+    for product in products:
+        record = {"type": product.get_product_type(), "id": product.id, "name": product.name, "price": product.price,
+                  "quantity": product.quantity, "created": product.created_at.isoformat(), "info": product._info}
+        if isinstance(product, Electronics):
+            record["warranty_months"] = product.warranty_months
+        elif isinstance(product, Clothing):
+            record["size"], record["material"] = product.size, product.material
+        else:
+            record["expiry_date"] = product.expiry_date.isoformat()
+        records.append(record)
+    return json.dumps(records).encode()
+
+def from_json(data):
+    products = []
+    for record in json.loads(data):
+        if record["type"] == "Electronics":
+            product = Electronics(record["name"], record["price"], record["quantity"], record["warranty_months"], record["info"])
+        elif record["type"] == "Clothing":
+            product = Clothing(record["name"], record["price"], record["quantity"], record["size"], record["material"], record["info"])
+        else:
+            product = Food(record["name"], record["price"], record["quantity"],
+                           datetime.date.fromisoformat(record["expiry_date"]), record["info"])
+        product._id = record["id"]
+        product._creation_date = datetime.datetime.fromisoformat(record["created"])
+        products.append(product)
+    return products
+
+def timed(function, *args, repeat=3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    sizes = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10000, 100000]
+    codec = BinaryCodec()
+    for count in sizes:
+        products = make_products(count)
+        print(f"\nProducts: {count}")
+        print(f"{'format':>8} {'encode s':>9} {'decode s':>9} {'bytes':>11}")
+        formats = (("codec", codec.encode_products, codec.decode_products),
+                   ("pickle", lambda p: pickle.dumps(p, pickle.HIGHEST_PROTOCOL), pickle.loads),
+                   ("json", to_json, from_json))
+        for name, encode, decode in formats:
+            encode_time, data = timed(encode, products)
+            decode_time, decoded = timed(decode, data)
+            if [p.id for p in decoded] != [p.id for p in products]:
+                raise AssertionError(f"{name} did not round-trip")
+            print(f"{name:>8} {encode_time:>9.3f} {decode_time:>9.3f} {len(data):>11}")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "products.bin")
+            with open(path, "wb") as f:
+                f.write(codec.encode_products(products))
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                scan, _ = timed(codec.decode_products, mapped)
+                single, product = timed(codec.product_at, mapped, count // 2)
+                assert product.id == products[count // 2].id
+            print(f"mmap: all products {scan:.3f}s, one product by index {single * 1e6:.0f}us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: full product scans (valuation, per-type totals, low stock, expired) with ParallelScanner
+for a growing number of worker processes, against the same scan run in-process.
+The columns are filled directly, building millions of Product objects would dominate the run.
+They live in shared memory, as in Inventory(parallel=n), so every scan hands the workers block names only.
+
+Run from the repository root: python source/benchmarks/parallel_scan.py [rows, e.g. 1000000,10000000] [max_workers]
+"""
+import datetime
+import math
+import os
+import sys
+import time
+from itertools import repeat
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classes.Parallel import ParallelScanner
+from classes.ProductColumns import ProductColumns
+
+THRESHOLDS = {"Electronics": 100, "Clothing": 1000, "Food": 1000}
+
+def synthetic_columns(rows):
+    """Shared ProductColumns with rows spread over the three product types, a third of them expiring"""
+    columns = ProductColumns(shared=True)
+    for type in ("Electronics", "Clothing", "Food"):
+        columns._type_code(type)
+    today = datetime.date.today().toordinal()
+    columns._ids.extend(range(1, rows + 1))
+    columns._types.extend(bytes(range(3)) * (rows // 3) + bytes(range(rows % 3)))
+    columns._prices.extend(float(i % 500) + 0.99 for i in range(rows))
+    columns._quantities.extend(i % 2000 for i in range(rows))
+    columns._created.extend(repeat(0.0, rows))
+    columns._expiry.extend(today - 5 + i % 30 if i % 3 == 2 else 0 for i in range(rows))
+    return columns
+
+def timed(scanner, repeat=3):
+    scanner.scan(THRESHOLDS)  # warm up the pool
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = scanner.scan(THRESHOLDS)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    sizes = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [1000000]
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    print(f"CPU count: {os.cpu_count()}")
+    for rows in sizes:
+        columns = synthetic_columns(rows)
+        serial, expected = timed(ParallelScanner(columns, workers=1))
+        print(f"\nRows: {rows}")
+        print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}")
+        print(f"{'inline':>8} {serial:>9.3f} {1:>8.2f}")
+        workers = 2
+        while workers <= max_workers:
+            with ParallelScanner(columns, workers=workers, min_rows=0) as scanner:
+                elapsed, result = timed(scanner)
+            if not math.isclose(result["total_value"], expected["total_value"]) or len(result["low_stock_ids"]) != len(expected["low_stock_ids"]):
+                raise AssertionError(f"{workers} workers disagree with the inline scan")
+            print(f"{workers:>8} {elapsed:>9.3f} {serial / elapsed:>8.2f}")
+            workers *= 2
+        columns.close()
+
+if __name__ == "__main__":
+    main()
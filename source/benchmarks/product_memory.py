@@ -0,0 +1,56 @@
+"""
+Benchmark: memory used per product instance.
+Compares the slotted product classes with equivalent subclasses that carry a __dict__
+(the layout before __slots__ was introduced).
+
+Run from the repository root: python source/benchmarks/product_memory.py [count]
+"""
+import datetime
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from products.Clothing import Clothing
+from products.Electronics import Electronics
+from products.Food import Food
+
+def with_dict(cls):
+    """Subclass without __slots__, so every instance gets a __dict__ again"""
+    return type(f"{cls.__name__}WithDict", (cls,), {})
+
+def build(count, electronics, clothing, food):
+    today = datetime.date.today()
+    products = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            products.append(electronics(f"Phone {i}", 499.0, 10, 24))
+        elif kind == 1:
+            products.append(clothing(f"Shirt {i}", 19.9, 40, "M", "cotton"))
+        else:
+            # copy the date so the flyweight pool has something to share
+            expiry = today + datetime.timedelta(days=i % 30)
+            products.append(food(f"Milk {i}", 1.5, 100, datetime.date(expiry.year, expiry.month, expiry.day)))
+    return products
+
+def measure(count, *classes):
+    tracemalloc.start()
+    products = build(count, *classes)
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del products
+    return used / count
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    before = measure(count, with_dict(Electronics), with_dict(Clothing), with_dict(Food))
+    after = measure(count, Electronics, Clothing, Food)
+    print(f"Products: {count}")
+    print(f"With __dict__: {before:.1f} bytes/product")
+    print(f"With __slots__: {after:.1f} bytes/product")
+    print(f"Saved: {before - after:.1f} bytes/product ({(1 - after / before) * 100:.1f}%)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: sale orders executed on a ShardedInventory with one worker process per shard, driven by
+one thread per shard, for a growing number of shards. Each call runs a batch of orders inside the
+shard, so the per-shard work dominates the pipe round trip. Reports total and per-shard throughput.
+
+Run from the repository root: python source/benchmarks/sharded_inventory.py [orders_per_shard] [max_shards]
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classes.Sharding import ShardedInventory
+from products.Electronics import Electronics
+
+BATCH = 200
+
+def sell(inventory, ids, orders, seed):
+    """Shard side: execute sale orders of three random products each, returns how many went through"""
+    rnd = random.Random(seed)
+    sold = 0
+    for _ in range(orders):
+        order = inventory.create_order("Sale")
+        for id in rnd.sample(ids, 3):
+            order.add_item(inventory._products[id], 1)
+        try:
+            order.execute_order()
+            sold += 1
+        except ValueError:
+            order.cancel()
+    return sold
+
+def run(shards, orders_per_shard, products_per_shard=200):
+    with ShardedInventory(shards, processes=True) as inventory:
+        ids = {}
+        for location in inventory.locations:
+            products = [Electronics(f"Device {i}", 100.0, 10 ** 6, 12) for i in range(products_per_shard)]
+            inventory.add_products(products, location)
+            ids[location] = [product.id for product in products]
+
+        def worker(location):
+            for n in range(0, orders_per_shard, BATCH):
+                inventory.run_on(location, sell, ids[location], min(BATCH, orders_per_shard - n), n)
+
+        threads = [threading.Thread(target=worker, args=(location,)) for location in inventory.locations]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return shards * orders_per_shard / (time.perf_counter() - started)
+
+def main():
+    orders_per_shard = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    max_shards = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    print(f"CPU count: {os.cpu_count()}")
+    print(f"{'shards':>7} {'orders/s':>10} {'per shard':>10} {'scaling':>8}")
+    base = None
+    shards = 1
+    while shards <= max_shards:
+        throughput = run(shards, orders_per_shard)
+        base = base or throughput
+        print(f"{shards:>7} {throughput:>10.0f} {throughput / shards:>10.0f} {throughput / base:>8.2f}")
+        shards *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: sale orders executed by a growing number of worker threads against one ConcurrentInventory.
+Reports throughput per thread count and checks that no stock was lost or oversold.
+
+Run from the repository root: python source/benchmarks/stock_contention.py [orders_per_thread] [products]
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classes.Concurrency import ConcurrentInventory
+from products.Electronics import Electronics
+
+def run(threads, orders_per_thread, product_count):
+    inventory = ConcurrentInventory()
+    products = [Electronics(f"Device {i}", 100.0, 1000, 12) for i in range(product_count)]
+    for product in products:
+        inventory.add_product(product)
+    start_stock = sum(p.quantity for p in products)
+    sold = [0] * threads
+    rejected = [0] * threads
+
+    def worker(n):
+        rnd = random.Random(n)
+        for _ in range(orders_per_thread):
+            order = inventory.create_order("Sale")
+            lines = {}
+            for product in rnd.sample(products, 3):
+                lines[product] = rnd.randint(1, 5)
+            try:
+                for product, quantity in lines.items():
+                    order.add_item(product, quantity)
+                order.execute_order()
+                sold[n] += sum(lines.values())
+            except ValueError:
+                rejected[n] += 1
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+    end_stock = sum(p.quantity for p in products)
+    consistent = start_stock - end_stock == sum(sold) and all(p.quantity >= 0 for p in products)
+    return threads * orders_per_thread / elapsed, sum(rejected), consistent
+
+def main():
+    orders_per_thread = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    product_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print(f"{'threads':>8} {'orders/s':>12} {'rejected':>9} {'consistent':>11}")
+    for threads in (1, 2, 4, 8, 16):
+        throughput, rejected, consistent = run(threads, orders_per_thread, product_count)
+        print(f"{threads:>8} {throughput:>12.0f} {rejected:>9} {str(consistent):>11}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,126 @@
 import datetime
+from collections import deque
+from itertools import islice
+
+from classes.Ids import LocalIdAllocator
 
 class AuditLog:
-    log_count = 0
-    def __init__(self, object, action:str, quantity:int):
-        self._object = object
+    """Single audit record. Only identifiers are kept, formatting happens in __repr__"""
+    __slots__ = ("_seq", "_timestamp", "_action", "_object_type", "_object_id", "_quantity", "_previous", "_note")
+    sequence = LocalIdAllocator() #record sequence numbers, increasing and never reused
+    def __init__(self, object, action:str, quantity:int, previous:int=None, note:str=""):
+        self._seq = AuditLog.sequence.allocate()
+        self._timestamp = datetime.datetime.now()
         self._action = action
+        self._object_type, self._object_id = AuditLog._identify(object)
         self._quantity = quantity
-        self._timestamp = datetime.datetime.now()
-        AuditLog.log_count += 1
-    
+        self._previous = previous
+        self._note = note
+
+    @staticmethod
+    def _identify(object):
+        """Reduce the logged object to (type name, identifier) so the record doesn't keep it alive"""
+        if isinstance(object, str):
+            return "", object
+        for attr in ("id", "order_id", "name"):
+            value = getattr(object, attr, None)
+            if value is not None:
+                return type(object).__name__, value
+        return type(object).__name__, object
+
+    @property
+    def seq(self):
+        return self._seq
+    @property
+    def timestamp(self):
+        return self._timestamp
+    @property
+    def action(self):
+        return self._action
+    @property
+    def object_type(self):
+        return self._object_type
+    @property
+    def object_id(self):
+        return self._object_id
+    @property
+    def quantity(self):
+        return self._quantity
+    @property
+    def previous(self):
+        return self._previous
+    @property
+    def note(self):
+        return self._note
+
+    def to_dict(self):
+        return {"seq": self._seq, "timestamp": self._timestamp.isoformat(), "action": self._action,
+                "object_type": self._object_type, "object_id": self._object_id,
+                "quantity": self._quantity, "previous": self._previous, "note": self._note}
+
     def __repr__(self):
-        return f"Log {AuditLog.log_count} [Time: {self._timestamp}, Action:{self._action}, Object:{self._object}, Quantity:{self._quantity}]"
\ No newline at end of file
+        quantity = self._quantity if self._previous is None else f"{self._previous} -> {self._quantity}"
+        note = f", Note:{self._note}" if self._note else ""
+        object = f"{self._object_type} {self._object_id}" if self._object_type else self._object_id
+        return f"Log {self._seq} [Time: {self._timestamp}, Action:{self._action}, Object:{object}, Quantity:{quantity}{note}]"
+
+
+class AuditTrail:
+    """Ring buffer of AuditLog records, the oldest records are dropped once capacity is reached"""
+    def __init__(self, capacity:int=10000):
+        if capacity <= 0:
+            raise ValueError("Capacity must be above 0")
+        self._records = deque(maxlen=capacity)
+        self._sink = None
+
+    @property
+    def sink(self):
+        return self._sink
+    @sink.setter
+    def sink(self, value):
+        """AuditSink that also receives every new record, None to stop forwarding"""
+        self._sink = value
+
+    @property
+    def capacity(self):
+        return self._records.maxlen
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def record(self, object, action:str, quantity:int, previous:int=None, note:str=""):
+        log = AuditLog(object, action, quantity, previous, note)
+        self._records.append(log)
+        if self._sink is not None:
+            self._sink.submit(log)
+        return log
+
+    def iter(self, since=None, limit:int=None):
+        """
+        Iterate records oldest first
+        :param since: datetime or sequence number, only newer records are returned
+        :param limit: Maximum number of records to return
+        """
+        if since is None:
+            records = iter(self._records)
+        else:
+            key = "_timestamp" if isinstance(since, datetime.datetime) else "_seq"
+            newer = []
+            # records are appended in order, so walking back stops at the first older one
+            for log in reversed(self._records):
+                if getattr(log, key) < since:
+                    break
+                newer.append(log)
+            records = reversed(newer)
+        return islice(records, limit)
+
+    def page(self, offset:int=0, limit:int=100):
+        """Return one page of records, oldest first"""
+        return list(islice(self._records, offset, offset + limit))
+
+    @staticmethod
+    def format(records):
+        return "".join(f"{log}\n" for log in records)
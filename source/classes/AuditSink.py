@@ -0,0 +1,250 @@
+"""Background writer that persists audit records in batches."""
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from classes.Audit import AuditLog
+
+_logger = logging.getLogger(__name__)
+
+class AuditBackend:
+    """Base class for audit sink backends, receives batches of record dicts"""
+    def write(self, records:list):
+        raise NotImplementedError("Audit backends must implement write")
+
+    def last_seq(self):
+        """Highest seq already stored, None if unknown or empty"""
+        return None
+
+    def sync(self):
+        """Force written records to stable storage"""
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonlBackend(AuditBackend):
+    """Append-only JSON lines file"""
+    def __init__(self, path:str):
+        self._path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, records:list):
+        # values JSON has no type for are written as their str(), so no record can fail the batch
+        self._file.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+        self._file.flush()
+
+    def last_seq(self):
+        return JsonlBackend._last_seq(self._path)
+
+    @staticmethod
+    def _last_seq(path:str, tail:int=65536):
+        """Highest seq among the complete records in the tail of a JSON lines file"""
+        try:
+            with open(path, "rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(size - tail, 0))
+                lines = f.read().split(b"\n")
+        except FileNotFoundError:
+            return None
+        if size > tail:
+            lines = lines[1:]  # cut by the seek
+        seqs = []
+        for line in lines:
+            try:
+                seqs.append(json.loads(line)["seq"])
+            except (ValueError, KeyError, TypeError):
+                pass  # blank or torn line
+        return max(seqs, default=None)
+
+    def sync(self):
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class RotatingJsonlBackend(JsonlBackend):
+    """JSON lines file rotated to path.1 ... path.N once it grows above max_bytes"""
+    def __init__(self, path:str, max_bytes:int=10 * 1024 * 1024, backup_count:int=5):
+        super().__init__(path)
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+
+    def write(self, records:list):
+        super().write(records)
+        if self._file.tell() >= self._max_bytes:
+            self._rotate()
+
+    def last_seq(self):
+        last = super().last_seq()
+        return last if last is not None else JsonlBackend._last_seq(f"{self._path}.1")
+
+    def _rotate(self):
+        self.sync()
+        self._file.close()
+        for i in range(self._backup_count - 1, 0, -1):
+            if os.path.exists(f"{self._path}.{i}"):
+                os.replace(f"{self._path}.{i}", f"{self._path}.{i + 1}")
+        if self._backup_count > 0:
+            os.replace(self._path, f"{self._path}.1")
+        else:
+            os.remove(self._path)
+        self._file = open(self._path, "a", encoding="utf-8")
+
+
+class SQLiteBackend(AuditBackend):
+    """Audit table in a local SQLite database"""
+    _columns = ("seq", "timestamp", "action", "object_type", "object_id", "quantity", "previous", "note")
+
+    def __init__(self, path:str, synchronous:str="NORMAL"):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"PRAGMA synchronous={synchronous}")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS audit_log (seq INTEGER, timestamp TEXT, action TEXT, "
+            "object_type TEXT, object_id TEXT, quantity INTEGER, previous INTEGER, note TEXT)")
+        self._insert = f"INSERT INTO audit_log VALUES ({', '.join('?' * len(self._columns))})"
+
+    def write(self, records:list):
+        rows = [tuple(str(r[c]) if c == "object_id" else r[c] for c in self._columns) for r in records]
+        with self._connection:
+            self._connection.executemany(self._insert, rows)
+
+    def last_seq(self):
+        return self._connection.execute("SELECT MAX(seq) FROM audit_log").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+
+class AuditSink:
+    """
+    Queue of audit records drained by a background thread that writes them to a backend in batches.
+    Creating a sink moves AuditLog.sequence past the records the backend already holds.
+    :param backend: AuditBackend receiving the batches
+    :param batch_size: Maximum number of records per write
+    :param flush_interval: Seconds to wait for a batch to fill before writing what is there
+    :param max_queue: Queue bound, submit blocks (or drops when block=False) once it is full
+    :param fsync: "batch" to sync after every write, "interval" to sync at most every flush_interval, "never"
+    """
+    _stop = object()
+    fsync_policies = ("batch", "interval", "never")
+
+    def __init__(self, backend:AuditBackend, batch_size:int=500, flush_interval:float=1.0,
+                 max_queue:int=10000, block:bool=True, fsync:str="interval"):
+        if fsync not in AuditSink.fsync_policies:
+            raise ValueError(f"Please choose from {AuditSink.fsync_policies}")
+        last = backend.last_seq()
+        if last is not None:
+            AuditLog.sequence.advance(last)
+        self._backend = backend
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._block = block
+        self._fsync = fsync
+        self._queue = queue.Queue(max_queue)
+        self._dropped = 0
+        self._failed = 0
+        self._error = None
+        self._last_sync = time.monotonic()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def dropped(self):
+        """Number of records discarded because the queue was full"""
+        return self._dropped
+
+    @property
+    def failed(self):
+        """Number of records the backend refused, each was logged"""
+        return self._failed
+
+    @property
+    def error(self):
+        """Last exception raised by the backend, if any"""
+        return self._error
+
+    def submit(self, log):
+        if self._closed:
+            return
+        if self._block:
+            self._queue.put(log)
+            return
+        try:
+            self._queue.put_nowait(log)
+        except queue.Full:
+            self._dropped += 1
+
+    def flush(self):
+        """Block until every submitted record has been written"""
+        self._queue.join()
+
+    def close(self):
+        """Write the pending records, sync and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(AuditSink._stop)
+        self._thread.join()
+        self._backend.sync()
+        self._backend.close()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self._flush_interval)
+                while True:
+                    if item is AuditSink._stop:
+                        stopping = True
+                        break
+                    batch.append(item)
+                    if len(batch) >= self._batch_size:
+                        break
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                if batch:
+                    self._write([log.to_dict() for log in batch])
+                    self._maybe_sync()
+            except Exception as error:
+                self._error = error
+                _logger.exception("Audit sink failed to write or sync a batch")
+            finally:
+                for _ in range(len(batch) + stopping):
+                    self._queue.task_done()
+
+    def _write(self, records:list):
+        """Write a batch, retrying record by record if it fails so one bad record loses only itself"""
+        try:
+            self._backend.write(records)
+            return
+        except Exception:
+            pass
+        for record in records:
+            try:
+                self._backend.write([record])
+            except Exception as error:
+                self._error = error
+                self._failed += 1
+                _logger.error("Audit record %s could not be written: %r", record.get("seq"), error)
+
+    def _maybe_sync(self):
+        if self._fsync == "batch":
+            self._backend.sync()
+        elif self._fsync == "interval" and time.monotonic() - self._last_sync >= self._flush_interval:
+            self._backend.sync()
+            self._last_sync = time.monotonic()
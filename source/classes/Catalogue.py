@@ -0,0 +1,348 @@
+"""Read-only product catalogue in a memory-mapped file, queried through lazy product views."""
+import datetime
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+
+from classes.Codec import BinaryCodec, _INT, _micros, _datetime
+from classes.Inventory import Inventory
+
+MAGIC = b"INVCATLG"
+VERSION = 1
+
+
+class ProductView:
+    """
+    Read-only stand-in for a product stored in a Catalogue. Every attribute is read from the
+    mapped file when asked for, nothing is copied; materialize() builds a real Product.
+    """
+    __slots__ = ("_catalogue", "_row")
+
+    def __init__(self, catalogue, row:int):
+        self._catalogue = catalogue
+        self._row = row
+
+    def _record(self):
+        return self._catalogue._record(self._row)
+
+    @property
+    def id(self):
+        return self._record()[5]
+
+    @property
+    def name(self):
+        return self._catalogue._strings[self._record()[1]]
+
+    @property
+    def price(self):
+        record = self._record()
+        return int(record[7]) if record[0] & _INT else record[7]
+
+    @property
+    def quantity(self):
+        return self._record()[6]
+
+    @property
+    def available_quantity(self):
+        return self.quantity
+
+    @property
+    def created_at(self):
+        return _datetime(self._record()[8])
+
+    def _field(self, slot:str):
+        record = self._record()
+        cls, field_a, field_b = self._catalogue._builders[record[0] & ~_INT]
+        for field, value in ((field_a, record[3]), (field_b, record[4])):
+            if field is not None and field[0] == slot:
+                return BinaryCodec._field(field[1], value, self._catalogue._strings)
+        raise AttributeError(f"{cls.__name__} has no {slot[1:]}")
+
+    @property
+    def warranty_months(self):
+        return self._field("_warranty_months")
+
+    @property
+    def size(self):
+        return self._field("_size")
+
+    @property
+    def material(self):
+        return self._field("_material")
+
+    @property
+    def expiry_date(self):
+        return self._field("_expiry_date")
+
+    @property
+    def info(self):
+        record = self._record()
+        return f"Name: {self._catalogue._strings[record[1]]} \nAdditional Info: {self._catalogue._strings[record[2]]}"
+
+    def get_product_type(self):
+        return self._catalogue._builders[self._record()[0] & ~_INT][0].__name__
+
+    def calculate_value_of_stock(self):
+        return self.price * self.quantity
+
+    def is_expired(self):
+        return self.expiry_date < datetime.date.today()
+
+    def materialize(self):
+        """A real Product with the stored values, not linked to any inventory"""
+        return BinaryCodec._build_product(self._catalogue._builders, self._catalogue._strings, self._record())
+
+    def __eq__(self, other):
+        return isinstance(other, ProductView) and other._catalogue is self._catalogue and other._row == self._row
+
+    def __hash__(self):
+        return hash((id(self._catalogue), self._row))
+
+    def __repr__(self):
+        return repr(self.materialize())
+
+
+class _NameKeys:
+    """Sorted case-folded names as a sequence bisect can search, each key decoded when compared"""
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i:int):
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], "utf-8")
+
+
+class Catalogue:
+    """
+    Product catalogue exported once by a writer and mapped read-only by any number of readers.
+    The file is the BinaryCodec product section (fixed-width records, string table) followed by
+    sorted index arrays: ids, prices, quantities, creation dates, expiry dates, case-folded names
+    and per-type row ranges. Opening only maps the file and reads the index directory; queries
+    bisect the arrays in place and return ProductViews, so startup costs no deserialization and
+    the pages are shared between every process mapping the same file.
+    Export writes a new file and renames it over the old one, readers keep their old mapping
+    until they open the catalogue again.
+
+    Catalogue.export(inventory.products.values(), "catalogue.bin")
+    with Catalogue("catalogue.bin") as catalogue:
+        catalogue.find_product_by_price(10, 20)
+    """
+    _header = struct.Struct("<8sHH4xQQ")  # magic, version, index count, product section length, directory offset
+    _entry = struct.Struct("<16ss7xQQ")  # index name, array typecode, offset, item count
+
+    #EXPORT
+    @staticmethod
+    def export(products, path:str):
+        """Write the products to a catalogue file, atomically replacing any previous one"""
+        products = list(products)
+        section = BinaryCodec().encode_products(products)
+        indexes = Catalogue._indexes(products)
+        temp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp, "wb") as f:
+                f.write(b"\0" * Catalogue._header.size)
+                f.write(section)
+                directory = []
+                for name, column in indexes.items():
+                    f.write(b"\0" * (-f.tell() % 8))  # arrays start 8-aligned
+                    directory.append(Catalogue._entry.pack(name.encode(), column.typecode.encode(), f.tell(), len(column)))
+                    column.tofile(f)
+                directory_offset = f.tell()
+                f.write(b"".join(directory))
+                f.seek(0)
+                f.write(Catalogue._header.pack(MAGIC, VERSION, len(indexes), len(section), directory_offset))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, path)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+        return len(products)
+
+    @staticmethod
+    def _indexes(products:list):
+        """Sorted index arrays over row numbers, rows are the positions in products"""
+        tags = {cls: tag for tag, (cls, _) in BinaryCodec.product_schemas[BinaryCodec().version].items()}
+        rows = range(len(products))
+        indexes = {}
+
+        def sorted_index(name:str, typecode:str, key, selected=rows):
+            order = sorted(selected, key=lambda row: (key(products[row]), products[row].id))
+            indexes[name] = array(typecode, (key(products[row]) for row in order))
+            indexes[f"{name}_rows"] = array("I", order)
+
+        sorted_index("ids", "q", lambda product: product.id)
+        sorted_index("price", "d", lambda product: product.price)
+        sorted_index("quantity", "q", lambda product: product.quantity)
+        sorted_index("created", "q", lambda product: _micros(product.created_at))
+        sorted_index("expiry", "q", lambda product: product.expiry_date.toordinal(),
+                     [row for row in rows if getattr(products[row], "expiry_date", None) is not None])
+        order = sorted(rows, key=lambda row: (tags[type(products[row])], products[row].id))
+        indexes["type_rows"] = array("I", order)
+        bounds = array("q")
+        for i, row in enumerate(order):
+            tag = tags[type(products[row])]
+            if not bounds or bounds[-3] != tag:
+                bounds.extend((tag, i, i))
+            bounds[-1] = i + 1
+        indexes["type_bounds"] = bounds
+        names = sorted(rows, key=lambda row: (products[row].name.casefold(), products[row].id))
+        encoded = [products[row].name.casefold().encode("utf-8") for row in names]
+        offsets = array("I", [0])
+        for blob in encoded:
+            offsets.append(offsets[-1] + len(blob))
+        indexes["name_rows"] = array("I", names)
+        indexes["name_offsets"] = offsets
+        indexes["name_bytes"] = array("B", b"".join(encoded))
+        return indexes
+
+    #READING
+    def __init__(self, path:str):
+        self._path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._view = memoryview(self._mmap)
+            magic, version, index_count, section_length, directory = Catalogue._header.unpack_from(self._view, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a catalogue file")
+            if version != VERSION:
+                raise ValueError(f"Unsupported catalogue version {version}")
+            start = Catalogue._header.size
+            self._section = self._view[start:start + section_length]
+            view, codec_version, self._count, self._strings, self._records = BinaryCodec._open(self._section, "products", lazy=True)
+            self._record_struct = BinaryCodec._product[codec_version]
+            self._builders = BinaryCodec._builders(codec_version)
+            self._arrays = {}
+            for i in range(index_count):
+                name, typecode, offset, count = Catalogue._entry.unpack_from(self._view, directory + i * Catalogue._entry.size)
+                typecode = typecode.decode()
+                size = struct.calcsize(typecode)
+                self._arrays[name.rstrip(b"\0").decode()] = self._view[offset:offset + count * size].cast(typecode)
+            bounds = self._arrays["type_bounds"]
+            self._types = {self._builders[bounds[i]][0].__name__: (bounds[i + 1], bounds[i + 2]) for i in range(0, len(bounds), 3)}
+            self._names = _NameKeys(self._arrays["name_offsets"], self._arrays["name_bytes"])
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def path(self):
+        return self._path
+
+    def close(self):
+        """Unmap the file, views handed out before stop working"""
+        self._names = None
+        self._strings = None
+        for column in getattr(self, "_arrays", {}).values():
+            column.release()
+        self._arrays = {}
+        for view in ("_section", "_view"):
+            if getattr(self, view, None) is not None:
+                getattr(self, view).release()
+                setattr(self, view, None)
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # a view derived from the map is still alive, the map closes once it is collected
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return (ProductView(self, row) for row in self._arrays["ids_rows"])
+
+    def __contains__(self, product_id):
+        return self._row_of(product_id) is not None
+
+    def _record(self, row:int):
+        return self._record_struct.unpack_from(self._section, self._records + row * self._record_struct.size)
+
+    def _row_of(self, product_id):
+        ids = self._arrays["ids"]
+        i = bisect_left(ids, product_id)
+        return self._arrays["ids_rows"][i] if i < len(ids) and ids[i] == product_id else None
+
+    def _views(self, rows):
+        return [ProductView(self, row) for row in rows]
+
+    def _range(self, name:str, start, end):
+        keys = self._arrays[name]
+        lo = bisect_left(keys, start)
+        hi = bisect_right(keys, end, lo)
+        return self._views(self._arrays[f"{name}_rows"][lo:hi])
+
+    #FILTERS
+    def find_product_by_id(self, product_id):
+        row = self._row_of(product_id)
+        if row is not None:
+            return ProductView(self, row)
+        return f"There is no product that has id: {product_id}"
+
+    def find_product_by_name(self, name:str):
+        if name or len(name) > 0:
+            key = name.casefold()
+            i = bisect_left(self._names, key)
+            if i < len(self._names) and self._names[i] == key:
+                return ProductView(self, self._arrays["name_rows"][i])
+        return None
+
+    def find_product_by_type(self, type:str):
+        start, stop = self._types.get(type, (0, 0))
+        return self._views(self._arrays["type_rows"][start:stop])
+
+    def find_product_by_price(self, start:int, end:int):
+        return self._range("price", start, end)
+
+    def find_product_by_quantity(self, start:int, end:int):
+        return self._range("quantity", start, end)
+
+    def find_product_by_date(self, start:datetime.datetime, end:datetime.datetime):
+        return self._range("created", _micros(start), _micros(end))
+
+    #REPORTS
+    def product_count(self):
+        return self._count
+
+    def product_types(self):
+        return list(self._types)
+
+    def total_value(self):
+        return sum(price * quantity for _, _, _, _, _, _, quantity, price, _ in
+                   self._record_struct.iter_unpack(self._section[self._records:self._records + self._count * self._record_struct.size]))
+
+    def expiring_products(self, days:int):
+        """Products that are expired or expire within the given number of days"""
+        day = datetime.date.today() + datetime.timedelta(days=days + 1)
+        return self._views(self._arrays["expiry_rows"][:bisect_left(self._arrays["expiry"], day.toordinal())])
+
+    def expired_products(self):
+        return self._views(self._arrays["expiry_rows"][:bisect_left(self._arrays["expiry"], datetime.date.today().toordinal())])
+
+    def low_stock_products(self):
+        """Products below their threshold, with the shared Inventory.thresholds rules (SKU and type, no suppliers)"""
+        table = Inventory.thresholds.compile([])
+        rows = []
+        for type, threshold in table.types.items():
+            start, stop = self._types.get(type, (0, 0))
+            for row in self._arrays["type_rows"][start:stop]:
+                record = self._record(row)
+                if record[6] < threshold and record[5] not in table.overrides:
+                    rows.append(row)
+        for id, threshold in table.overrides.items():
+            row = self._row_of(id)
+            if row is not None and self._record(row)[6] < threshold:
+                rows.append(row)
+        return self._views(rows)
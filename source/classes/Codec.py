@@ -0,0 +1,311 @@
+"""Versioned compact binary encoding of products, orders and suppliers."""
+import datetime
+import math
+import struct
+import sys
+
+from classes.Order import Order
+from classes.Statistics import RunningStats
+from classes.Supplier import Supplier
+from products.Clothing import Clothing
+from products.Electronics import Electronics
+from products.Food import Food
+
+MAGIC = b"INVB"
+VERSION = 1
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_NONE = -2 ** 63  # datetime field left empty
+_INT = 0x80  # set in a product tag or order type byte when the price or total is an int, not a float
+
+def _micros(value:datetime.datetime):
+    """Naive datetime -> microseconds since 1970-01-01, exact and independent of the local timezone"""
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+_timedelta = datetime.timedelta
+
+def _datetime(micros:int):
+    return _EPOCH + _timedelta(0, 0, micros)
+
+
+class _LazyStrings:
+    """String table decoded entry by entry, for reads that touch a few records"""
+    _span = struct.Struct("<II")
+
+    def __init__(self, view, table:int, base:int):
+        self._view = view
+        self._table = table  # offset of the uint32 offsets
+        self._base = base  # offset of the string bytes
+        self._decoded = {}
+
+    def __getitem__(self, index:int):
+        text = self._decoded.get(index)
+        if text is None:
+            start, stop = _LazyStrings._span.unpack_from(self._view, self._table + 4 * index)
+            text = self._decoded[index] = sys.intern(str(self._view[self._base + start:self._base + stop], "utf-8"))
+        return text
+
+
+class BinaryCodec:
+    """
+    Encodes lists of products, orders or suppliers into one buffer:
+
+        header      magic, version, section kind, record count, string count
+        strings     offsets (uint32, string count + 1) then the utf-8 bytes, each distinct string once
+        records     products: fixed width, so record i is at a computed offset
+                    orders and suppliers: variable length, read in sequence
+
+    Numbers are little-endian and fixed width, datetimes are microseconds since 1970, dates are
+    day ordinals, strings are indexes into the table. Prices and order totals are doubles, the top
+    bit of the product tag (order type) marks the ones to hand back as ints. The product record layout comes from the
+    schemas below, one per product type tag; new versions add schemas, old buffers stay readable.
+    Decoding reads straight out of any buffer (bytes, memoryview, mmap) without copying it.
+    Products and orders referenced by orders and suppliers are resolved by id through a mapping.
+    """
+    _header = struct.Struct("<4sHHII")
+    kinds = {"products": 1, "orders": 2, "suppliers": 3}
+
+    # tag -> (class, (slot, kind) for the two type fields); kind "int", "str" (table index) or "date"
+    product_schemas = {1: {1: (Electronics, (("_warranty_months", "int"), None)),
+                           2: (Clothing, (("_size", "str"), ("_material", "str"))),
+                           3: (Food, (("_expiry_date", "date"), None))}}
+    # tag, name, info, type field a, type field b, id, quantity, price, created
+    _product = {1: struct.Struct("<BIIiiqqdq")}
+    _order = struct.Struct("<qBBqdI")  # id, type, status, date, total, line count
+    _line = struct.Struct("<qq")  # product id, quantity
+    _supplier = struct.Struct("<IIII")  # name, contact, product count, history count
+    _history = struct.Struct("<qqIq")  # order id, date, status, delivery date
+    _stats = struct.Struct("<dddqdddddI")  # low, width, alpha, count, mean, m2, ewma, min, max, bins (NaN = None)
+    order_types = ("Purchase", "Sale")
+    statuses = ("pending", "reserved", "executed", "cancelled")
+
+    def __init__(self, version:int=VERSION):
+        if version not in BinaryCodec.product_schemas:
+            raise ValueError(f"Unsupported codec version {version}")
+        self._version = version
+        self._tags = {cls: (tag, fields) for tag, (cls, fields) in BinaryCodec.product_schemas[version].items()}
+
+    @property
+    def version(self):
+        return self._version
+
+    #FRAMING
+    def _frame(self, kind:str, count:int, strings:dict, records):
+        table = list(strings)
+        encoded = [text.encode("utf-8") for text in table]
+        offsets = [0]
+        for blob in encoded:
+            offsets.append(offsets[-1] + len(blob))
+        return b"".join((BinaryCodec._header.pack(MAGIC, self._version, BinaryCodec.kinds[kind], count, len(table)),
+                         struct.pack(f"<{len(offsets)}I", *offsets), *encoded, *records))
+
+    @staticmethod
+    def _open(buffer, kind:str, lazy:bool=False):
+        """(memoryview, version, record count, strings, offset of the first record)"""
+        view = memoryview(buffer)
+        if view.format != "B" or view.ndim != 1:
+            view = view.cast("B")
+        header = BinaryCodec._header
+        if len(view) < header.size:
+            raise ValueError("Buffer is too short for a codec header")
+        magic, version, section, count, string_count = header.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a codec buffer")
+        if version not in BinaryCodec.product_schemas:
+            raise ValueError(f"Unsupported codec version {version}")
+        if section != BinaryCodec.kinds[kind]:
+            raise ValueError(f"Buffer does not hold {kind}")
+        base = header.size + 4 * (string_count + 1)
+        if lazy:
+            end, = struct.unpack_from("<I", view, base - 4)
+            return view, version, count, _LazyStrings(view, header.size, base), base + end
+        offsets = struct.unpack_from(f"<{string_count + 1}I", view, header.size)
+        # each distinct string is decoded once, every record referencing it shares the object
+        strings = [sys.intern(str(view[base + offsets[i]:base + offsets[i + 1]], "utf-8")) for i in range(string_count)]
+        return view, version, count, strings, base + offsets[-1]
+
+    #PRODUCTS
+    def encode_products(self, products):
+        strings = {}
+        intern = lambda text: strings.setdefault(text, len(strings))
+        pack = BinaryCodec._product[self._version].pack
+        records = []
+        for product in products:
+            schema = self._tags.get(type(product))
+            if schema is None:
+                raise ValueError(f"No codec schema for {type(product).__name__}")
+            tag, fields = schema
+            extra = [0, 0]
+            for i, field in enumerate(fields):
+                if field is not None:
+                    value = getattr(product, field[0])
+                    extra[i] = intern(value) if field[1] == "str" else value.toordinal() if field[1] == "date" else value
+            records.append(pack(tag | _INT if type(product._price) is int else tag, intern(product._name), intern(product._info), extra[0], extra[1],
+                                product._id, product._quantity, product._price, _micros(product._creation_date)))
+        return self._frame("products", len(records), strings, records)
+
+    @staticmethod
+    def _builders(version:int):
+        """tag -> (class, type field a as (slot, kind) or None, type field b), looked up once per decode"""
+        return {tag: (cls, *fields) for tag, (cls, fields) in BinaryCodec.product_schemas[version].items()}
+
+    @staticmethod
+    def _build_product(builders:dict, strings, record:tuple):
+        tag, name, info, a, b, id, quantity, price, created = record
+        cls, field_a, field_b = builders[tag & ~_INT]
+        product = cls.__new__(cls)
+        product._id = id
+        product._name = strings[name]
+        product._price = int(price) if tag & _INT else price
+        product._quantity = quantity
+        product._creation_date = _EPOCH + _timedelta(0, 0, created)
+        product._reservations = None
+        product._events = None
+        product._info = strings[info]
+        if field_a is not None:
+            setattr(product, field_a[0], BinaryCodec._field(field_a[1], a, strings))
+        if field_b is not None:
+            setattr(product, field_b[0], BinaryCodec._field(field_b[1], b, strings))
+        return product
+
+    @staticmethod
+    def _field(kind:str, value:int, strings):
+        if kind == "str":
+            return strings[value]
+        if kind == "date":
+            return Food._shared_date(datetime.date.fromordinal(value))
+        return value
+
+    def decode_products(self, buffer):
+        """All products of a buffer from encode_products, as a list"""
+        return list(self.iter_products(buffer))
+
+    def iter_products(self, buffer):
+        """Yield the products one by one, nothing but the product being built is held"""
+        view, version, count, strings, start = BinaryCodec._open(buffer, "products")
+        builders = BinaryCodec._builders(version)
+        record = BinaryCodec._product[version]
+        build = BinaryCodec._build_product
+        for fields in record.iter_unpack(view[start:start + count * record.size]):
+            yield build(builders, strings, fields)
+
+    def product_at(self, buffer, index:int):
+        """Decode only the product record at index, records are fixed width and strings are decoded on demand"""
+        view, version, count, strings, start = BinaryCodec._open(buffer, "products", lazy=True)
+        if not 0 <= index < count:
+            raise IndexError("Product index out of range")
+        record = BinaryCodec._product[version]
+        return BinaryCodec._build_product(BinaryCodec._builders(version), strings,
+                                          record.unpack_from(view, start + index * record.size))
+
+    #ORDERS
+    def encode_orders(self, orders):
+        records = []
+        orders = list(orders)
+        for order in orders:
+            items = list(order.order_items)
+            type_code = BinaryCodec.order_types.index(order.order_type)
+            records.append(BinaryCodec._order.pack(order.order_id, type_code | _INT if type(order.order_amount) is int else type_code,
+                                                   BinaryCodec.statuses.index(order.status), _micros(order.order_date),
+                                                   order.order_amount, len(items)))
+            records.extend(BinaryCodec._line.pack(product.id, quantity) for product, quantity in items)
+        return self._frame("orders", len(orders), {}, records)
+
+    def decode_orders(self, buffer, products):
+        """
+        Orders of a buffer from encode_orders
+        :param products: Mapping of product id -> product (e.g. Inventory.products), lines of unknown ids are dropped
+        """
+        view, version, count, strings, offset = BinaryCodec._open(buffer, "orders")
+        orders = []
+        for _ in range(count):
+            id, type, status, date, total, lines = BinaryCodec._order.unpack_from(view, offset)
+            offset += BinaryCodec._order.size
+            order = Order.__new__(Order)
+            order._order_id = id
+            order._order_type = BinaryCodec.order_types[type & ~_INT]
+            order._status = BinaryCodec.statuses[status]
+            order._date = _datetime(date)
+            order._total_amount = int(total) if type & _INT else total
+            order._inventory = None
+            order._reservations = {}
+            order._items = {}
+            order._amounts = {}  # line amounts are not stored, they are taken at the current prices
+            for product_id, quantity in BinaryCodec._line.iter_unpack(view[offset:offset + lines * BinaryCodec._line.size]):
+                product = products.get(product_id)
+                if product is not None:
+                    order._items[product_id] = (product, quantity)
+                    order._amounts[product_id] = product.price * quantity
+            offset += lines * BinaryCodec._line.size
+            orders.append(order)
+        return orders
+
+    #SUPPLIERS
+    @staticmethod
+    def _encode_stats(stats:RunningStats):
+        none = lambda value: math.nan if value is None else value
+        return BinaryCodec._stats.pack(stats._low, stats._width, stats._alpha, stats._count, stats._mean, stats._m2,
+                                       none(stats._ewma), none(stats._min), none(stats._max), len(stats._bins)) + \
+            struct.pack(f"<{len(stats._bins)}q", *stats._bins)
+
+    @staticmethod
+    def _decode_stats(view, offset:int):
+        low, width, alpha, count, mean, m2, ewma, min, max, bins = BinaryCodec._stats.unpack_from(view, offset)
+        offset += BinaryCodec._stats.size
+        stats = RunningStats.__new__(RunningStats)
+        stats._low, stats._width, stats._alpha = low, width, alpha
+        stats._count, stats._mean, stats._m2 = count, mean, m2
+        stats._ewma, stats._min, stats._max = (None if math.isnan(v) else v for v in (ewma, min, max))
+        stats._bins = list(struct.unpack_from(f"<{bins}q", view, offset))
+        return stats, offset + 8 * bins
+
+    def encode_suppliers(self, suppliers):
+        strings = {}
+        intern = lambda text: strings.setdefault(text, len(strings))
+        records = []
+        suppliers = list(suppliers)
+        for supplier in suppliers:
+            ids = [product.id for product in supplier.get_supplied_products()]
+            history = supplier._order_history
+            records.append(BinaryCodec._supplier.pack(intern(supplier.name), intern(supplier.contact_info or ""),
+                                                      len(ids), len(history)))
+            records.append(struct.pack(f"<{len(ids)}q", *ids))
+            for record in history:
+                delivered = record.get("delivery_date")
+                records.append(BinaryCodec._history.pack(record["order"].order_id, _micros(record["date"]),
+                                                         intern(record.get("status", "")),
+                                                         _micros(delivered) if delivered is not None else _NONE))
+            records.append(BinaryCodec._encode_stats(supplier._delivery_times))
+            records.append(BinaryCodec._encode_stats(supplier._quality_ratings))
+        return self._frame("suppliers", len(suppliers), strings, records)
+
+    def decode_suppliers(self, buffer, products, orders):
+        """
+        Suppliers of a buffer from encode_suppliers
+        :param products: Mapping of product id -> product, unknown ids are dropped
+        :param orders: Mapping of order id -> order for the order history, unknown ids are dropped
+        """
+        view, version, count, strings, offset = BinaryCodec._open(buffer, "suppliers")
+        suppliers = []
+        for _ in range(count):
+            name, contact, product_count, history_count = BinaryCodec._supplier.unpack_from(view, offset)
+            offset += BinaryCodec._supplier.size
+            supplier = Supplier(strings[name], strings[contact])
+            ids = struct.unpack_from(f"<{product_count}q", view, offset)
+            offset += 8 * product_count
+            supplier.add_product(*(products[id] for id in ids if id in products))
+            for order_id, date, status, delivered in BinaryCodec._history.iter_unpack(
+                    view[offset:offset + history_count * BinaryCodec._history.size]):
+                order = orders.get(order_id)
+                if order is None:
+                    continue
+                record = {"order": order, "date": _datetime(date), "status": strings[status]}
+                if delivered != _NONE:
+                    record["delivery_date"] = _datetime(delivered)
+                supplier._add_order_to_history(record)
+            offset += history_count * BinaryCodec._history.size
+            supplier._delivery_times, offset = BinaryCodec._decode_stats(view, offset)
+            supplier._quality_ratings, offset = BinaryCodec._decode_stats(view, offset)
+            suppliers.append(supplier)
+        return suppliers
@@ -0,0 +1,310 @@
+"""Locks and a thread-safe Inventory for multi-threaded order workers."""
+import threading
+from contextlib import contextmanager
+
+from classes.Inventory import Inventory
+from classes.Product import Product
+
+class StripedLock:
+    """Fixed pool of locks, a key always maps to the same stripe"""
+    def __init__(self, stripes:int=64):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def _stripes(self, keys):
+        # sorted and de-duplicated, so every thread acquires in the same order and can't deadlock
+        return sorted({hash(key) % len(self._locks) for key in keys})
+
+    @contextmanager
+    def hold(self, *keys):
+        """Hold the stripes of all keys at once"""
+        stripes = self._stripes(keys)
+        for i in stripes:
+            self._locks[i].acquire()
+        try:
+            yield
+        finally:
+            for i in reversed(stripes):
+                self._locks[i].release()
+
+
+class ReadWriteLock:
+    """
+    Many readers or one writer. Writers are preferred so a steady read load can't starve them.
+    Both sides are reentrant, and the writing thread may also take the read side.
+    """
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self):
+        depth = getattr(self._local, "depth", 0)
+        me = threading.get_ident()
+        if depth == 0 and self._writer != me:
+            with self._condition:
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+                self._readers += 1
+        self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            if depth == 0 and self._writer != me:
+                with self._condition:
+                    self._readers -= 1
+                    if self._readers == 0:
+                        self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer != me:
+                self._waiting_writers += 1
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+                self._waiting_writers -= 1
+                self._writer = me
+            self._writer_depth += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer_depth -= 1
+                if self._writer_depth == 0:
+                    self._writer = None
+                    self._condition.notify_all()
+
+
+class ConcurrentInventory(Inventory):
+    """
+    Inventory safe to share between threads.
+    Stock changes hold the stripe lock of each product involved, so per-product updates run in
+    parallel and orders created here check and apply all their line items under one acquisition.
+    Indexes, reports and the product dict sit behind a reader/writer lock.
+    :param stripes: Number of product lock stripes
+    """
+    def __init__(self, stripes:int=64, **kwargs):
+        self._stripes = StripedLock(stripes)
+        self._rw = ReadWriteLock()
+        self._journal_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def _stock_guard(self, products):
+        return self._stripes.hold(*(product.id for product in products))
+
+    #ATOMIC STOCK OPERATIONS
+    def add_stock(self, product_id, quantity:int):
+        product = self.find_product_by_id(product_id)
+        if not isinstance(product, Product):
+            return False
+        with self._stripes.hold(product_id):
+            product.add_stock(quantity)
+        return True
+
+    def remove_stock(self, product_id, quantity:int):
+        """Take stock only if enough is on hand, never oversells"""
+        product = self.find_product_by_id(product_id)
+        if not isinstance(product, Product):
+            return False
+        with self._stripes.hold(product_id):
+            if not product.remove_stock(quantity):
+                return False
+        return True
+
+    def compare_and_set_quantity(self, product_id, expected:int, new_quantity:int):
+        """Set the quantity only if it still equals expected, returns whether it was set"""
+        product = self.find_product_by_id(product_id)
+        if not isinstance(product, Product):
+            return False
+        with self._stripes.hold(product_id):
+            if product.quantity != expected:
+                return False
+            product.quantity = new_quantity
+        return True
+
+    #MUTATORS
+    def adjust_inventory(self, product_id, adjustment_amount, reason=""):
+        with self._stripes.hold(product_id):
+            return super().adjust_inventory(product_id, adjustment_amount, reason)
+
+    def correct_inventory(self, product_id, new_quantity, reason=""):
+        with self._stripes.hold(product_id):
+            return super().correct_inventory(product_id, new_quantity, reason)
+
+    def add_product(self, product:Product):
+        with self._stripes.hold(product.id), self._rw.write():
+            return super().add_product(product)
+
+    def _add_batch(self, batch:list):
+        with self._stripes.hold(*(product.id for product in batch)), self._rw.write():
+            return super()._add_batch(batch)
+
+    def _track_many(self, products):
+        with self._rw.write():
+            super()._track_many(products)
+
+    def update_product(self, product:Product, name:str, price:float, quantity:int):
+        with self._stripes.hold(product.id):
+            return super().update_product(product, name, price, quantity)
+
+    def remove_product(self, product:Product):
+        with self._stripes.hold(product.id), self._rw.write():
+            return super().remove_product(product)
+
+    def add_supplier(self, supplier):
+        with self._rw.write():
+            return super().add_supplier(supplier)
+
+    def create_order(self, order_type = "Purchase"):
+        with self._rw.write():
+            return super().create_order(order_type)
+
+    def _track(self, product:Product):
+        with self._rw.write():
+            super()._track(product)
+
+    def _untrack(self, product:Product):
+        with self._rw.write():
+            super()._untrack(product)
+
+    def _retrack(self, product:Product):
+        with self._rw.write():
+            super()._retrack(product)
+
+    def _order_changed(self, order, change:str, value=None):
+        with self._rw.write():
+            super()._order_changed(order, change, value)
+
+    def _supplier_changed(self, supplier, change:str, value):
+        with self._rw.write():
+            super()._supplier_changed(supplier, change, value)
+
+    def refresh_thresholds(self):
+        with self._rw.write():
+            super().refresh_thresholds()
+
+    def _journal(self, op:str, *args):
+        with self._journal_lock:
+            super()._journal(op, *args)
+
+    #READERS
+    @property
+    def products(self):
+        with self._rw.read():
+            return self._products.copy()
+
+    def find_product_by_id(self, product_id):
+        with self._rw.read():
+            return super().find_product_by_id(product_id)
+
+    def find_product_by_name(self, name:str):
+        with self._rw.read():
+            return super().find_product_by_name(name)
+
+    def find_product_by_type(self, type:str):
+        with self._rw.read():
+            return super().find_product_by_type(type)
+
+    def find_product_by_price(self, start:int, end:int):
+        with self._rw.read():
+            return super().find_product_by_price(start, end)
+
+    def find_product_by_quantity(self, start:int, end:int):
+        with self._rw.read():
+            return super().find_product_by_quantity(start, end)
+
+    def find_product_by_date(self, start, end):
+        with self._rw.read():
+            return super().find_product_by_date(start, end)
+
+    def find_supplier_by_name(self, name):
+        with self._rw.read():
+            return super().find_supplier_by_name(name)
+
+    def find_suppliers_by_product_type(self, product_type:str):
+        with self._rw.read():
+            return super().find_suppliers_by_product_type(product_type)
+
+    def find_suppliers_by_product(self, product_id):
+        with self._rw.read():
+            return super().find_suppliers_by_product(product_id)
+
+    def find_order_by_id(self, order_id):
+        with self._rw.read():
+            return super().find_order_by_id(order_id)
+
+    def find_orders(self, order_type:str=None, status=None, start=None, end=None, product_id=None):
+        with self._rw.read():
+            return super().find_orders(order_type, status, start, end, product_id)
+
+    def orders_for_product(self, product_id):
+        with self._rw.read():
+            return super().orders_for_product(product_id)
+
+    def sales(self, start=None, end=None, product_id=None, bucket:str="day"):
+        with self._rw.read():
+            return super().sales(start, end, product_id, bucket)
+
+    def top_suppliers(self, product_type:str=None, k:int=3, delivery_weight:float=0.5, quality_weight:float=0.5, recent:bool=False):
+        with self._rw.read():
+            return super().top_suppliers(product_type, k, delivery_weight, quality_weight, recent)
+
+    def total_value(self):
+        with self._rw.read():
+            return super().total_value()
+
+    def value_by_type(self):
+        with self._rw.read():
+            return super().value_by_type()
+
+    def list_product(self):
+        with self._rw.read():
+            return super().list_product()
+
+    def low_stock_products(self):
+        # polled outside the read lock, a reload re-checks the watchlist under the write lock
+        type(self).thresholds.poll()
+        with self._rw.read():
+            return self._low_stock.products()
+
+    def scan_products(self):
+        with self._rw.read():
+            return super().scan_products()
+
+    def product_groups(self):
+        with self._rw.read():
+            return super().product_groups()
+
+    def generate_inventory_report(self, format:str="text"):
+        with self._rw.read():
+            return super().generate_inventory_report(format)
+
+    def type_summary(self):
+        with self._rw.read():
+            return super().type_summary()
+
+    def write_inventory_report(self, fp, format:str="text"):
+        with self._rw.read():
+            super().write_inventory_report(fp, format)
+
+    def get_expired_products(self):
+        with self._rw.read():
+            return super().get_expired_products()
+
+    def expiring_products(self, days:int):
+        with self._rw.read():
+            return super().expiring_products(days)
+
+    def subscribe_low_stock(self, callback):
+        with self._rw.write():
+            super().subscribe_low_stock(callback)
+
+    def unsubscribe_low_stock(self, callback):
+        with self._rw.write():
+            super().unsubscribe_low_stock(callback)
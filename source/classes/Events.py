@@ -0,0 +1,175 @@
+"""Typed change events and the bus that delivers them to derived views and caches."""
+import threading
+from contextlib import contextmanager
+
+class Event:
+    """Base of all change events, target is the product or order concerned"""
+    __slots__ = ("target",)
+
+    def __init__(self, target):
+        self.target = target
+
+    def _key(self):
+        return (type(self), id(self.target))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.target!r})"
+
+
+class ProductAdded(Event):
+    __slots__ = ()
+
+
+class ProductRemoved(Event):
+    __slots__ = ()
+
+
+class Changed(Event):
+    """A field of the target went from old to new"""
+    __slots__ = ("field", "old", "new")
+
+    def __init__(self, target, field:str, old, new):
+        super().__init__(target)
+        self.field = field
+        self.old = old
+        self.new = new
+
+    def _key(self):
+        return (type(self), id(self.target), self.field)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.target!r}, {self.field}: {self.old!r} -> {self.new!r})"
+
+
+class ProductChanged(Changed):
+    """name, price, quantity or a field of a product type (expiry_date, size, ...) changed"""
+    __slots__ = ()
+
+
+class OrderChanged(Changed):
+    """status or order_type of an order changed"""
+    __slots__ = ()
+
+
+class BusGroup:
+    """The buses of every inventory holding one product, a product held by one inventory links that bus directly"""
+    __slots__ = ("buses",)
+
+    def __init__(self, buses:tuple):
+        self.buses = buses
+
+    def changed(self, event_type, target, field:str, old, new):
+        for bus in self.buses:
+            bus.changed(event_type, target, field, old, new)
+
+
+class EventBus:
+    """
+    Delivers events to subscribers, either synchronously (callback(event), as each event happens)
+    or batched (callback(events)). Inside a batch() block batched subscribers get one list per
+    block with the changes coalesced: one event per target and field, first old value, last new
+    value, changes that ended where they started dropped. Outside a batch they get [event] at once.
+    Batches are per thread. Publishers check wants() first so nothing is built when nobody listens.
+    """
+    def __init__(self):
+        self._sync = []         # (callback, event types)
+        self._batched = []      # (callback, event types)
+        self._wanted = set()    # event types somebody subscribed to, subclasses included
+        self._local = threading.local()
+
+    def subscribe(self, callback, types:tuple=(Event,), batched:bool=False):
+        """
+        :param types: Event classes the callback wants, subclasses included
+        :param batched: Deliver lists of coalesced events instead of single events
+        """
+        (self._batched if batched else self._sync).append((callback, tuple(types)))
+        self._refresh()
+
+    def unsubscribe(self, callback):
+        self._sync = [s for s in self._sync if s[0] != callback]
+        self._batched = [s for s in self._batched if s[0] != callback]
+        self._refresh()
+
+    def _refresh(self):
+        types = {t for _, subscribed in self._sync + self._batched for t in subscribed}
+        self._wanted = {cls for cls in EventBus._event_classes() if issubclass(cls, tuple(types))} if types else set()
+
+    @staticmethod
+    def _event_classes():
+        classes, stack = [], [Event]
+        while stack:
+            cls = stack.pop()
+            classes.append(cls)
+            stack.extend(cls.__subclasses__())
+        return classes
+
+    #LINKING
+    def link(self, target):
+        """Make target (a product) publish its changes on this bus, besides any bus it already publishes on"""
+        current = target._events
+        if current is None or current is self:
+            target._events = self
+        elif isinstance(current, BusGroup):
+            if self not in current.buses:
+                target._events = BusGroup(current.buses + (self,))
+        else:
+            target._events = BusGroup((current, self))
+
+    def unlink(self, target):
+        current = target._events
+        if current is self:
+            target._events = None
+        elif isinstance(current, BusGroup) and self in current.buses:
+            buses = tuple(bus for bus in current.buses if bus is not self)
+            target._events = buses[0] if len(buses) == 1 else BusGroup(buses)
+
+    def linked(self, target):
+        current = target._events
+        return current is self or (isinstance(current, BusGroup) and self in current.buses)
+
+    def wants(self, event_type):
+        return event_type in self._wanted
+
+    def publish(self, event:Event):
+        if type(event) not in self._wanted:
+            return
+        for callback, types in self._sync:
+            if isinstance(event, types):
+                callback(event)
+        if not self._batched:
+            return
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            self._deliver([event])
+            return
+        key = event._key()
+        first = pending.get(key)
+        if first is not None and isinstance(event, Changed):
+            event = type(event)(event.target, event.field, first.old, event.new)
+        pending[key] = event
+
+    def changed(self, event_type, target, field:str, old, new):
+        """Publish a Changed event, skipped entirely when nobody wants that type"""
+        if event_type in self._wanted and old != new:
+            self.publish(event_type(target, field, old, new))
+
+    @contextmanager
+    def batch(self):
+        """Collect this thread's events for the batched subscribers until the outermost block ends"""
+        if getattr(self._local, "pending", None) is not None:
+            yield
+            return
+        self._local.pending = {}
+        try:
+            yield
+        finally:
+            pending, self._local.pending = self._local.pending, None
+            events = [e for e in pending.values() if not isinstance(e, Changed) or e.old != e.new]
+            if events:
+                self._deliver(events)
+
+    def _deliver(self, events:list):
+        for callback, types in self._batched:
+            wanted = [event for event in events if isinstance(event, types)]
+            if wanted:
+                callback(wanted)
@@ -0,0 +1,172 @@
+"""Id allocators handing out increasing ids in leased blocks, process-local, file-backed or SQLite-backed."""
+import os
+import sqlite3
+import threading
+import weakref
+from operator import length_hint
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+_allocators = weakref.WeakSet()
+
+def _after_fork():
+    # a forked child must not hand out what is left of the parent's block
+    for allocator in list(_allocators):
+        allocator._ids = iter(())
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+class IdAllocator:
+    """
+    Hands out increasing ids. Ids come from a block leased from the backing store, so the hot
+    path is one step of a range iterator, atomic under the GIL and free of locks; only a thread
+    finding the block used up takes the lock to lease the next one. Ids are unique, increasing
+    within a process, and leave gaps where a block was not used up (restart, fork, advance).
+    Subclasses implement _lease(count) -> first id of a fresh block, and _floor(past).
+    :param block: Ids per lease
+    """
+    def __init__(self, block:int=1000):
+        if block < 1:
+            raise ValueError("Block size must be at least 1")
+        self._block = block
+        self._ids = iter(())
+        self._limit = 0
+        self._lock = threading.Lock()
+        _allocators.add(self)
+
+    def allocate(self):
+        ids = self._ids
+        for id in ids:
+            return id
+        with self._lock:
+            if self._ids is ids:
+                start = self._lease(self._block)
+                self._limit = start + self._block
+                self._ids = iter(range(start, self._limit))
+        return self.allocate()
+
+    __call__ = allocate
+
+    def advance(self, past:int):
+        """Make every id handed out from now on greater than past, after restoring state that used ids up to it"""
+        with self._lock:
+            if self._limit - length_hint(self._ids) > past:
+                return
+            self._ids = iter(())
+            self._floor(past)
+
+    def _lease(self, count:int):
+        raise NotImplementedError
+
+    def _floor(self, past:int):
+        raise NotImplementedError
+
+
+class LocalIdAllocator(IdAllocator):
+    """Ids from a counter in this process, the default, unique only within one process"""
+    def __init__(self, start:int=1, block:int=1000):
+        super().__init__(block)
+        self._next = start
+
+    def _lease(self, count:int):
+        start = self._next
+        self._next += count
+        return start
+
+    def _floor(self, past:int):
+        self._next = max(self._next, past + 1)
+
+
+class FileIdAllocator(IdAllocator):
+    """
+    Ids from a small file holding the next free id, shared by every process using the same path.
+    A lease locks the file (fcntl), reads the id, writes it plus the block size and syncs it,
+    so ids stay unique across processes and restarts. POSIX only.
+    :param path: Counter file, created if missing
+    """
+    def __init__(self, path:str, block:int=1000):
+        if fcntl is None:
+            raise NotImplementedError("FileIdAllocator needs fcntl file locks (POSIX)")
+        super().__init__(block)
+        self._path = path
+
+    @property
+    def path(self):
+        return self._path
+
+    def _update(self, function):
+        """Replace the stored next id n with function(n) under the file lock, returns n"""
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            text = os.read(fd, 32).strip()
+            current = int(text) if text else 1
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, b"%d\n" % function(current))
+            os.fsync(fd)
+            return current
+        finally:
+            os.close(fd)  # closing releases the lock
+
+    def _lease(self, count:int):
+        return self._update(lambda current: current + count)
+
+    def _floor(self, past:int):
+        self._update(lambda current: max(current, past + 1))
+
+
+class SQLiteIdAllocator(IdAllocator):
+    """
+    Ids from a named sequence row in a SQLite database, shared by every process using the file.
+    A lease is one short write transaction, SQLite's database lock serializes the leases.
+    :param path: Database file, may be the one a SQLiteInventory uses
+    :param name: Sequence name, one row per name
+    """
+    def __init__(self, path:str, name:str, block:int=1000):
+        super().__init__(block)
+        self._path = path
+        self._name = name
+        self._connection = None
+        self._pid = None
+
+    @property
+    def name(self):
+        return self._name
+
+    def _connect(self):
+        # connections must not be shared with a forked child, reconnect in a new process
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self._path, isolation_level=None, check_same_thread=False, timeout=30)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS id_sequences (name TEXT PRIMARY KEY, next INTEGER NOT NULL)")
+            self._pid = os.getpid()
+        return self._connection
+
+    def _update(self, sql:str, params:tuple):
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("INSERT OR IGNORE INTO id_sequences VALUES (?, 1)", (self._name,))
+            current = connection.execute("SELECT next FROM id_sequences WHERE name = ?", (self._name,)).fetchone()[0]
+            connection.execute(sql, params + (self._name,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return current
+
+    def _lease(self, count:int):
+        return self._update("UPDATE id_sequences SET next = next + ? WHERE name = ?", (count,))
+
+    def _floor(self, past:int):
+        self._update("UPDATE id_sequences SET next = MAX(next, ?) WHERE name = ?", (past + 1,))
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,70 @@
+"""Streaming product import from CSV and JSON lines files."""
+import csv
+import datetime
+import json
+import os
+
+from products.Clothing import Clothing
+from products.Electronics import Electronics
+from products.Food import Food
+
+class ProductImporter:
+    """
+    Turns CSV or JSON lines rows into Electronics/Clothing/Food products lazily, one row at a time.
+    Recognised fields: type, name, price, quantity, warranty_months, size, material, expiry_date, info.
+    :param default_type: Product type used for rows without a type field (e.g. source/items.csv)
+    """
+    builders = {
+        "Electronics": lambda row: Electronics(row["name"], float(row["price"]), int(row["quantity"]),
+                                               int(row.get("warranty_months") or 0), row.get("info") or ""),
+        "Clothing": lambda row: Clothing(row["name"], float(row["price"]), int(row["quantity"]),
+                                         row["size"], row["material"], row.get("info") or ""),
+        "Food": lambda row: Food(row["name"], float(row["price"]), int(row["quantity"]),
+                                 ProductImporter._date(row["expiry_date"]), row.get("info") or ""),
+    }
+
+    def __init__(self, default_type:str="Electronics"):
+        if default_type not in ProductImporter.builders:
+            raise ValueError(f"Please choose from {list(ProductImporter.builders)}")
+        self._default_type = default_type
+
+    @staticmethod
+    def _date(value):
+        return value if isinstance(value, datetime.date) else datetime.date.fromisoformat(value)
+
+    def build(self, row:dict, line:int=0):
+        """Create one product from a row, errors name the offending line"""
+        type = row.get("type") or self._default_type
+        builder = ProductImporter.builders.get(type)
+        if builder is None:
+            raise ValueError(f"Line {line}: unknown product type {type!r}")
+        try:
+            return builder(row)
+        except (KeyError, TypeError, ValueError) as error:
+            raise ValueError(f"Line {line}: invalid {type} row ({error!r})") from error
+
+    def read_csv(self, path:str):
+        """Yield products from a CSV file with a header row"""
+        with open(path, newline="", encoding="utf-8") as f:
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                yield self.build(row, line)
+
+    def read_jsonl(self, path:str):
+        """Yield products from a file with one JSON object per line"""
+        with open(path, encoding="utf-8") as f:
+            for line, text in enumerate(f, start=1):
+                if text.strip():
+                    yield self.build(json.loads(text), line)
+
+    def read(self, path:str):
+        """Pick the reader from the file extension (.csv, .jsonl or .ndjson)"""
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".csv":
+            return self.read_csv(path)
+        if extension in (".jsonl", ".ndjson"):
+            return self.read_jsonl(path)
+        raise ValueError(f"Unsupported file type: {extension}")
+
+    def import_into(self, inventory, path:str, batch_size:int=10000):
+        """Stream a file into an inventory through Inventory.add_products, returns the number of rows"""
+        return inventory.add_products(self.read(path), batch_size)
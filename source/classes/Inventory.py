@@ -1,25 +1,50 @@
 from classes.Product import Product
 from classes.Order import Order
+from classes.OrderRepository import OrderRepository
 from classes.Supplier import Supplier
-from classes.Audit import AuditLog
+from classes.Audit import AuditTrail
+from classes.ProductIndex import ProductIndex
+from classes.ProductColumns import ProductColumns
+from classes.Parallel import ParallelScanner
+from classes.Report import InventoryReport, TypeTotals
+from classes.Watchlist import LowStockWatchlist, ExpiryWatchlist
+from classes.Threshold import StockThresholdProvider, ThresholdConfig
+from classes.Events import EventBus, ProductAdded, ProductRemoved, ProductChanged, OrderChanged
 
 from products.Clothing import Clothing
 from products.Electronics import Electronics
 from products.Food import Food
-import json
 import datetime
+import heapq
+from contextlib import nullcontext
+from itertools import islice
 
 
 
 class Inventory:
     """Main inventory management system class"""
-    with open("source/products/product_stock_threshold.json", "r", encoding="utf-8") as f:
-        stock_threshold = json.load(f)
-    def __init__(self):
+    thresholds = StockThresholdProvider() #shared rules, swap for a provider on another file before creating inventories
+    stock_threshold = ThresholdConfig() #raw rules dict, loaded on first access
+    def __init__(self, log_capacity:int=10000, parallel:int=0):
+        self._events = EventBus()
+        self._events.subscribe(self._products_changed, (ProductChanged,), batched=True)
         self._products = {}
         self._suppliers = []
-        self._orders = []
-        self._logs = []
+        self._supplier_names = {} #case-folded name -> suppliers with that name
+        self._supplier_types = {} #product type -> {supplier: None}, a dict keeps them in insertion order
+        self._product_suppliers = {} #product id -> {supplier: None}
+        self._orders = OrderRepository()
+        self._logs = AuditTrail(log_capacity)
+        self._index = ProductIndex()
+        # columns only back scan_products, parallel=1 scans them in this process
+        self._columns = ProductColumns(shared=parallel > 1) if parallel else None
+        self._scanner = ParallelScanner(self._columns, parallel) if parallel else None #worker processes for scan_products
+        self._totals = TypeTotals()
+        self._threshold_table = None
+        self._low_stock = LowStockWatchlist(self.threshold_for)
+        self._expiry = ExpiryWatchlist()
+        self._storage = None #InventoryStore journaling the mutations, see classes.Storage
+        type(self).thresholds.subscribe(self.refresh_thresholds)
     
     @property
     def products(self):
@@ -27,15 +52,27 @@ class Inventory:
 
     @property
     def logs(self):
-        txt=""
-        for i in self._logs:
-            txt += i + "\n"
-        return txt + "\n\n"
+        return AuditTrail.format(self._logs) + "\n\n"
 
     @staticmethod
     def calculate_inventory_value(products):
         return sum(product.calculate_value_of_stock() for product in products)
 
+    def total_value(self):
+        """Value of every product in the inventory, read from the running per-type totals"""
+        return self._totals.total_value()
+
+    def value_by_type(self):
+        """Stock value per product type, read from the running per-type totals"""
+        return {type: value for type, (_, _, value) in self._totals.summary().items()}
+
+    def close(self):
+        """Shut down the scan worker processes of a parallel inventory and free its shared columns"""
+        if self._scanner is not None:
+            self._scanner.close()
+        if self._columns is not None:
+            self._columns.close()
+
     @classmethod
     def create_sample_inventory(cls):
         """Class method to create a sample inventory with different product types"""
@@ -63,13 +100,12 @@ class Inventory:
         :param reason: Reason for the adjustment
         :return: Boolean indicating success
         """
-        if product_id in self._products:
-            old_quantity = self._products[product_id].quantity
-            self._products[product_id].quantity += adjustment_amount
+        product = self._products.get(product_id)
+        if product is not None:
+            old_quantity = product.quantity
             # Prevent negative quantities
-            if self._products[product_id].quantity < 0:
-                self._products[product_id].quantity = 0
-            self._logs.append(f"Inventory adjusted for product {product_id}: {old_quantity} -> {self._products[product_id].quantity} ({reason})")
+            product.quantity = max(old_quantity + adjustment_amount, 0)
+            self._logs.record(product, "ADJUST", product.quantity, old_quantity, reason)
             return True
         return False
     
@@ -81,72 +117,350 @@ class Inventory:
         :param reason: Reason for the correction
         :return: Boolean indicating success
         """
-        if product_id in self._products and new_quantity >= 0:
-            old_quantity = self._products[product_id].quantity
-            self._products[product_id].quantity = new_quantity
-            self._logs.append(f"Inventory corrected for product {product_id}: {old_quantity} -> {new_quantity} ({reason})")
+        product = self._products.get(product_id)
+        if product is not None and new_quantity >= 0:
+            old_quantity = product.quantity
+            product.quantity = new_quantity
+            self._logs.record(product, "CORRECT", new_quantity, old_quantity, reason)
             return True
         return False
 #####
 
     def add_product(self, product:Product):
-        if product in self._products.values():
-            self._products[product.id].quantity += product.quantity
+        existing = self._products.get(product.id)
+        if existing is not None:
+            # the new quantity is journaled as a product change, the product itself is already in the log
+            existing.quantity += product.quantity
         else:
             self._products[product.id] = product
+            self._track(product)
+            self._journal("add", product)
         
-        self._logs.append(f"{AuditLog(product, "ADD", product.quantity)}")
+        self._logs.record(product, "ADD", product.quantity)
         
+    def add_products(self, products, batch_size:int=10000):
+        """
+        Add many products at once. Each batch is validated before any of it is applied,
+        indexed in one step and logged as a single BULK_ADD audit record.
+        Products whose id is already in the inventory add their quantity, like add_product.
+        :param products: Iterable of products, consumed lazily batch by batch
+        :param batch_size: Number of products per batch
+        :return: Number of products processed
+        """
+        count = 0
+        products = iter(products)
+        while True:
+            batch = list(islice(products, batch_size))
+            if not batch:
+                return count
+            self._add_batch(batch)
+            count += len(batch)
+
+    @staticmethod
+    def _validate_batch(batch:list):
+        for product in batch:
+            if not isinstance(product, Product):
+                raise TypeError(f"Expected a product, got {type(product).__name__}")
+            if product.price < 0 or product.quantity < 0:
+                raise ValueError(f"Price and quantity cannot be negative: {product}")
+
+    def _log_batch(self, batch:list):
+        self._logs.record(f"Products {batch[0].id}..{batch[-1].id}", "BULK_ADD",
+                          sum(product.quantity for product in batch), note=f"{len(batch)} products")
+
+    def _add_batch(self, batch:list):
+        Inventory._validate_batch(batch)
+        fresh = {}
+        with self._events.batch():
+            for product in batch:
+                existing = fresh.get(product.id)
+                if existing is None:
+                    existing = self._products.get(product.id)
+                if existing is None:
+                    fresh[product.id] = product
+                else:
+                    existing.quantity += product.quantity
+            self._products.update(fresh)
+            self._track_many(fresh.values())
+        # new products carry the quantities merged into them, stocked ones journal their new quantity as a change
+        self._journal("add_many", list(fresh.values()))
+        self._log_batch(batch)
+
     def update_product(self, product:Product, name:str, price:float, quantity:int):
-        product.name = name
-        product.price = price
-        product.quantity = quantity
+        with self._events.batch():
+            product.name = name
+            product.price = price
+            product.quantity = quantity
 
-        self._logs.append(f"{AuditLog(product, "UPDATE", product.quantity)}")
+        self._logs.record(product, "UPDATE", product.quantity)
         return product
 
     def remove_product(self, product:Product):
         if product.id in self._products:
             self._products.pop(product.id)
-            self._logs.append(f"{AuditLog(product, "REMOVE", product.quantity)}")
+            self._untrack(product)
+            self._journal("remove", product.id)
+            self._logs.record(product, "REMOVE", product.quantity)
         else:
             return f"There is no product that has id:{product.id}"
 
     def add_supplier(self, supplier:Supplier):
-        self._suppliers.append(supplier)
-        self._logs.append(f"{AuditLog(supplier, "SUPPLIER", 1)}")
+        self._index_supplier(supplier)
+        self.refresh_thresholds()
+        self._journal("supplier", len(self._suppliers) - 1, supplier)
+        self._logs.record(supplier, "SUPPLIER", 1)
         return None
 
     def create_order(self, order_type = "Purchase"):
         order = Order(order_type)
-        self._orders.append(order)
-        self._logs.append(f"{AuditLog(order_type, "ORDER", 1)}")
+        self._register_order(order)
+        self._journal("order", order.order_id, order_type)
+        self._logs.record(order, "ORDER", 1, note=order_type)
 
         return order
 
     
+    def execute_orders(self, orders:list):
+        """
+        Execute many orders in one pass: the stock of every product involved is guarded once,
+        each order is checked against the stock left by the ones before it, and the indexes are
+        refreshed once per product at the end. Every order is still all-or-nothing.
+        :param orders: Orders to execute, in priority order
+        :return: List of (order, error) pairs, error is None for executed orders
+        """
+        products = {product.id: product for order in orders for product, _ in order.order_items}
+        results = []
+        # stock changes are coalesced, each product is re-indexed once when the batch ends
+        with self._events.batch(), self._stock_guard(list(products.values())):
+            for order in orders:
+                try:
+                    order._check()
+                    applied = order._apply()
+                except ValueError as error:
+                    results.append((order, error))
+                    continue
+                results.append((order, None))
+                self._order_executed(order, applied)
+        return results
+
+    def _order_executed(self, order:Order, applied:list):
+        """
+        Called by orders created through this inventory with the (product, quantity) items whose stock moved.
+        Nothing to journal here, the stock moves and the status are journaled as they change.
+        """
+
+    def _register_order(self, order:Order):
+        """Link an order to this inventory and index it"""
+        order._inventory = self
+        self._orders.add(order)
+
+    def _order_changed(self, order:Order, change:str, value=None):
+        """
+        Called by linked orders: "item_added" with (product, quantity added), "item_removed" with the
+        product id, "status"/"order_type" with the old value
+        """
+        if change == "item_added":
+            product, quantity = value
+            self._orders.item_added(order, product.id)
+            # the whole line, replaying it over a snapshot that already has it changes nothing
+            self._journal("item_added", order.order_id, product, order._items[product.id][1])
+        elif change == "item_removed":
+            self._orders.item_removed(order, value)
+            self._journal("item_removed", order.order_id, value)
+        else:
+            self._orders.changed(order)
+            self._journal("order_changed", order.order_id, change, getattr(order, change))
+            self._events.changed(OrderChanged, order, change, value, getattr(order, change))
+
+    def _stock_guard(self, products):
+        """Context held by orders while they check and move stock of the given products"""
+        return nullcontext()
+
+    #PERSISTENCE
+    def _journal(self, op:str, *args):
+        if self._storage is not None:
+            self._storage.record(op, *args)
+
+    def _journal_change(self, event:ProductChanged):
+        """Sync subscriber while a store is attached, journals the value a product field was set to"""
+        self._journal("set", event.target.id, event.field, event.new)
+
+    def _restore(self, products, suppliers, orders):
+        """Load state read from a snapshot, bypassing the audit log and the journal"""
+        for product in products:
+            self._products[product.id] = product
+            self._track(product)
+        for supplier in suppliers:
+            self._index_supplier(supplier)
+        for order in orders:
+            self._register_order(order)
+
+    #DERIVED VIEWS
+    @property
+    def events(self):
+        """
+        EventBus announcing ProductAdded, ProductRemoved, ProductChanged and OrderChanged,
+        the indexes, totals and watchlists below are kept current through it
+        """
+        return self._events
+
+    def _link(self, product:Product):
+        """Make the product publish its changes on this inventory's bus, it may be held by other inventories too"""
+        self._events.link(product)
+        if self._events.wants(ProductAdded):
+            self._events.publish(ProductAdded(product))
+
+    def _unlink(self, product:Product):
+        self._events.unlink(product)
+        if self._events.wants(ProductRemoved):
+            self._events.publish(ProductRemoved(product))
+
+    def _products_changed(self, events:list):
+        """Re-index each product once per batch of changes, products removed meanwhile are skipped"""
+        products = {}
+        for event in events:
+            if self._events.linked(event.target):
+                products[event.target.id] = event.target
+        for product in products.values():
+            self._retrack(product)
+
+    def _track(self, product:Product):
+        """Register a newly added product with the indexes"""
+        self._link(product)
+        self._index.add(product)
+        self._totals.add(product)
+        self._low_stock.update(product)
+        self._expiry.update(product)
+        if self._columns is not None:
+            self._columns.add(product)
+
+    def _track_many(self, products):
+        """Register a batch of newly added products, sorting each index once"""
+        products = list(products)
+        self._index.add_many(products)
+        for product in products:
+            self._link(product)
+            self._totals.add(product)
+            self._low_stock.update(product)
+            self._expiry.update(product)
+        if self._columns is not None:
+            for product in products:
+                self._columns.add(product)
+
+    def _untrack(self, product:Product):
+        self._unlink(product)
+        self._index.remove(product)
+        self._totals.remove(product)
+        self._low_stock.remove(product)
+        self._expiry.remove(product)
+        if self._columns is not None:
+            self._columns.remove(product)
+
+    def _retrack(self, product:Product):
+        """Refresh the indexes after a product's name, price, quantity or expiry date changed"""
+        self._index.update(product)
+        self._totals.update(product)
+        self._low_stock.update(product)
+        self._expiry.update(product)
+        if self._columns is not None:
+            self._columns.update(product)
+
     #SUPPLIERS
+    def _index_supplier(self, supplier:Supplier):
+        self._suppliers.append(supplier)
+        self._supplier_names.setdefault(supplier.name.casefold(), []).append(supplier)
+        for type in supplier.product_types():
+            self._supplier_types.setdefault(type, {})[supplier] = None
+        for product in supplier.get_supplied_products():
+            self._product_suppliers.setdefault(product.id, {})[supplier] = None
+        supplier.subscribe(self._supplier_changed)
+
+    def _supplier_changed(self, supplier:Supplier, change:str, value):
+        """Journal Supplier changes and keep the supplier indexes in sync with renames and product changes"""
+        if self._storage is not None:
+            self._journal_supplier(supplier, change, value)
+        if change == "rename":
+            suppliers = self._supplier_names[value.casefold()]
+            suppliers.remove(supplier)
+            if not suppliers:
+                del self._supplier_names[value.casefold()]
+            self._supplier_names.setdefault(supplier.name.casefold(), []).append(supplier)
+            if type(self).thresholds.config.get("Suppliers"):
+                self.refresh_thresholds()
+            return
+        if change not in ("add", "remove"):
+            return
+        product_type = value.get_product_type()
+        if change == "add":
+            self._supplier_types.setdefault(product_type, {})[supplier] = None
+            self._product_suppliers.setdefault(value.id, {})[supplier] = None
+        else:
+            suppliers = self._product_suppliers[value.id]
+            del suppliers[supplier]
+            if not suppliers:
+                del self._product_suppliers[value.id]
+            if not supplier.supplies(product_type):
+                suppliers = self._supplier_types[product_type]
+                del suppliers[supplier]
+                if not suppliers:
+                    del self._supplier_types[product_type]
+        if type(self).thresholds.config.get("Suppliers"):
+            self.refresh_thresholds()
+
+    def _journal_supplier(self, supplier:Supplier, change:str, value):
+        """Suppliers are journaled by their position, they are only ever appended"""
+        if change == "rename":
+            value = supplier.name
+        elif change == "contact":
+            value = supplier.contact_info
+        elif change == "remove":
+            value = value.id
+        elif change == "order":
+            value = dict(value, order=value["order"].order_id)
+        elif change == "delivery":
+            value = (value, supplier.delivery_stats.count)
+        elif change == "quality":
+            value = (value, supplier.quality_stats.count)
+        self._journal("supplier_changed", self._suppliers.index(supplier), change, value)
+
     def find_supplier_by_name(self, name):
         """Find a supplier by name"""
-        for supplier in self._suppliers:
-            if supplier.name.lower() == name.lower():
-                return supplier
-        return None
+        suppliers = self._supplier_names.get(name.casefold())
+        return suppliers[0] if suppliers else None
     
     def find_suppliers_by_product_type(self, product_type:str):
         """Find suppliers that supply a specific product type"""
-        matching_suppliers = []
-        for supplier in self._suppliers:
-            for product in supplier.get_supplied_products():
-                if product.get_product_type() == product_type:
-                    matching_suppliers.append(supplier)
-                    break  # Don't add the same supplier multiple times
-        return matching_suppliers
+        return list(self._supplier_types.get(product_type, ()))
+
+    def find_suppliers_by_product(self, product_id):
+        """Find suppliers that supply a specific product"""
+        return list(self._product_suppliers.get(product_id, ()))
     
     def get_all_suppliers(self):
         """Return a list of all suppliers"""
         return self._suppliers
 
+    @staticmethod
+    def supplier_score(supplier:Supplier, delivery_weight:float=0.5, quality_weight:float=0.5, recent:bool=False):
+        """
+        Weighted supplier score, higher is better. Quality maps 1-5 onto 0-1, delivery maps
+        d days onto 1 / (1 + d); a metric without any records contributes 0.
+        :param recent: Use the exponentially weighted means instead of the all-time means
+        """
+        quality, delivery = supplier.quality_stats, supplier.delivery_stats
+        quality_score = ((quality.ewma if recent else quality.mean) - 1) / 4 if quality.count else 0
+        delivery_score = 1 / (1 + (delivery.ewma if recent else delivery.mean)) if delivery.count else 0
+        return quality_weight * quality_score + delivery_weight * delivery_score
+
+    def top_suppliers(self, product_type:str=None, k:int=3, delivery_weight:float=0.5, quality_weight:float=0.5, recent:bool=False):
+        """
+        Best k suppliers of a product type (all suppliers if None) by supplier_score, best first.
+        Selected with a size-k heap, ties keep the order the suppliers were added in.
+        """
+        candidates = self._suppliers if product_type is None else self.find_suppliers_by_product_type(product_type)
+        return heapq.nlargest(k, candidates,
+                              key=lambda supplier: Inventory.supplier_score(supplier, delivery_weight, quality_weight, recent))
+
     def place_order_with_supplier(self, supplier:Supplier, products_quantities:dict):
         """
         Place an order with a supplier for specific products
@@ -155,11 +469,17 @@ class Inventory:
         :param products_quantities: Dictionary of product_id to quantity
         :return: Order object
         """
-        order = self.create_order("Purchase")
+        lines = []
         for product_id, quantity in products_quantities.items():
             product = self.find_product_by_id(product_id)
             if product:
-                order.add_item(product, quantity)
+                lines.append((product, quantity))
+        return self._place_supplier_order(supplier, lines)
+
+    def _place_supplier_order(self, supplier:Supplier, lines:list):
+        """Purchase order from (product, quantity) lines with distinct products, added in one go"""
+        order = self.create_order("Purchase")
+        order.add_items(lines)
         # Add the order to supplier's history
         supplier._add_order_to_history({
             'order': order,
@@ -180,58 +500,59 @@ class Inventory:
             delivery_date = datetime.datetime.now()
 
         # Update order status in supplier's history
-        for order_record in supplier._order_history:
-            if order_record['order'].order_id == order.order_id:
-                order_record['delivery_date'] = delivery_date
-                order_record['status'] = 'delivered'
-                # Record delivery time
-                order_placed = order_record['date']
-                delivery_time = (delivery_date - order_placed).days
-                supplier.add_delivery_record(delivery_time)
-                return True
-        return False
+        order_record = supplier.find_order_record(order.order_id)
+        if order_record is None:
+            return False
+        supplier._update_order_record(order.order_id, delivery_date=delivery_date, status='delivered')
+        # Record delivery time
+        order_placed = order_record['date']
+        delivery_time = (delivery_date - order_placed).days
+        supplier.add_delivery_record(delivery_time)
+        return True
+
+    #ORDERS
+    def find_order_by_id(self, order_id):
+        return self._orders.get(order_id)
+
+    def find_orders(self, order_type:str=None, status=None, start:datetime.datetime=None, end:datetime.datetime=None, product_id=None):
+        """
+        Orders matching every given filter, served from the order indexes
+        :param status: One status or a tuple of statuses (pending, reserved, executed, cancelled)
+        :param start: Earliest order date, with end ordered by date
+        """
+        return self._orders.find(order_type, status, start, end, product_id)
+
+    def orders_for_product(self, product_id):
+        return self._orders.for_product(product_id)
+
+    def sales(self, start:datetime.date=None, end:datetime.date=None, product_id=None, bucket:str="day"):
+        """Units and revenue of executed sales per product: {day/week/month start: {product id: (units, revenue)}}"""
+        return self._orders.sales(start, end, product_id, bucket)
 
     #FILTERS
 
     def find_product_by_id(self, product_id:Product.id):
-        if product_id in self._products:
-            return self._products[product_id]
+        product = self._products.get(product_id)
+        if product is not None:
+            return product
         else:
             return f"There is no product that has id: {product_id}"
 
     def find_product_by_name(self, name:str):
         if name or len(name) > 0:
-            for product in self._products.values():
-                if name.lower() == product.name.lower():
-                    return product 
+            return self._index.by_name(name)
 
     def find_product_by_type(self, type:str):
-        list = []
-        for product in self._products.values():
-            if product.get_product_type() == type:
-                list.append(product)
-        return list
+        return self._index.by_type(type)
 
     def find_product_by_price(self, start:int, end:int):
-        list = []
-        for product in self._products.values():
-            if start <= product.price <= end:
-                list.append(product)
-        return list
+        return self._index.by_price(start, end)
 
     def find_product_by_quantity(self, start:int, end:int):
-        list = []
-        for product in self._products.values():
-            if start <= product.quantity <= end:
-                list.append(product)
-        return list
+        return self._index.by_quantity(start, end)
 
     def find_product_by_date(self, start: datetime, end: datetime):
-        result = []
-        for product in self._products.values():
-            if start <= product._creation_date <= end:
-                result.append(product)
-        return result
+        return self._index.by_date(start, end)
 
     #REPORTS
 
@@ -244,46 +565,87 @@ class Inventory:
     def product_count(self):
         return len(self._products)
 
+    #THRESHOLDS
+    def _thresholds(self):
+        table = self._threshold_table
+        if table is None:
+            table = self._compile_thresholds()
+        return table
+
+    def _compile_thresholds(self):
+        self._threshold_table = type(self).thresholds.compile(self._suppliers)
+        return self._threshold_table
+
+    def threshold_for(self, product:Product):
+        """Low-stock threshold of a product: its SKU rule, else its suppliers' rule, else its type's"""
+        return self._thresholds().get(product)
+
+    def refresh_thresholds(self):
+        """Recompile the threshold table and re-check only the products whose threshold changed"""
+        old = self._threshold_table
+        new = self._compile_thresholds()
+        if old is None:
+            return
+        types, ids = old.changes(new)
+        for type in types:
+            for product in self._index.by_type(type):
+                self._low_stock.update(product)
+        for id in ids:
+            product = self._products.get(id)
+            if product is not None:
+                self._low_stock.update(product)
+
     def low_stock_products(self):
-        return [product for product in self._products.values()
-                if product.quantity < Inventory.stock_threshold["Products"][product.get_product_type()]]
+        """Products below their threshold, read from the watchlist"""
+        type(self).thresholds.poll()
+        return self._low_stock.products()
 
-    def product_groups(self):
-        product_groups = {}
-        for product in self._products.values():
-            type = product.get_product_type()
-            if type not in product_groups:
-                product_groups[type] = []
-            product_groups[type].append(product)
-        
-        return product_groups
+    def subscribe_low_stock(self, callback):
+        """Call callback(product, is_low) whenever a product drops below or climbs back over its threshold"""
+        self._low_stock.subscribe(callback)
 
-    def generate_inventory_report(self):
+    def unsubscribe_low_stock(self, callback):
+        self._low_stock.unsubscribe(callback)
+
+    def scan_products(self):
         """
-        Generate an inventory report
+        Recompute everything from the columnar store in one pass, split over the worker processes
+        of Inventory(parallel=n): count/quantity/value_by_type, total_value, low_stock and expired products.
+        A from-scratch check of the running totals and watchlists, which answer the usual queries.
         """
-        report = "=== INVENTORY REPORT ===\n"
-        report += f"Total Products: {self.product_count()}\n"
-        report += f"Total Value Of Inventory {Inventory.calculate_inventory_value(self._products.values())}\n\n"
+        if self._scanner is None:
+            raise ValueError("scan_products needs Inventory(parallel=n), parallel=1 scans in this process")
+        table = self._thresholds()
+        result = self._scanner.scan(table.types)
+        # SKU and supplier thresholds are few, they are checked here rather than in every shard
+        low = [id for id in result.pop("low_stock_ids") if id not in table.overrides]
+        low.extend(id for id, threshold in table.overrides.items()
+                   if id in self._products and self._products[id].quantity < threshold)
+        result["low_stock"] = [self._products[id] for id in low]
+        result["expired"] = [self._products[id] for id in result.pop("expired_ids")]
+        return result
+
+    def product_groups(self):
+        return {type: self._index.by_type(type) for type in self._index.types()}
 
-        #ADD product_groups
-        report += f"=== PRODUCTS BY GROUP ===\n"
-        product_groups = self.product_groups()
+    def type_summary(self):
+        """Running {type: (count, quantity, value)} totals, O(number of types)"""
+        return self._totals.summary()
 
-        for type, prdct in product_groups.items():
-            report += f"{type}:\n"
-            for p in prdct:
-                report += " - " + str(p) + "\n"
-        report += "\n"
+    def generate_inventory_report(self, format:str="text"):
+        """
+        Generate an inventory report
+        :param format: "text", "csv" or "json"
+        """
+        return "".join(InventoryReport(self).stream(format))
 
-        #low stock alert
-        low_stock = self.low_stock_products()
-        if low_stock:
-            report += "=== LOW STOCK ALERT ===\n"
-            for stock in low_stock:
-                report += str(stock) + "\n"
+    def write_inventory_report(self, fp, format:str="text"):
+        """Stream the inventory report into a file-like object"""
+        InventoryReport(self).write(fp, format)
 
-        return report
+    def inventory_summary(self, format:str="text"):
+        """Per-type totals without walking the products"""
+        return InventoryReport(self).summary(format)
 
     def textify(self,list):
         txt = "Here are the products:\n"
@@ -292,22 +654,33 @@ class Inventory:
         return txt
 
     def get_expired_products(self):
-        """    
-        def get_expired_products(self):
-            expired = []
-            for product in self._products.values():
-                if isinstance(product, Perishable) and product.is_expired():
-                    expired.append(product)
-            return expired
+        return self.textify(self._expiry.expired())
+
+    def expiring_products(self, days:int):
+        """Products that are expired or expire within the given number of days"""
+        return self._expiry.expiring_within(days)
+
+    def export_catalogue(self, path:str):
+        """Write the products to a memory-mapped catalogue file for read-only workers, see classes.Catalogue"""
+        from classes.Catalogue import Catalogue
+        return Catalogue.export(self._products.values(), path)
+
+    def attach_audit_sink(self, sink):
+        """Forward every new audit record to an AuditSink (None detaches the current one)"""
+        self._logs.sink = sink
+
+    def transaction_history(self, since=None, limit:int=None):
         """
-        list = []
-        for p in self._products.values():
-            if p.get_product_type() == "Food" and p.is_expired():
-                list.append(p)
-        return self.textify(list)
-
-    def transaction_history(self):
-        txt = ""
-        for i in self._logs:
-            txt += i + "\n"
-        return txt
+        Return the audit records as text
+        :param since: datetime or log sequence number, only newer records are included
+        :param limit: Maximum number of records to include
+        """
+        return AuditTrail.format(self._logs.iter(since, limit))
+
+    def iter_transactions(self, since=None, limit:int=None):
+        """Iterate the audit records without formatting them"""
+        return self._logs.iter(since, limit)
+
+    def transaction_page(self, offset:int=0, limit:int=100):
+        """Return one page of audit records, oldest first"""
+        return self._logs.page(offset, limit)
@@ -1,15 +1,20 @@
 import datetime
+from contextlib import nullcontext
 from classes.Product import Product
+from classes.Ids import LocalIdAllocator
 
 class Order:
-    _order_id_counter = 1
+    ids = LocalIdAllocator() #swap for a FileIdAllocator/SQLiteIdAllocator shared by several processes
     def __init__(self, order_type:str="Purchase"):
-        self._order_id = Order._order_id_counter
+        self._order_id = Order.ids.allocate()
         self._order_type = order_type #purchase or sale
-        self._items = []
+        self._items = {} #product id -> (product, quantity)
+        self._amounts = {} #product id -> what the line adds to the total, at the prices its units were added at
         self._date = datetime.datetime.now()
         self._total_amount = 0
-        Order._order_id_counter += 1
+        self._inventory = None #set when created through Inventory.create_order
+        self._status = "pending" #pending, reserved, executed or cancelled
+        self._reservations = {} #product id -> Reservation held by Order.reserve
     
     @property
     def order_id(self):
@@ -21,13 +26,15 @@ class Order:
     @order_type.setter
     def order_type(self, value:str="Sale"):
         if value and (value == "Sale" or value == "Purchase"):
-            self._order_type = value
+            old, self._order_type = self._order_type, value
+            self._notify("order_type", old)
         else:
             raise ValueError("Choose either \"Sale\" or \"Purchase\"")
     
     @property
     def order_items(self):
-        return self._items
+        """List of the (product, quantity) lines, a copy"""
+        return list(self._items.values())
     
     @property
     def order_date(self):
@@ -37,36 +44,173 @@ class Order:
     def order_amount(self):
         return self._total_amount
 
-    def add_item(self, product:Product, quantity):
+    @property
+    def status(self):
+        return self._status
+
+    def _notify(self, change:str, value=None):
+        """
+        Tell the owning inventory about a change: "item_added" with (product, quantity added),
+        "item_removed" with the product id, "status"/"order_type" with the old value
+        """
+        if self._inventory is not None:
+            self._inventory._order_changed(self, change, value)
+
+    def _set_status(self, status:str):
+        old, self._status = self._status, status
+        self._notify("status", old)
+
+    def _check_open(self):
+        if self._status in ("executed", "cancelled"):
+            raise ValueError(f"Order is already {self._status}")
+
+    def _check_item(self, product:Product, quantity):
         if quantity < 0:
             raise ValueError("Quantity must be above 0")
-        if self._order_type == "Sale" and product.quantity < quantity:
-            raise ValueError(f"There is not enough product. Stock: {product.quantity}")
-
-        for i, (pro, qua) in enumerate(self._items):
-            if product.id == pro.id:
-                self._items[i] = (pro, quantity + qua)
-                self._calculate_total()
-                return
-        
-        self._items.append((product, quantity))
-        self._calculate_total()
+        if self._order_type == "Sale" and product.available_quantity < quantity:
+            raise ValueError(f"There is not enough product. Stock: {product.available_quantity}")
+
+    def _put_item(self, product:Product, quantity):
+        line = self._items.get(product.id)
+        if line is not None:
+            product, quantity = line[0], line[1] + quantity
+        self._items[product.id] = (product, quantity)
+        added = quantity - (line[1] if line is not None else 0)
+        amount = product.price * added
+        self._amounts[product.id] = self._amounts.get(product.id, 0) + amount
+        self._total_amount += amount
+        self._notify("item_added", (product, added))
+
+    def add_item(self, product:Product, quantity):
+        self._check_item(product, quantity)
+        self._check_open()
+        self._put_item(product, quantity)
+
+    def add_items(self, items):
+        """
+        Add many lines at once, all of them or none
+        :param items: Mapping of product to quantity, or iterable of (product, quantity)
+        """
+        items = list(items.items() if hasattr(items, "items") else items)
+        self._check_open()
+        for product, quantity in items:
+            self._check_item(product, quantity)
+        for product, quantity in items:
+            self._put_item(product, quantity)
 
     def remove_item(self, product:Product):
-        self._items = [(p,q) for p, q in self._items if p.id != product.id]
-        self._calculate_total()
+        self.remove_items([product.id])
+
+    def remove_items(self, product_ids):
+        """Drop the lines of the given product ids, unknown ids are ignored"""
+        for product_id in product_ids:
+            line = self._items.pop(product_id, None)
+            if line is not None:
+                # the amount the line added, a price change since then does not matter
+                self._total_amount -= self._amounts.pop(product_id)
+                self._notify("item_removed", product_id)
 
     def _calculate_total(self):
-        self._total_amount = sum(product.price*quantity for product, quantity in self._items)
+        """Full recount of the total at the current prices, the item methods keep it current on their own"""
+        self._amounts = {id: product.price*quantity for id, (product, quantity) in self._items.items()}
+        self._total_amount = sum(self._amounts.values())
 
-    def execute_order(self):
-        for product, quantity in self._items:
-            if self._order_type == "Purchase":
-                product.add_stock(quantity)
-            elif self._order_type == "Sale":
-                if not product.remove_stock(quantity):
+    def _guard(self):
+        if self._inventory is None:
+            return nullcontext()
+        return self._inventory._stock_guard([product for product, _ in self._items.values()])
+
+    #TWO-PHASE EXECUTION
+    def reserve(self, ttl:float=300.0):
+        """
+        Hold the stock of every sale line so a later execute_order can't come up short
+        :param ttl: Seconds the holds last
+        :raises ValueError: if any line can't be reserved, nothing stays held in that case
+        """
+        if self._order_type != "Sale":
+            return
+        with self._guard():
+            self._release_reservations()
+            for product, quantity in self._items.values():
+                reservation = product.reserve(quantity, ttl)
+                if reservation is None:
+                    self._release_reservations()
                     raise ValueError(f"Insufficient stock for: {product.name}")
+                self._reservations[product.id] = reservation
+        self._set_status("reserved")
+
+    def cancel(self):
+        """Drop the order and release any stock it holds"""
+        if self._status == "executed":
+            raise ValueError("Order is already executed")
+        self._release_reservations()
+        self._set_status("cancelled")
+
+    def _release_reservations(self):
+        for reservation in self._reservations.values():
+            reservation.product.release(reservation)
+        self._reservations = {}
+
+    def _check(self):
+        """Phase one: make sure every line can be applied"""
+        if self._status in ("executed", "cancelled"):
+            raise ValueError(f"Order is already {self._status}")
+        if self._order_type != "Sale":
+            return
+        for product, quantity in self._items.values():
+            reservation = self._reservations.get(product.id)
+            if reservation is not None and reservation.active and reservation.quantity == quantity:
+                continue
+            held = reservation.quantity if reservation is not None and reservation.active else 0
+            if product.available_quantity + held < quantity:
+                raise ValueError(f"Insufficient stock for: {product.name}")
+
+    def _apply(self):
+        """Phase two: move the stock of every line, undoing the applied ones if a line fails"""
+        applied = []
+        try:
+            for product, quantity in self._items.values():
+                if self._order_type == "Purchase":
+                    product.add_stock(quantity)
+                elif self._order_type == "Sale":
+                    reservation = self._reservations.pop(product.id, None)
+                    if reservation is not None and reservation.quantity == quantity and product.commit_reservation(reservation):
+                        pass
+                    else:
+                        if reservation is not None:
+                            product.release(reservation)
+                        if not product.remove_stock(quantity):
+                            raise ValueError(f"Insufficient stock for: {product.name}")
+                applied.append((product, quantity))
+        except Exception:
+            for product, quantity in reversed(applied):
+                if self._order_type == "Purchase":
+                    product.quantity = product.quantity - quantity
+                else:
+                    product.add_stock(quantity)
+            raise
+        self._release_reservations()
+        self._set_status("executed")
+        return applied
+
+    def execute_order(self):
+        """Apply all lines or none of them, raises ValueError if a sale line is short"""
+        applied = []
+        try:
+            with self._guard():
+                self._check()
+                applied = self._apply()
+        finally:
+            if self._inventory is not None:
+                self._inventory._order_executed(self, applied)
     
+    def __getstate__(self):
+        # the owning inventory is re-linked on restore, not serialized with the order
+        state = self.__dict__.copy()
+        state["_inventory"] = None
+        state["_reservations"] = {}
+        return state
+
     def __repr__(self):
         return f"Order(Id: {self._order_id}, Type: {self._order_type}, Items: {len(self._items)}, Total: {self._total_amount}, Date: {self._date}"
     
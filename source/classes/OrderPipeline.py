@@ -0,0 +1,251 @@
+"""Asyncio order pipeline: intake, validation, reservation, execution and audit over bounded queues."""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from classes.Product import Product
+from classes.Statistics import RunningStats
+
+class _Job:
+    __slots__ = ("order_type", "lines", "order", "future", "error", "started")
+
+    def __init__(self, order_type:str, lines, future):
+        self.order_type = order_type
+        self.lines = lines
+        self.order = None
+        self.future = future
+        self.error = None
+        self.started = time.perf_counter()
+
+
+class StageStats:
+    """Jobs handled, failures and handling time of one stage (latencies in milliseconds)"""
+    __slots__ = ("name", "processed", "failed", "latency")
+
+    def __init__(self, name:str):
+        self.name = name
+        self.processed = 0
+        self.failed = 0
+        self.latency = RunningStats(0, 100, 200)
+
+    def to_dict(self):
+        return {"processed": self.processed, "failed": self.failed, "mean_ms": self.latency.mean,
+                "p99_ms": self.latency.percentile(99), "max_ms": self.latency.max or 0}
+
+
+class OrderPipeline:
+    """
+    Processes orders through five stages, each with its own worker tasks, connected by bounded queues:
+    intake (create the order), validate (add the lines), reserve (hold sale stock), execute and audit.
+    A full queue makes submit() wait, so a burst is absorbed without unbounded memory. Reservation and
+    execution hold an asyncio lock per product, so orders touching the same product never interleave.
+    An order that fails a stage skips straight to audit, is cancelled and its future gets the error.
+    :param inventory: Inventory the orders are created in
+    :param concurrency: {stage: number of workers}, 1 worker for stages left out
+    :param queue_size: Capacity of each stage's queue
+    :param reservation_ttl: Seconds a reservation lasts between the reserve and execute stages
+    :param offload: Run reservation and execution in worker threads, for inventories that block on
+        I/O (SQLiteInventory) or are shared with other threads (ConcurrentInventory)
+    """
+    stages = ("intake", "validate", "reserve", "execute", "audit")
+
+    def __init__(self, inventory, concurrency:dict=None, queue_size:int=1024,
+                 reservation_ttl:float=30.0, offload:bool=False):
+        self._concurrency = dict.fromkeys(OrderPipeline.stages, 1)
+        for stage, workers in (concurrency or {}).items():
+            if stage not in self._concurrency:
+                raise ValueError(f"Please choose from {OrderPipeline.stages}")
+            if workers < 1:
+                raise ValueError("Every stage needs at least one worker")
+            self._concurrency[stage] = workers
+        self._inventory = inventory
+        self._queue_size = queue_size
+        self._ttl = reservation_ttl
+        self._offload = offload
+        self._queues = {}
+        self._workers = []
+        self._locks = {}  # product id -> [asyncio.Lock, number of jobs using it]
+        self._stats = {stage: StageStats(stage) for stage in OrderPipeline.stages}
+        self._latency = RunningStats(0, 1000, 500)
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._started = None
+
+    #LIFECYCLE
+    async def start(self):
+        if self._workers:
+            return
+        self._queues = {stage: asyncio.Queue(self._queue_size) for stage in OrderPipeline.stages}
+        for i, stage in enumerate(OrderPipeline.stages):
+            handler = getattr(self, f"_{stage}")
+            outbox = self._queues[OrderPipeline.stages[i + 1]] if i + 1 < len(OrderPipeline.stages) else None
+            for n in range(self._concurrency[stage]):
+                self._workers.append(asyncio.create_task(self._worker(stage, handler, self._queues[stage], outbox),
+                                                         name=f"order-pipeline-{stage}-{n}"))
+        self._started = time.perf_counter()
+
+    async def join(self):
+        """Wait until every submitted order went through all stages"""
+        for stage in OrderPipeline.stages:
+            await self._queues[stage].join()
+
+    async def close(self):
+        """Finish the submitted orders, then stop the workers"""
+        if not self._workers:
+            return
+        await self.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    #INPUT
+    async def submit(self, order_type:str, lines):
+        """
+        Queue one order, waits while the intake queue is full
+        :param lines: Iterable of (product or product id, quantity)
+        :return: Future resolved with the executed Order, or with the error that stopped it
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._put(_Job(order_type, lines, future))
+        return future
+
+    async def process(self, order_type:str, lines):
+        """Submit one order and wait for it to come out of the pipeline"""
+        return await (await self.submit(order_type, lines))
+
+    async def feed(self, source):
+        """
+        Queue every (order_type, lines) from an async or plain iterable, returns how many.
+        Results are only counted in stats(), use submit() to get each order's outcome.
+        """
+        count = 0
+        if hasattr(source, "__aiter__"):
+            async for order_type, lines in source:
+                await self._put(_Job(order_type, lines, None))
+                count += 1
+        else:
+            for order_type, lines in source:
+                await self._put(_Job(order_type, lines, None))
+                count += 1
+        return count
+
+    async def _put(self, job:_Job):
+        if not self._workers:
+            raise RuntimeError("Pipeline is not started")
+        self._submitted += 1
+        await self._queues["intake"].put(job)
+
+    #STAGES
+    async def _worker(self, stage:str, handler, inbox:asyncio.Queue, outbox:asyncio.Queue):
+        stats = self._stats[stage]
+        while True:
+            job = await inbox.get()
+            try:
+                if job.error is None or outbox is None:
+                    start = time.perf_counter()
+                    try:
+                        await handler(job)
+                    except Exception as error:
+                        job.error = error
+                        stats.failed += 1
+                    stats.processed += 1
+                    stats.latency.add((time.perf_counter() - start) * 1000)
+                if outbox is not None:
+                    await (self._queues["audit"] if job.error is not None else outbox).put(job)
+            finally:
+                inbox.task_done()
+
+    async def _intake(self, job:_Job):
+        lines = []
+        for product, quantity in job.lines:
+            if not isinstance(product, Product):
+                found = self._inventory.find_product_by_id(product)
+                if not isinstance(found, Product):
+                    raise ValueError(f"There is no product that has id:{product}")
+                product = found
+            lines.append((product, quantity))
+        job.lines = lines
+        job.order = self._inventory.create_order(job.order_type)
+
+    async def _validate(self, job:_Job):
+        if not job.lines:
+            raise ValueError("Order has no items")
+        for product, quantity in job.lines:
+            job.order.add_item(product, quantity)
+
+    async def _reserve(self, job:_Job):
+        if job.order.order_type != "Sale":
+            return
+        async with self._hold(job.lines):
+            await self._call(job.order.reserve, self._ttl)
+
+    async def _execute(self, job:_Job):
+        async with self._hold(job.lines):
+            await self._call(job.order.execute_order)
+
+    async def _audit(self, job:_Job):
+        order = job.order
+        if job.error is not None:
+            self._failed += 1
+            if order is not None and order.status != "executed":
+                order.cancel()
+            self._inventory._logs.record(order if order is not None else "Order", "REJECT", 0, note=str(job.error))
+            if job.future is not None and not job.future.done():
+                job.future.set_exception(job.error)
+        else:
+            self._completed += 1
+            self._inventory._logs.record(order, "EXECUTE", len(order.order_items), note=order.order_type)
+            if job.future is not None and not job.future.done():
+                job.future.set_result(order)
+        self._latency.add((time.perf_counter() - job.started) * 1000)
+
+    #HELPERS
+    async def _call(self, function, *args):
+        if self._offload:
+            return await asyncio.to_thread(function, *args)
+        return function(*args)
+
+    @asynccontextmanager
+    async def _hold(self, lines):
+        """Hold the lock of every product in the lines, always taken in id order"""
+        ids = sorted({product.id for product, _ in lines})
+        entries = []
+        for id in ids:
+            entry = self._locks.get(id)
+            if entry is None:
+                entry = self._locks[id] = [asyncio.Lock(), 0]
+            entry[1] += 1
+            entries.append(entry)
+        acquired = []
+        try:
+            for entry in entries:
+                await entry[0].acquire()
+                acquired.append(entry)
+            yield
+        finally:
+            for entry in reversed(acquired):
+                entry[0].release()
+            for id, entry in zip(ids, entries):
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[id]
+
+    #METRICS
+    def stats(self):
+        """Counters per stage, end-to-end latency percentiles (ms) and orders completed per second"""
+        elapsed = time.perf_counter() - self._started if self._started is not None else 0
+        return {"submitted": self._submitted, "completed": self._completed, "failed": self._failed,
+                "in_flight": self._submitted - self._completed - self._failed,
+                "throughput": (self._completed + self._failed) / elapsed if elapsed else 0,
+                "latency_ms": {"mean": self._latency.mean, "p50": self._latency.percentile(50),
+                               "p99": self._latency.percentile(99), "max": self._latency.max or 0},
+                "stages": {stage: stats.to_dict() for stage, stats in self._stats.items()}}
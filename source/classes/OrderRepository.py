@@ -0,0 +1,148 @@
+"""Order store with maintained indexes and per-day sales totals."""
+import datetime
+from bisect import bisect_left, bisect_right, insort
+
+from classes.ProductIndex import SortedIndex
+
+class OrderRepository:
+    """
+    Orders of an inventory, indexed by date (sorted), type, status and product.
+    Executed sale orders are added once to per-day, per-product unit and revenue totals.
+    Orders created through Inventory report their item and status changes here.
+    """
+    buckets = ("day", "week", "month")
+
+    def __init__(self):
+        self._orders = {}       # order id -> order
+        self._dates = SortedIndex()
+        self._types = {}        # order type -> {order id: order}
+        self._statuses = {}     # status -> {order id: order}
+        self._filed = {}        # order id -> (type, status) it is filed under
+        self._by_product = {}   # product id -> {order id: order}
+        self._sales = {}        # day -> {product id: [units, revenue]}
+        self._days = []         # sorted days that have sales
+        self._counted = set()   # ids of the sale orders already in _sales
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __iter__(self):
+        return iter(list(self._orders.values()))
+
+    def __contains__(self, order_id):
+        return order_id in self._orders
+
+    def get(self, order_id):
+        return self._orders.get(order_id)
+
+    #MAINTENANCE
+    def add(self, order):
+        if order.order_id in self._orders:
+            return
+        self._orders[order.order_id] = order
+        self._dates.insert(order.order_date, order.order_id)
+        self._file(order)
+        for product, _ in order.order_items:
+            self._by_product.setdefault(product.id, {})[order.order_id] = order
+        self._count_sale(order)
+
+    def _file(self, order):
+        key = (order.order_type, order.status)
+        self._types.setdefault(key[0], {})[order.order_id] = order
+        self._statuses.setdefault(key[1], {})[order.order_id] = order
+        self._filed[order.order_id] = key
+
+    @staticmethod
+    def _unfile(buckets:dict, key, order_id):
+        bucket = buckets[key]
+        del bucket[order_id]
+        if not bucket:
+            del buckets[key]
+
+    def changed(self, order):
+        """Re-file an order after its type or status changed"""
+        old = self._filed.get(order.order_id)
+        if old is None or old == (order.order_type, order.status):
+            return
+        OrderRepository._unfile(self._types, old[0], order.order_id)
+        OrderRepository._unfile(self._statuses, old[1], order.order_id)
+        self._file(order)
+        self._count_sale(order)
+
+    def item_added(self, order, product_id):
+        if order.order_id in self._orders:
+            self._by_product.setdefault(product_id, {})[order.order_id] = order
+
+    def item_removed(self, order, product_id):
+        if order.order_id in self._orders:
+            OrderRepository._unfile(self._by_product, product_id, order.order_id)
+
+    def _count_sale(self, order):
+        if order.order_type != "Sale" or order.status != "executed" or order.order_id in self._counted:
+            return
+        self._counted.add(order.order_id)
+        day = order.order_date.date()
+        totals = self._sales.get(day)
+        if totals is None:
+            totals = self._sales[day] = {}
+            insort(self._days, day)
+        for product, quantity in order.order_items:
+            entry = totals.setdefault(product.id, [0, 0])
+            entry[0] += quantity
+            entry[1] += product.price * quantity
+
+    #QUERIES
+    def find(self, order_type:str=None, status=None, start:datetime.datetime=None, end:datetime.datetime=None, product_id=None):
+        """
+        Orders matching every given filter, ordered by date when a date bound is given, else by id
+        :param status: One status or a tuple of statuses
+        """
+        filters = []
+        if order_type is not None:
+            filters.append(self._types.get(order_type, {}))
+        if isinstance(status, str):
+            filters.append(self._statuses.get(status, {}))
+        elif status is not None:
+            filters.append({i: o for s in status for i, o in self._statuses.get(s, {}).items()})
+        if product_id is not None:
+            filters.append(self._by_product.get(product_id, {}))
+        if start is not None or end is not None:
+            ids = self._dates.range(start or datetime.datetime.min, end or datetime.datetime.max)
+            return [self._orders[i] for i in ids if all(i in f for f in filters)]
+        if not filters:
+            return list(self._orders.values())
+        smallest = min(filters, key=len)
+        return sorted((order for i, order in smallest.items() if all(i in f for f in filters)), key=lambda order: order.order_id)
+
+    def for_product(self, product_id):
+        return list(self._by_product.get(product_id, {}).values())
+
+    @staticmethod
+    def _bucket(day:datetime.date, bucket:str):
+        if bucket == "week":
+            return day - datetime.timedelta(days=day.weekday())
+        if bucket == "month":
+            return day.replace(day=1)
+        return day
+
+    def sales(self, start:datetime.date=None, end:datetime.date=None, product_id=None, bucket:str="day"):
+        """
+        Units and revenue of executed sales: {bucket start date: {product id: (units, revenue)}}
+        :param bucket: "day", "week" (starting Monday) or "month"
+        """
+        if bucket not in OrderRepository.buckets:
+            raise ValueError(f"Please choose from {OrderRepository.buckets}")
+        lo = bisect_left(self._days, start) if start is not None else 0
+        hi = bisect_right(self._days, end) if end is not None else len(self._days)
+        result = {}
+        for day in self._days[lo:hi]:
+            totals = self._sales[day]
+            if product_id is not None:
+                totals = {product_id: totals[product_id]} if product_id in totals else {}
+            if not totals:
+                continue
+            merged = result.setdefault(OrderRepository._bucket(day, bucket), {})
+            for id, (units, revenue) in totals.items():
+                old = merged.get(id, (0, 0))
+                merged[id] = (old[0] + units, old[1] + revenue)
+        return result
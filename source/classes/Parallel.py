@@ -0,0 +1,199 @@
+"""Multi-process scans over the columnar product store, whose columns live in shared memory."""
+import datetime
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import compress, repeat
+from multiprocessing import shared_memory
+from operator import and_, lt, mul
+
+def _scan(columns:dict, type_count:int, limits:array, today:int):
+    """
+    Partial aggregates of one shard: per type code count, quantity and value, plus the ids of the
+    rows below their type's limit and of the rows expired before today (a date ordinal)
+    """
+    ids, types, quantities = columns["ids"], bytes(columns["types"]), columns["quantities"]
+    values = array("d", map(mul, columns["prices"], quantities))
+    counts, units, totals = [0] * type_count, [0] * type_count, [0.0] * type_count
+    table = bytearray(256)
+    for code in range(type_count):
+        table[code] = 1
+        mask = types.translate(table)
+        table[code] = 0
+        counts[code] = mask.count(1)
+        units[code] = sum(compress(quantities, mask))
+        totals[code] = sum(compress(values, mask))
+    expiry = columns["expiry"]
+    return {"counts": counts, "units": units, "values": totals,
+            "low": list(compress(ids, map(lt, quantities, map(limits.__getitem__, types)))),
+            "expired": list(compress(ids, map(and_, map(lt, repeat(0), expiry), map(lt, expiry, repeat(today)))))}
+
+def _scan_shard(layout:dict, start:int, stop:int, type_count:int, limits:array, today:int):
+    """Worker side: scan rows [start, stop) in place, through typed views of the shared columns"""
+    columns, blocks = {}, []
+    try:
+        for name, (block_name, typecode) in layout.items():
+            # pool workers share the parent's resource tracker, the parent alone unlinks the block
+            block = shared_memory.SharedMemory(block_name)
+            blocks.append(block)
+            width = array(typecode).itemsize
+            columns[name] = block.buf[start * width:stop * width].cast(typecode)
+        return _scan(columns, type_count, limits, today)
+    finally:
+        # the views must go before the blocks can be closed
+        for view in columns.values():
+            view.release()
+        for block in blocks:
+            block.close()
+
+
+class SharedArray:
+    """
+    Growable array of one array typecode living in a shared memory block, so worker processes
+    can attach and read it in place. Indexed like array.array over rows 0..len-1, the block is
+    replaced by one twice the size when it fills up.
+    """
+    __slots__ = ("typecode", "itemsize", "_block", "_view", "_length")
+
+    def __init__(self, typecode:str, capacity:int=1024):
+        self.typecode = typecode
+        self.itemsize = array(typecode).itemsize
+        self._block = None
+        self._view = None
+        self._length = 0
+        self._allocate(max(capacity, 1))
+
+    def _allocate(self, capacity:int):
+        block = shared_memory.SharedMemory(create=True, size=capacity * self.itemsize)
+        view = block.buf[:capacity * self.itemsize].cast(self.typecode)
+        if self._view is not None:
+            view[:self._length] = self._view[:self._length]
+            self._release()
+        self._block, self._view = block, view
+
+    def _release(self):
+        self._view.release()
+        self._block.close()
+        self._block.unlink()
+
+    @property
+    def name(self):
+        """Name of the shared memory block, valid until the array grows or is closed"""
+        return self._block.name
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, row:int):
+        return self._view[row]
+
+    def __setitem__(self, row:int, value):
+        self._view[row] = value
+
+    def append(self, value):
+        if self._length == len(self._view):
+            self._allocate(2 * self._length)
+        self._view[self._length] = value
+        self._length += 1
+
+    def extend(self, values):
+        values = array(self.typecode, values)
+        end = self._length + len(values)
+        if end > len(self._view):
+            self._allocate(max(end, 2 * self._length))
+        self._view[self._length:end] = values
+        self._length = end
+
+    def pop(self):
+        self._length -= 1
+        return self._view[self._length]
+
+    def view(self):
+        """memoryview over the rows, release it before the array changes size"""
+        return self._view[:self._length]
+
+    def close(self):
+        if self._block is not None:
+            self._release()
+            self._block = self._view = None
+            self._length = 0
+
+
+class ParallelScanner:
+    """
+    Full scans of a ProductColumns store split into shards over a process pool.
+    The pool needs a ProductColumns(shared=True), whose columns already live in shared memory:
+    workers only receive the block names and their row range, read the rows in place, and the
+    partial aggregates are merged here. Stores smaller than min_rows, or workers=1, are scanned in this process.
+    :param columns: ProductColumns to scan (Inventory(parallel=n) keeps a shared one current)
+    :param workers: Worker processes, defaults to the CPU count
+    :param min_rows: Smallest store worth the process pool
+    """
+    def __init__(self, columns, workers:int=None, min_rows:int=200000):
+        self._columns = columns
+        self._workers = workers or os.cpu_count() or 1
+        self._min_rows = min_rows
+        self._pool = None
+
+    @property
+    def workers(self):
+        return self._workers
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self._workers)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def scan(self, thresholds:dict=None, today:datetime.date=None):
+        """
+        One pass over every product:
+        {"count_by_type", "quantity_by_type", "value_by_type": {type: ...}, "total_value",
+         "low_stock_ids": ids below their type's threshold, "expired_ids": ids expired before today}
+        """
+        names = self._columns.type_names
+        limits = array("q", ((thresholds or {}).get(type, 0) for type in names))
+        today = (today or datetime.date.today()).toordinal()
+        rows = len(self._columns)
+        if self._workers <= 1 or rows < self._min_rows:
+            views = self._columns.views()
+            try:
+                parts = [_scan(views, len(names), limits, today)]
+            finally:
+                for view in views.values():
+                    view.release()
+        else:
+            layout = self._columns.layout()
+            step = -(-rows // self._workers)
+            futures = [self._executor().submit(_scan_shard, layout, start, min(start + step, rows),
+                                               len(names), limits, today)
+                       for start in range(0, rows, step)]
+            parts = [future.result() for future in futures]
+        return ParallelScanner._merge(names, parts)
+
+    @staticmethod
+    def _merge(names:list, parts:list):
+        result = {"count_by_type": {}, "quantity_by_type": {}, "value_by_type": {}, "low_stock_ids": [], "expired_ids": []}
+        for code, type in enumerate(names):
+            count = sum(part["counts"][code] for part in parts)
+            if not count:
+                # type codes are never reused, a type whose products were all removed keeps its code
+                continue
+            result["count_by_type"][type] = count
+            result["quantity_by_type"][type] = sum(part["units"][code] for part in parts)
+            result["value_by_type"][type] = sum(part["values"][code] for part in parts)
+        for part in parts:
+            result["low_stock_ids"].extend(part["low"])
+            result["expired_ids"].extend(part["expired"])
+        result["total_value"] = sum(result["value_by_type"].values())
+        return result
@@ -1,18 +1,25 @@
 """Product class module."""
 import datetime
+import time
+
+from classes.Reservation import Reservation
+from classes.Events import ProductChanged
+from classes.Ids import LocalIdAllocator
 
 class Product():
     """Base class for all products in the inventory system"""
 
-    _id_counter:int = 1
+    __slots__ = ("_id", "_name", "_price", "_quantity", "_creation_date", "_reservations", "_events", "__weakref__")
+    ids = LocalIdAllocator() #swap for a FileIdAllocator/SQLiteIdAllocator shared by several processes
 
     def __init__(self, name:str, price:float, quantity=1):
-        self._id = Product._id_counter
+        self._id = Product.ids.allocate()
         self._name = name
         self._price = price
         self._quantity = quantity
         self._creation_date:datetime = datetime.datetime.now()
-        Product._id_counter += 1
+        self._reservations = None #reservation id -> Reservation, created on first reserve
+        self._events = None #EventBus of the inventory holding this product, a BusGroup if several do, see classes.Events
     
     #PROPERTY_GETTERS
     @property
@@ -30,13 +37,25 @@ class Product():
     @property
     def created_at(self):
         return self._creation_date
+    @property
+    def reserved_quantity(self):
+        return sum(r.quantity for r in self._active_reservations())
+    @property
+    def available_quantity(self):
+        """Stock on hand that is not held by a reservation"""
+        if not self._reservations:
+            return self._quantity
+        # a correction can leave less stock than is held
+        return max(self._quantity - self.reserved_quantity, 0)
     
     #PROPERTY_SETTERS
     @name.setter
     def name(self, value:str):
         if not value or len(value.strip()) == 0:
             raise ValueError("Please define a value for name")
-        self._name = value
+        old, self._name = self._name, value
+        if self._events is not None:
+            self._events.changed(ProductChanged, self, "name", old, value)
 
     @price.setter
     def price(self, value):
@@ -44,30 +63,96 @@ class Product():
             raise ValueError("Price cannot be a negative number")
         if type(value) != float:
             value = float(value)
-        self._price = value
+        old, self._price = self._price, value
+        if self._events is not None:
+            self._events.changed(ProductChanged, self, "price", old, value)
 
     @quantity.setter
     def quantity(self, value:int):
         if value < 0:
             raise ValueError("Quantity cannot be a negative number")
-        self._quantity = value
+        self._set_quantity(value)
 
     def add_stock(self, value:int):
         if value < 0:
             raise ValueError("Cannot add a negative number")
-        self._quantity += value
+        self._set_quantity(self._quantity + value)
 
     def remove_stock(self, value:int):
         if value < 0:
             raise ValueError("Cannot remove a negative number")
-        if self._quantity >= value:
-            self._quantity -= value
+        if self.available_quantity >= value:
+            self._set_quantity(self._quantity - value)
             return True
-        return False    
+        return False
+
+    def _set_quantity(self, value:int):
+        old, self._quantity = self._quantity, value
+        if self._events is not None:
+            self._events.changed(ProductChanged, self, "quantity", old, value)
+
+    #RESERVATIONS
+    def _active_reservations(self):
+        """
+        Unexpired reservations, expired ones are dropped on the way. Readers such as available_quantity
+        call this outside the stock locks, so it works on a copy and tolerates entries already gone.
+        """
+        reservations = self._reservations
+        if not reservations:
+            return ()
+        now = time.monotonic()
+        active = []
+        for reservation in list(reservations.values()):
+            if reservation._expires_at <= now:
+                reservations.pop(reservation.id, None)
+            else:
+                active.append(reservation)
+        return active
+
+    def _holds(self, reservation:Reservation):
+        return bool(self._reservations) and reservation.id in self._reservations
+
+    def reserve(self, value:int, ttl:float=300.0):
+        """
+        Hold stock without taking it
+        :param value: Quantity to hold
+        :param ttl: Seconds until the hold lapses on its own
+        :return: Reservation, or None if not enough stock is available
+        """
+        if value < 0:
+            raise ValueError("Cannot reserve a negative number")
+        if self.available_quantity < value:
+            return None
+        reservation = Reservation(self, value, ttl)
+        if self._reservations is None:
+            self._reservations = {}
+        self._reservations[reservation.id] = reservation
+        return reservation
+
+    def release(self, reservation:Reservation):
+        if self._reservations:
+            self._reservations.pop(reservation.id, None)
+
+    def commit_reservation(self, reservation:Reservation):
+        """Take the held stock, returns False if the reservation lapsed or the stock was corrected below it"""
+        if not self._holds(reservation) or reservation.expired or self._quantity < reservation.quantity:
+            self.release(reservation)
+            return False
+        del self._reservations[reservation.id]
+        self._set_quantity(self._quantity - reservation.quantity)
+        return True
 
     def calculate_value_of_stock(self):
         return self._quantity * self._price
     
+    def __getstate__(self):
+        # reservations are tied to this process's clock, they are not serialized
+        state = {slot: getattr(self, slot) for cls in type(self).__mro__ for slot in getattr(cls, "__slots__", ())
+                 if slot != "__weakref__" and hasattr(self, slot)}
+        state["_reservations"] = None
+        state["_events"] = None
+        return (None, state)
+
     def get_product_type(self):
         """Get Product Type By Children"""
         raise NotImplementedError("Make sure children of product class has get_product_type function")
@@ -0,0 +1,100 @@
+"""Columnar copy of the product data used for bulk valuation and reporting."""
+from array import array
+
+from classes.Parallel import SharedArray
+
+class ProductColumns:
+    """
+    Parallel arrays of id, type code, price, quantity, creation timestamp and expiry day
+    (date ordinal, 0 when the product doesn't expire), one row per product.
+    Scans run over the arrays instead of touching the Product objects, see classes.Parallel.
+    :param shared: Keep the columns in shared memory (SharedArray) so worker processes scan them in place,
+        such a store holds shared memory blocks until close()
+    """
+    def __init__(self, shared:bool=False):
+        column = SharedArray if shared else array
+        self._shared = shared
+        self._ids = column("q")
+        self._types = column("B")
+        self._prices = column("d")
+        self._quantities = column("q")
+        self._created = column("d")
+        self._expiry = column("l")
+        self._rows = {}         # product id -> row
+        self._type_codes = {}   # product type -> code
+        self._type_names = []   # code -> product type
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, product_id):
+        return product_id in self._rows
+
+    @property
+    def type_names(self):
+        return list(self._type_names)
+
+    def _type_code(self, type:str):
+        code = self._type_codes.get(type)
+        if code is None:
+            if len(self._type_names) > 255:
+                raise ValueError("Too many product types for the columnar store")
+            code = len(self._type_names)
+            self._type_codes[type] = code
+            self._type_names.append(type)
+        return code
+
+    def add(self, product):
+        if product.id in self._rows:
+            self.update(product)
+            return
+        self._rows[product.id] = len(self._ids)
+        self._ids.append(product.id)
+        self._types.append(self._type_code(product.get_product_type()))
+        self._prices.append(product.price)
+        self._quantities.append(product.quantity)
+        self._created.append(product.created_at.timestamp())
+        expiry = getattr(product, "expiry_date", None)
+        self._expiry.append(expiry.toordinal() if expiry is not None else 0)
+
+    def update(self, product):
+        row = self._rows.get(product.id)
+        if row is not None:
+            self._prices[row] = product.price
+            self._quantities[row] = product.quantity
+            expiry = getattr(product, "expiry_date", None)
+            self._expiry[row] = expiry.toordinal() if expiry is not None else 0
+
+    def remove(self, product):
+        row = self._rows.pop(product.id, None)
+        if row is None:
+            return
+        last = len(self._ids) - 1
+        if row != last:
+            # move the last row into the hole so the columns stay dense
+            for column in self.columns().values():
+                column[row] = column[last]
+            self._rows[self._ids[row]] = row
+        for column in self.columns().values():
+            column.pop()
+
+    def columns(self):
+        """The raw column arrays by name"""
+        return {"ids": self._ids, "types": self._types, "prices": self._prices,
+                "quantities": self._quantities, "created": self._created, "expiry": self._expiry}
+
+    def views(self):
+        """memoryviews over the rows of every column, release them before the store changes again"""
+        return {name: column.view() if self._shared else memoryview(column) for name, column in self.columns().items()}
+
+    def layout(self):
+        """{column: (shared memory name, array typecode)}, all a worker needs to attach"""
+        if not self._shared:
+            raise ValueError("Only a ProductColumns(shared=True) can be scanned by worker processes")
+        return {name: (column.name, column.typecode) for name, column in self.columns().items()}
+
+    def close(self):
+        """Free the shared memory of a shared store"""
+        if self._shared:
+            for column in self.columns().values():
+                column.close()
@@ -0,0 +1,148 @@
+"""Secondary indexes backing the Inventory filters."""
+from bisect import bisect_left, bisect_right, insort
+
+class SortedIndex:
+    """Sorted (key, product id) pairs answering range queries with bisect"""
+    def __init__(self):
+        self._pairs = []
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def insert(self, key, product_id):
+        insort(self._pairs, (key, product_id))
+
+    def insert_many(self, pairs):
+        """Add many (key, id) pairs with one sort instead of one insort each"""
+        self._pairs.extend(pairs)
+        self._pairs.sort()
+
+    def discard(self, key, product_id):
+        i = bisect_left(self._pairs, (key, product_id))
+        if i < len(self._pairs) and self._pairs[i] == (key, product_id):
+            del self._pairs[i]
+
+    def range(self, start, end):
+        """Return ids whose key is between start and end (inclusive), ordered by key"""
+        lo = bisect_left(self._pairs, (start,))
+        hi = bisect_right(self._pairs, (end, float("inf")), lo)
+        return [product_id for _, product_id in self._pairs[lo:hi]]
+
+
+class ProductIndex:
+    """
+    Maintained lookup structures over the products of an inventory:
+    a case-folded name map, per-type buckets and sorted price, quantity
+    and creation date indexes. Callers report every change with add/update/remove.
+    """
+    def __init__(self):
+        self._products = {}
+        self._keys = {}     # product id -> (name key, type, price, quantity, creation date)
+        self._names = {}    # case-folded name -> {product id: product}
+        self._types = {}    # product type -> {product id: product}
+        self._price = SortedIndex()
+        self._quantity = SortedIndex()
+        self._created = SortedIndex()
+
+    def __len__(self):
+        return len(self._products)
+
+    def __contains__(self, product_id):
+        return product_id in self._products
+
+    @staticmethod
+    def _key_of(product):
+        return (product.name.casefold(), product.get_product_type(),
+                product.price, product.quantity, product.created_at)
+
+    def add(self, product):
+        if product.id in self._products:
+            self.update(product)
+            return
+        key = self._key_of(product)
+        self._products[product.id] = product
+        self._keys[product.id] = key
+        self._names.setdefault(key[0], {})[product.id] = product
+        self._types.setdefault(key[1], {})[product.id] = product
+        self._price.insert(key[2], product.id)
+        self._quantity.insert(key[3], product.id)
+        self._created.insert(key[4], product.id)
+
+    def add_many(self, products):
+        """Add a batch of new products, each sorted index is re-sorted once for the whole batch"""
+        prices, quantities, created = [], [], []
+        for product in products:
+            if product.id in self._products:
+                self.update(product)
+                continue
+            key = self._key_of(product)
+            self._products[product.id] = product
+            self._keys[product.id] = key
+            self._names.setdefault(key[0], {})[product.id] = product
+            self._types.setdefault(key[1], {})[product.id] = product
+            prices.append((key[2], product.id))
+            quantities.append((key[3], product.id))
+            created.append((key[4], product.id))
+        self._price.insert_many(prices)
+        self._quantity.insert_many(quantities)
+        self._created.insert_many(created)
+
+    def remove(self, product):
+        key = self._keys.pop(product.id, None)
+        if key is None:
+            return
+        del self._products[product.id]
+        self._discard_bucket(self._names, key[0], product.id)
+        self._discard_bucket(self._types, key[1], product.id)
+        self._price.discard(key[2], product.id)
+        self._quantity.discard(key[3], product.id)
+        self._created.discard(key[4], product.id)
+
+    def update(self, product):
+        """Re-key a product after its name, price or quantity changed"""
+        old = self._keys.get(product.id)
+        if old is None:
+            return
+        new = self._key_of(product)
+        if old == new:
+            return
+        if old[0] != new[0]:
+            self._discard_bucket(self._names, old[0], product.id)
+            self._names.setdefault(new[0], {})[product.id] = product
+        if old[2] != new[2]:
+            self._price.discard(old[2], product.id)
+            self._price.insert(new[2], product.id)
+        if old[3] != new[3]:
+            self._quantity.discard(old[3], product.id)
+            self._quantity.insert(new[3], product.id)
+        self._keys[product.id] = new
+
+    @staticmethod
+    def _discard_bucket(buckets, key, product_id):
+        bucket = buckets.get(key)
+        if bucket is not None:
+            bucket.pop(product_id, None)
+            if not bucket:
+                del buckets[key]
+
+    #LOOKUPS
+    def by_name(self, name:str):
+        bucket = self._names.get(name.casefold())
+        if bucket:
+            return next(iter(bucket.values()))
+        return None
+
+    def types(self):
+        return list(self._types)
+
+    def by_type(self, type:str):
+        return list(self._types.get(type, {}).values())
+
+    def by_price(self, start, end):
+        return [self._products[i] for i in self._price.range(start, end)]
+
+    def by_quantity(self, start, end):
+        return [self._products[i] for i in self._quantity.range(start, end)]
+
+    def by_date(self, start, end):
+        return [self._products[i] for i in self._created.range(start, end)]
@@ -0,0 +1,100 @@
+"""Replenishment planning: reorder low-stock products with one purchase order per supplier."""
+import math
+
+class ReplenishmentPlan:
+    """Reorder lines grouped per chosen supplier, plus the low-stock products no supplier carries"""
+    def __init__(self):
+        self.lines = {}      # supplier -> [(product, quantity)]
+        self.unsourced = []  # [(product, quantity)]
+        self.orders = []     # purchase orders placed from this plan, empty for a dry run
+
+    @property
+    def quantity(self):
+        return sum(q for lines in self.lines.values() for _, q in lines)
+
+    def __len__(self):
+        return sum(len(lines) for lines in self.lines.values())
+
+    def __repr__(self):
+        return (f"ReplenishmentPlan(Suppliers: {len(self.lines)}, Lines: {len(self)}, Units: {self.quantity}, "
+                f"Unsourced: {len(self.unsourced)}, Orders placed: {len(self.orders)})")
+
+
+class ReplenishmentPlanner:
+    """
+    Finds every low-stock product, picks its best supplier and orders up to the target stock:
+    reorder quantity = target - on hand - already on open purchase orders.
+    :param inventory: Inventory to replenish
+    :param target_factor: Default target stock as a multiple of the product's low-stock threshold
+    :param target_for: Optional function(product) -> target stock, overrides target_factor
+    :param delivery_weight: Weight of delivery time in Inventory.supplier_score
+    :param quality_weight: Weight of quality rating in Inventory.supplier_score
+    :param recent: Score suppliers on their recent (EWMA) performance
+    """
+    def __init__(self, inventory, target_factor:float=2.0, target_for=None,
+                 delivery_weight:float=0.5, quality_weight:float=0.5, recent:bool=False):
+        if target_factor < 1:
+            raise ValueError("target_factor must be at least 1")
+        self._inventory = inventory
+        self._target_factor = target_factor
+        self._target_for = target_for
+        self._weights = (delivery_weight, quality_weight, recent)
+
+    def target(self, product):
+        if self._target_for is not None:
+            return self._target_for(product)
+        return math.ceil(self._inventory.threshold_for(product) * self._target_factor)
+
+    def open_purchases(self):
+        """{product id: quantity} still to arrive on pending or reserved purchase orders"""
+        incoming = {}
+        for order in self._inventory.find_orders(order_type="Purchase", status=("pending", "reserved")):
+            for product, quantity in order.order_items:
+                incoming[product.id] = incoming.get(product.id, 0) + quantity
+        return incoming
+
+    def plan(self):
+        """Work out the reorder lines without placing anything"""
+        plan = ReplenishmentPlan()
+        incoming = self.open_purchases()
+        product_suppliers = self._inventory._product_suppliers
+        target = self.target
+        if self._target_for is None:
+            table, factor = self._inventory._thresholds(), self._target_factor
+            target = lambda product: math.ceil(table.get(product) * factor)
+        scores = {}     # supplier -> score, each supplier is scored once per plan
+        best = {}       # frozen supplier set of a product -> chosen supplier
+        for product in self._inventory.low_stock_products():
+            id = product.id
+            quantity = target(product) - product.quantity - incoming.get(id, 0)
+            if quantity <= 0:
+                continue
+            suppliers = product_suppliers.get(id)
+            if not suppliers:
+                plan.unsourced.append((product, quantity))
+                continue
+            supplier = next(iter(suppliers)) if len(suppliers) == 1 else self._choose(suppliers, scores, best)
+            lines = plan.lines.get(supplier)
+            if lines is None:
+                lines = plan.lines[supplier] = []
+            lines.append((product, quantity))
+        return plan
+
+    def _choose(self, suppliers, scores, best):
+        key = frozenset(suppliers)
+        supplier = best.get(key)
+        if supplier is None:
+            for candidate in suppliers:
+                if candidate not in scores:
+                    scores[candidate] = self._inventory.supplier_score(candidate, *self._weights)
+            # max keeps the first of equally scored suppliers
+            supplier = best[key] = max(suppliers, key=scores.__getitem__)
+        return supplier
+
+    def run(self, dry_run:bool=False):
+        """Plan and, unless dry_run, place one purchase order per supplier. Returns the plan"""
+        plan = self.plan()
+        if not dry_run:
+            for supplier, lines in plan.lines.items():
+                plan.orders.append(self._inventory._place_supplier_order(supplier, lines))
+        return plan
@@ -0,0 +1,206 @@
+"""Inventory report engine: running per-type totals and single-pass streamed reports."""
+import csv
+import io
+import json
+import math
+
+class ExactSum:
+    """
+    Running sum that adds and takes back values without drifting: float values are kept as
+    non-overlapping partials (Shewchuk), so the sum always equals math.fsum of the values counted,
+    int values are summed apart and stay ints while no float is counted.
+    """
+    __slots__ = ("_ints", "_partials")
+
+    def __init__(self):
+        self._ints = 0
+        self._partials = []
+
+    def add(self, x):
+        if isinstance(x, int):
+            self._ints += x
+            return
+        partials = self._partials
+        i = 0
+        for y in partials:
+            if abs(x) < abs(y):
+                x, y = y, x
+            hi = x + y
+            lo = y - (hi - x)
+            if lo:
+                partials[i] = lo
+                i += 1
+            x = hi
+        partials[i:] = [x] if x else []
+
+    def extend(self, other:"ExactSum"):
+        self._ints += other._ints
+        for x in other._partials:
+            self.add(x)
+
+    @property
+    def value(self):
+        return math.fsum(self._partials + [self._ints]) if self._partials else self._ints
+
+
+class TypeTotals:
+    """Per-type product count, quantity and stock value, kept current as products are tracked"""
+    def __init__(self):
+        self._last = {}     # product id -> (type, quantity, value) last counted
+        self._totals = {}   # product type -> [count, quantity, ExactSum of the values]
+
+    def add(self, product):
+        if product.id in self._last:
+            self.update(product)
+            return
+        type = product.get_product_type()
+        entry = (type, product.quantity, product.calculate_value_of_stock())
+        self._last[product.id] = entry
+        totals = self._totals.get(type)
+        if totals is None:
+            totals = self._totals[type] = [0, 0, ExactSum()]
+        totals[0] += 1
+        totals[1] += entry[1]
+        totals[2].add(entry[2])
+
+    def remove(self, product):
+        entry = self._last.pop(product.id, None)
+        if entry is None:
+            return
+        totals = self._totals[entry[0]]
+        totals[0] -= 1
+        totals[1] -= entry[1]
+        totals[2].add(-entry[2])
+        if totals[0] == 0:
+            del self._totals[entry[0]]
+
+    def update(self, product):
+        old = self._last.get(product.id)
+        if old is None:
+            return
+        quantity, value = product.quantity, product.calculate_value_of_stock()
+        if (quantity, value) == old[1:]:
+            return
+        self._last[product.id] = (old[0], quantity, value)
+        totals = self._totals[old[0]]
+        totals[1] += quantity - old[1]
+        # old value out, new value in, a difference of the two would already be rounded
+        totals[2].add(-old[2])
+        totals[2].add(value)
+
+    def summary(self):
+        """{type: (count, quantity, value)}, costs O(number of types)"""
+        return {type: (count, quantity, value.value) for type, (count, quantity, value) in self._totals.items()}
+
+    def total_value(self):
+        """Stock value over every type, summed as exactly as the per-type values"""
+        total = ExactSum()
+        for _, _, value in self._totals.values():
+            total.extend(value)
+        return total.value
+
+
+class InventoryReport:
+    """
+    Streams an inventory report in text, csv or json. Header totals come from the inventory's
+    running per-type summary, the products are walked once per report, group by group,
+    and low-stock products are collected during that same walk.
+    """
+    formats = ("text", "csv", "json")
+
+    def __init__(self, inventory):
+        self._inventory = inventory
+
+    def _groups(self):
+        """Yield (type, products) for every product type"""
+        return self._inventory.product_groups().items()
+
+    def _is_low(self, product):
+        return product.quantity < self._inventory.threshold_for(product)
+
+    def _totals(self):
+        summary = self._inventory.type_summary()
+        return sum(c for c, _, _ in summary.values()), sum(v for _, _, v in summary.values())
+
+    @staticmethod
+    def _record(type, product, low:bool):
+        return {"id": product.id, "type": type, "name": product.name, "price": product.price,
+                "quantity": product.quantity, "value": product.calculate_value_of_stock(),
+                "created_at": product.created_at.isoformat(), "low_stock": low}
+
+    def stream(self, format:str="text"):
+        """Yield the report in chunks of text"""
+        if format == "text":
+            return self._stream_text()
+        if format == "csv":
+            return self._stream_csv()
+        if format == "json":
+            return self._stream_json()
+        raise ValueError(f"Please choose from {InventoryReport.formats}")
+
+    def write(self, fp, format:str="text"):
+        """Write the report to a file-like object without holding all of it in memory"""
+        for chunk in self.stream(format):
+            fp.write(chunk)
+
+    def summary(self, format:str="text"):
+        """Totals per product type only, no product walk"""
+        summary = self._inventory.type_summary()
+        count, value = self._totals()
+        if format == "json":
+            return json.dumps({"total_products": count, "total_value": value,
+                               "types": {t: {"count": c, "quantity": q, "value": v} for t, (c, q, v) in summary.items()}})
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(["type", "count", "quantity", "value"])
+            writer.writerows([t, c, q, v] for t, (c, q, v) in summary.items())
+            return buffer.getvalue()
+        text = f"=== INVENTORY SUMMARY ===\nTotal Products: {count}\nTotal Value Of Inventory {value}\n"
+        for type, (c, q, v) in summary.items():
+            text += f"{type}: {c} products, {q} units, value {v}\n"
+        return text
+
+    def _stream_text(self):
+        count, value = self._totals()
+        yield f"=== INVENTORY REPORT ===\nTotal Products: {count}\nTotal Value Of Inventory {value}\n\n"
+        yield "=== PRODUCTS BY GROUP ===\n"
+        low_stock = []
+        for type, products in self._groups():
+            yield f"{type}:\n"
+            for product in products:
+                if self._is_low(product):
+                    low_stock.append(product)
+                yield f" - {product}\n"
+        yield "\n"
+        if low_stock:
+            yield "=== LOW STOCK ALERT ===\n"
+            for product in low_stock:
+                yield f"{product}\n"
+
+    def _stream_csv(self):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["id", "type", "name", "price", "quantity", "value", "created_at", "low_stock"])
+        for type, products in self._groups():
+            for product in products:
+                writer.writerow(InventoryReport._record(type, product, self._is_low(product)).values())
+                if buffer.tell() > 65536:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+        yield buffer.getvalue()
+
+    def _stream_json(self):
+        count, value = self._totals()
+        yield f'{{"total_products": {json.dumps(count)}, "total_value": {json.dumps(value)}, "groups": {{'
+        low_stock = []
+        for i, (type, products) in enumerate(self._groups()):
+            yield f'{", " if i else ""}{json.dumps(type)}: ['
+            for j, product in enumerate(products):
+                low = self._is_low(product)
+                if low:
+                    low_stock.append(product.id)
+                yield (", " if j else "") + json.dumps(InventoryReport._record(type, product, low))
+            yield "]"
+        yield f'}}, "low_stock": {json.dumps(low_stock)}}}'
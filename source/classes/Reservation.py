@@ -0,0 +1,38 @@
+"""Time-limited holds on product stock."""
+import time
+
+class Reservation:
+    """Quantity of a product held for an order or cart until it is committed, released or expires"""
+    __slots__ = ("_id", "_product", "_quantity", "_expires_at")
+    _id_counter = 1
+
+    def __init__(self, product, quantity:int, ttl:float):
+        self._id = Reservation._id_counter
+        self._product = product
+        self._quantity = quantity
+        self._expires_at = time.monotonic() + ttl
+        Reservation._id_counter += 1
+
+    @property
+    def id(self):
+        return self._id
+    @property
+    def product(self):
+        return self._product
+    @property
+    def quantity(self):
+        return self._quantity
+    @property
+    def expired(self):
+        return time.monotonic() >= self._expires_at
+    @property
+    def active(self):
+        """Still held by the product, not expired, committed or released"""
+        return not self.expired and self._product._holds(self)
+
+    def extend(self, ttl:float):
+        """Push the expiry to ttl seconds from now"""
+        self._expires_at = time.monotonic() + ttl
+
+    def __repr__(self):
+        return f"Reservation(Id: {self._id}, Product id: {self._product.id}, Quantity: {self._quantity})"
@@ -0,0 +1,426 @@
+"""Inventory whose products, suppliers, orders and audit entries live in a local SQLite file."""
+import datetime
+import queue
+import sqlite3
+import threading
+import weakref
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+
+from classes.AuditSink import AuditSink, SQLiteBackend
+from classes.Events import ProductAdded
+from classes.Inventory import Inventory
+from classes.Order import Order
+from classes.Product import Product
+from classes.Supplier import Supplier
+from products.Clothing import Clothing
+from products.Electronics import Electronics
+from products.Food import Food
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY, type TEXT NOT NULL, name TEXT NOT NULL, name_key TEXT NOT NULL,
+    price REAL NOT NULL, quantity INTEGER NOT NULL, created TEXT NOT NULL,
+    warranty_months INTEGER, size TEXT, material TEXT, expiry_date TEXT, info TEXT);
+CREATE INDEX IF NOT EXISTS products_name ON products (name_key);
+CREATE INDEX IF NOT EXISTS products_type_quantity ON products (type, quantity);
+CREATE INDEX IF NOT EXISTS products_price ON products (price);
+CREATE INDEX IF NOT EXISTS products_quantity ON products (quantity);
+CREATE INDEX IF NOT EXISTS products_created ON products (created);
+CREATE INDEX IF NOT EXISTS products_type_expiry ON products (type, expiry_date);
+CREATE TABLE IF NOT EXISTS suppliers (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, contact TEXT);
+CREATE TABLE IF NOT EXISTS supplier_products (supplier_id INTEGER NOT NULL, product_id INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS orders (order_id INTEGER PRIMARY KEY, type TEXT NOT NULL, date TEXT NOT NULL, total REAL, status TEXT);
+CREATE TABLE IF NOT EXISTS order_items (order_id INTEGER NOT NULL, product_id INTEGER NOT NULL, quantity INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS order_items_order ON order_items (order_id);
+"""
+
+# Statements are kept as constants: sqlite3 caches the compiled statement per connection
+# by its SQL text, so every call after the first reuses the prepared statement.
+_COLUMNS = "id, type, name, price, quantity, created, warranty_months, size, material, expiry_date, info"
+_SELECT_ONE = f"SELECT {_COLUMNS} FROM products WHERE id = ?"
+_SELECT_ALL = f"SELECT {_COLUMNS} FROM products ORDER BY id"
+_SELECT_IDS = "SELECT id FROM products ORDER BY id"
+_SELECT_BY_NAME = f"SELECT {_COLUMNS} FROM products WHERE name_key = ? ORDER BY id LIMIT 1"
+_SELECT_BY_TYPE = f"SELECT {_COLUMNS} FROM products WHERE type = ? ORDER BY id"
+_SELECT_BY_PRICE = f"SELECT {_COLUMNS} FROM products WHERE price BETWEEN ? AND ? ORDER BY price, id"
+_SELECT_BY_QUANTITY = f"SELECT {_COLUMNS} FROM products WHERE quantity BETWEEN ? AND ? ORDER BY quantity, id"
+_SELECT_BY_DATE = f"SELECT {_COLUMNS} FROM products WHERE created BETWEEN ? AND ? ORDER BY created, id"
+_SELECT_LOW_STOCK = f"SELECT {_COLUMNS} FROM products WHERE type = ? AND quantity < ? ORDER BY id"
+_SELECT_EXPIRED = f"SELECT {_COLUMNS} FROM products WHERE type = 'Food' AND expiry_date < ? ORDER BY id"
+_SELECT_QUANTITY = "SELECT quantity FROM products WHERE id = ?"
+_SELECT_TYPES = "SELECT DISTINCT type FROM products"
+_EXISTS = "SELECT 1 FROM products WHERE id = ?"
+_COUNT = "SELECT COUNT(*) FROM products"
+_TOTAL_VALUE = "SELECT COALESCE(SUM(price * quantity), 0) FROM products"
+_VALUE_BY_TYPE = "SELECT type, SUM(price * quantity) FROM products GROUP BY type"
+_TYPE_SUMMARY = "SELECT type, COUNT(*), SUM(quantity), SUM(price * quantity) FROM products GROUP BY type"
+_UPSERT = f"INSERT OR REPLACE INTO products ({_COLUMNS}, name_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+_INSERT_OR_ADD = _UPSERT.replace("INSERT OR REPLACE", "INSERT") + " ON CONFLICT(id) DO UPDATE SET quantity = quantity + excluded.quantity"
+_DELETE = "DELETE FROM products WHERE id = ?"
+
+def _timestamp(value:datetime.datetime):
+    """Fixed-width text so creation dates sort and compare correctly inside SQLite"""
+    return value.isoformat(sep=" ", timespec="microseconds")
+
+def _product_row(product:Product):
+    expiry = getattr(product, "_expiry_date", None)
+    return (product.id, product.get_product_type(), product.name, product.price, product.quantity,
+            _timestamp(product.created_at), getattr(product, "_warranty_months", None),
+            getattr(product, "_size", None), getattr(product, "_material", None),
+            str(expiry) if expiry is not None else None, getattr(product, "_info", ""),
+            product.name.casefold())
+
+def _product_from_row(row):
+    """Rebuild a product from its row without running __init__, so the stored id is kept"""
+    id, type, name, price, quantity, created, warranty, size, material, expiry, info = row
+    cls = SQLiteInventory.product_types[type]
+    product = cls.__new__(cls)
+    product._id = id
+    product._name = name
+    product._price = price
+    product._quantity = quantity
+    product._creation_date = datetime.datetime.fromisoformat(created)
+    product._info = info or ""
+    product._reservations = None
+    product._events = None
+    if cls is Electronics:
+        product._warranty_months = warranty
+    elif cls is Clothing:
+        product._size = size
+        product._material = material
+    elif cls is Food:
+        product._expiry_date = Food._shared_date(datetime.date.fromisoformat(expiry))
+    return product
+
+
+class ConnectionPool:
+    """Fixed set of read-only SQLite connections shared between threads"""
+    def __init__(self, path:str, size:int=4):
+        self._idle = queue.Queue()
+        self._connections = []
+        for _ in range(size):
+            connection = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+            connection.execute("PRAGMA query_only = ON")
+            self._connections.append(connection)
+            self._idle.put(connection)
+
+    @contextmanager
+    def connection(self):
+        connection = self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self):
+        for connection in self._connections:
+            connection.close()
+
+
+class SQLiteProductMap(MutableMapping):
+    """dict-like view of the products table, handed to the Inventory base class as _products"""
+    def __init__(self, inventory):
+        self._inventory = inventory
+
+    def __getitem__(self, product_id):
+        product = self._inventory._load(product_id)
+        if product is None:
+            raise KeyError(product_id)
+        return product
+
+    def __contains__(self, product_id):
+        return self._inventory._exists(product_id)
+
+    def __setitem__(self, product_id, product):
+        self._inventory._save(product)
+
+    def __delitem__(self, product_id):
+        if not self._inventory._delete(product_id):
+            raise KeyError(product_id)
+
+    def __iter__(self):
+        return (row[0] for row in self._inventory._fetch(_SELECT_IDS))
+
+    def __len__(self):
+        return self._inventory._fetch(_COUNT)[0][0]
+
+    def values(self):
+        return iter(self._inventory._query(_SELECT_ALL))
+
+    def items(self):
+        return ((product.id, product) for product in self._inventory._query(_SELECT_ALL))
+
+    def copy(self):
+        return dict(self.items())
+
+
+class SQLiteInventory(Inventory):
+    """
+    Inventory backed by a SQLite file with the same public API as Inventory.
+    Products are loaded on demand and kept in a weak identity map, so the dataset can outgrow RAM.
+    Reads go through a pool of connections, writes through one serialized writer connection.
+    :param path: Database file (created if missing)
+    :param pool_size: Number of pooled reader connections
+    """
+    product_types = {"Electronics": Electronics, "Clothing": Clothing, "Food": Food}
+
+    def __init__(self, path:str, pool_size:int=4, log_capacity:int=10000):
+        super().__init__(log_capacity)
+        self._path = path
+        self._writer = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+        self._writer.execute("PRAGMA journal_mode = WAL")
+        self._writer.execute("PRAGMA synchronous = NORMAL")
+        self._writer.executescript(_SCHEMA)
+        self._write_lock = threading.Lock()
+        self._pool = ConnectionPool(path, pool_size)
+        self._identity = weakref.WeakValueDictionary()
+        self._identity_lock = threading.Lock()
+        self._products = SQLiteProductMap(self)
+        self._supplier_ids = {}  # id(supplier) -> row id
+        self._load_suppliers()
+        self._load_orders()
+        self._bump_counters()
+        self.attach_audit_sink(AuditSink(SQLiteBackend(path)))
+
+    def close(self):
+        super().close()
+        self._logs.sink.close()
+        self.attach_audit_sink(None)
+        self._pool.close()
+        self._writer.close()
+
+    #ROW ACCESS
+    def _fetch(self, sql:str, params:tuple=()):
+        with self._pool.connection() as connection:
+            return connection.execute(sql, params).fetchall()
+
+    def _query(self, sql:str, params:tuple=()):
+        return [self._materialize(row) for row in self._fetch(sql, params)]
+
+    def _materialize(self, row):
+        with self._identity_lock:
+            product = self._identity.get(row[0])
+            if product is None:
+                product = _product_from_row(row)
+                self._events.link(product)
+                self._identity[row[0]] = product
+            return product
+
+    def _load(self, product_id):
+        with self._identity_lock:
+            product = self._identity.get(product_id)
+        if product is not None:
+            return product
+        rows = self._fetch(_SELECT_ONE, (product_id,))
+        return self._materialize(rows[0]) if rows else None
+
+    def _exists(self, product_id):
+        with self._identity_lock:
+            if product_id in self._identity:
+                return True
+        return bool(self._fetch(_EXISTS, (product_id,)))
+
+    def _write(self, sql:str, params:tuple=()):
+        with self._write_lock, self._writer:
+            return self._writer.execute(sql, params)
+
+    def _save(self, product:Product):
+        self._write(_UPSERT, _product_row(product))
+        self._events.link(product)
+        with self._identity_lock:
+            self._identity[product.id] = product
+
+    def _delete(self, product_id):
+        with self._identity_lock:
+            self._identity.pop(product_id, None)
+        return self._write(_DELETE, (product_id,)).rowcount > 0
+
+    def _add_batch(self, batch:list):
+        """One executemany per batch, products already stored add their quantity"""
+        Inventory._validate_batch(batch)
+        rows = [_product_row(product) for product in batch]
+        ids = list({product.id for product in batch})
+        stored = set()
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            stored.update(row[0] for row in self._fetch(
+                f"SELECT id FROM products WHERE id IN ({', '.join('?' * len(chunk))})", tuple(chunk)))
+        with self._identity_lock:
+            for product in batch:
+                if product.id in stored:
+                    live = self._identity.get(product.id)
+                    if live is not None:
+                        live._quantity += product.quantity
+                else:
+                    self._events.link(product)
+                    self._identity[product.id] = product
+                    stored.add(product.id)
+        with self._write_lock, self._writer:
+            self._writer.executemany(_INSERT_OR_ADD, rows)
+        self._log_batch(batch)
+
+    #DERIVED VIEWS
+    def _track(self, product:Product):
+        """Row already written and product linked by the product map, only announce it"""
+        if self._events.wants(ProductAdded):
+            self._events.publish(ProductAdded(product))
+
+    def _untrack(self, product:Product):
+        self._unlink(product)
+
+    def _retrack(self, product:Product):
+        """Save the row, low-stock subscribers are checked against the stored quantity"""
+        rows = self._fetch(_SELECT_QUANTITY, (product.id,)) if self._low_stock.subscribed else None
+        self._save(product)
+        if rows:
+            self._low_stock.notify(product, rows[0][0])
+
+    #SUPPLIERS AND ORDERS
+    def _load_suppliers(self):
+        for supplier_id, name, contact in self._writer.execute("SELECT id, name, contact FROM suppliers ORDER BY id"):
+            supplier = Supplier(name, contact)
+            product_ids = [r[0] for r in self._writer.execute(
+                "SELECT product_id FROM supplier_products WHERE supplier_id = ?", (supplier_id,))]
+            supplier.add_product(*filter(None, map(self._load, product_ids)))
+            self._supplier_ids[id(supplier)] = supplier_id
+            self._index_supplier(supplier)
+
+    def _load_orders(self):
+        for order_id, order_type, date, status in self._writer.execute("SELECT order_id, type, date, status FROM orders ORDER BY order_id"):
+            order = Order(order_type)
+            order._order_id = order_id
+            order._status = status
+            order._date = datetime.datetime.fromisoformat(date)
+            for product_id, quantity in self._writer.execute(
+                    "SELECT product_id, quantity FROM order_items WHERE order_id = ?", (order_id,)):
+                product = self._load(product_id)
+                if product is not None:
+                    order._items[product.id] = (product, quantity)
+            order._calculate_total()
+            self._register_order(order)
+
+    def _bump_counters(self):
+        """Keep newly created products and orders from reusing stored ids, the audit sink does the same for its records"""
+        max_product = self._writer.execute("SELECT MAX(id) FROM products").fetchone()[0]
+        if max_product is not None:
+            Product.ids.advance(max_product)
+        max_order = self._writer.execute("SELECT MAX(order_id) FROM orders").fetchone()[0]
+        if max_order is not None:
+            Order.ids.advance(max_order)
+
+    def add_supplier(self, supplier:Supplier):
+        super().add_supplier(supplier)
+        self.save_supplier(supplier)
+
+    def save_supplier(self, supplier:Supplier):
+        """Persist a supplier and its current product associations"""
+        with self._write_lock, self._writer:
+            supplier_id = self._supplier_ids.get(id(supplier))
+            if supplier_id is None:
+                supplier_id = self._writer.execute("INSERT INTO suppliers (name, contact) VALUES (?, ?)",
+                                                   (supplier.name, supplier.contact_info)).lastrowid
+                self._supplier_ids[id(supplier)] = supplier_id
+            else:
+                self._writer.execute("UPDATE suppliers SET name = ?, contact = ? WHERE id = ?",
+                                     (supplier.name, supplier.contact_info, supplier_id))
+                self._writer.execute("DELETE FROM supplier_products WHERE supplier_id = ?", (supplier_id,))
+            self._writer.executemany("INSERT INTO supplier_products VALUES (?, ?)",
+                                     [(supplier_id, p.id) for p in supplier.get_supplied_products()])
+
+    def _supplier_changed(self, supplier:Supplier, change:str, value):
+        """Product links, name and contact are written as they change, like order lines"""
+        super()._supplier_changed(supplier, change, value)
+        supplier_id = self._supplier_ids.get(id(supplier))
+        if supplier_id is None:
+            return
+        if change == "add":
+            self._write("INSERT INTO supplier_products VALUES (?, ?)", (supplier_id, value.id))
+        elif change == "remove":
+            self._write("DELETE FROM supplier_products WHERE supplier_id = ? AND product_id = ?", (supplier_id, value.id))
+        elif change in ("rename", "contact"):
+            self._write("UPDATE suppliers SET name = ?, contact = ? WHERE id = ?",
+                        (supplier.name, supplier.contact_info, supplier_id))
+
+    def create_order(self, order_type = "Purchase"):
+        order = super().create_order(order_type)
+        self._write("INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?)",
+                    (order.order_id, order.order_type, _timestamp(order.order_date), order.order_amount, order.status))
+        return order
+
+    def _order_changed(self, order:Order, change:str, value=None):
+        """Lines are written as they are added or removed, so pending orders keep them across restarts"""
+        super()._order_changed(order, change, value)
+        if change not in ("item_added", "item_removed"):
+            return
+        product_id = value[0].id if change == "item_added" else value
+        line = order._items.get(product_id)
+        with self._write_lock, self._writer:
+            self._writer.execute("DELETE FROM order_items WHERE order_id = ? AND product_id = ?", (order.order_id, product_id))
+            if line is not None:
+                self._writer.execute("INSERT INTO order_items VALUES (?, ?, ?)", (order.order_id, product_id, line[1]))
+            self._writer.execute("UPDATE orders SET total = ? WHERE order_id = ?", (order.order_amount, order.order_id))
+
+    def _order_executed(self, order:Order, applied:list):
+        super()._order_executed(order, applied)
+        self._write("UPDATE orders SET total = ?, status = ? WHERE order_id = ?",
+                    (order.order_amount, order.status, order.order_id))
+
+    #FILTERS
+    def find_product_by_name(self, name:str):
+        if name or len(name) > 0:
+            found = self._query(_SELECT_BY_NAME, (name.casefold(),))
+            return found[0] if found else None
+
+    def find_product_by_type(self, type:str):
+        return self._query(_SELECT_BY_TYPE, (type,))
+
+    def find_product_by_price(self, start:int, end:int):
+        return self._query(_SELECT_BY_PRICE, (start, end))
+
+    def find_product_by_quantity(self, start:int, end:int):
+        return self._query(_SELECT_BY_QUANTITY, (start, end))
+
+    def find_product_by_date(self, start:datetime, end:datetime):
+        return self._query(_SELECT_BY_DATE, (_timestamp(start), _timestamp(end)))
+
+    #REPORTS
+    def product_count(self):
+        return len(self._products)
+
+    def total_value(self):
+        return self._fetch(_TOTAL_VALUE)[0][0]
+
+    def value_by_type(self):
+        return dict(self._fetch(_VALUE_BY_TYPE))
+
+    def type_summary(self):
+        return {type: (count, quantity, value) for type, count, quantity, value in self._fetch(_TYPE_SUMMARY)}
+
+    def refresh_thresholds(self):
+        """Low stock is queried on demand, only the table needs rebuilding"""
+        self._compile_thresholds()
+
+    def low_stock_products(self):
+        """Indexed query per type, then the products with their own SKU or supplier threshold"""
+        type(self).thresholds.poll()
+        table = self._thresholds()
+        low_stock = {}
+        for product_type, threshold in table.types.items():
+            for product in self._query(_SELECT_LOW_STOCK, (product_type, threshold)):
+                if product.id not in table.overrides:
+                    low_stock[product.id] = product
+        for id, threshold in table.overrides.items():
+            product = self._load(id)
+            if product is not None and product.quantity < threshold:
+                low_stock[id] = product
+        return list(low_stock.values())
+
+    def product_groups(self):
+        return {type: self.find_product_by_type(type) for type, in self._fetch(_SELECT_TYPES)}
+
+    def get_expired_products(self):
+        return self.textify(self._query(_SELECT_EXPIRED, (str(datetime.date.today()),)))
+
+    def expiring_products(self, days:int):
+        return self._query(_SELECT_EXPIRED, (str(datetime.date.today() + datetime.timedelta(days=days + 1)),))
@@ -0,0 +1,438 @@
+"""Inventory split over warehouse shards, in this process or in worker processes, with scatter/gather queries."""
+import copy
+import multiprocessing
+import threading
+
+from classes.Inventory import Inventory
+from classes.Product import Product
+from classes.Report import InventoryReport
+
+def _apply(inventory, function, args:tuple):
+    """function is an Inventory method name or a module-level function(inventory, *args)"""
+    if isinstance(function, str):
+        return getattr(inventory, function)(*args)
+    return function(inventory, *args)
+
+def _serve(connection, inventory_class, kwargs:dict):
+    """Worker process loop: one inventory, calls and replies over the pipe until None or EOF"""
+    inventory = inventory_class(**kwargs)
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        try:
+            reply = (True, _apply(inventory, *message))
+            connection.send(reply)
+        except Exception as error:
+            connection.send((False, error))
+    inventory.close()
+    connection.close()
+
+#SHARD-SIDE FUNCTIONS
+def _take(inventory, product_id, quantity:int, reason:str):
+    """Remove stock for a transfer, returns a copy of the product carrying the quantity taken"""
+    product = inventory._products.get(product_id)
+    if product is None:
+        raise ValueError(f"There is no product that has id:{product_id}")
+    if product.available_quantity < quantity:
+        raise ValueError(f"Only {product.available_quantity} of product {product_id} available")
+    inventory.adjust_inventory(product_id, -quantity, reason)
+    moved = copy.copy(product)
+    moved._quantity = quantity
+    return moved
+
+def _put(inventory, product:Product, reason:str):
+    """Add transferred stock, the product is created at this location if it is not stocked here yet"""
+    if product.id in inventory._products:
+        inventory.adjust_inventory(product.id, product.quantity, reason)
+    else:
+        inventory.add_product(product)
+
+def _report_part(inventory):
+    """(type summary, product groups, ids of the low-stock products) of one shard"""
+    return (inventory.type_summary(), inventory.product_groups(),
+            {product.id for product in inventory.low_stock_products()})
+
+
+class LocalShard:
+    """Shard whose inventory lives in this process, calls run inline"""
+    def __init__(self, location, inventory):
+        self.location = location
+        self.inventory = inventory
+        self.lock = threading.Lock()
+        self._reply = None
+
+    def send(self, function, args:tuple):
+        try:
+            self._reply = (True, _apply(self.inventory, function, args))
+        except Exception as error:
+            self._reply = (False, error)
+
+    def receive(self):
+        (ok, value), self._reply = self._reply, None
+        if not ok:
+            raise value
+        return value
+
+    def close(self):
+        self.inventory.close()
+
+
+class ProcessShard:
+    """Shard whose inventory lives in a worker process, calls and results are pickled over a pipe"""
+    def __init__(self, location, inventory_class, kwargs:dict, context=None):
+        context = context or multiprocessing.get_context()
+        self.location = location
+        self.lock = threading.Lock()
+        self._connection, child = context.Pipe()
+        self._process = context.Process(target=_serve, args=(child, inventory_class, kwargs),
+                                        name=f"inventory-shard-{location}", daemon=True)
+        self._process.start()
+        child.close()
+
+    def send(self, function, args:tuple):
+        self._connection.send((function, args))
+
+    def receive(self):
+        ok, value = self._connection.recv()
+        if not ok:
+            raise value
+        return value
+
+    def close(self):
+        if self._process is None:
+            return
+        try:
+            self._connection.send(None)
+        except OSError:
+            pass
+        self._process.join()
+        self._connection.close()
+        self._process = None
+
+
+class _ShardedReport(InventoryReport):
+    """Inventory report over the parts gathered from every shard in one scatter"""
+    def __init__(self, inventory, parts:list):
+        super().__init__(inventory)
+        self._summary = ShardedInventory._merge_summaries(part[0] for part in parts)
+        self._merged = {}
+        self._low = set()
+        for summary, groups, low_ids in parts:
+            for type, products in groups.items():
+                self._merged.setdefault(type, []).extend(products)
+                # the same id can be stocked in several locations, flag the objects themselves
+                self._low.update(id(product) for product in products if product.id in low_ids)
+
+    def _groups(self):
+        return self._merged.items()
+
+    def _is_low(self, product):
+        return id(product) in self._low
+
+    def _totals(self):
+        return sum(c for c, _, _ in self._summary.values()), sum(v for _, _, v in self._summary.values())
+
+
+class ShardedInventory:
+    """
+    Stock partitioned over several Inventory shards, one per warehouse location.
+    A product is stocked where it was added (the location given, or a location picked by hashing its id),
+    possibly in several locations with separate quantities. Single-product calls go to the shard(s)
+    holding the product, filters and reports are scattered to every shard and gathered here.
+    Each shard has its own lock, so calls on different shards run in parallel; with processes=True
+    every shard is a worker process and the work itself spreads over the cores.
+    Scatter queries and transfers hold the locks of all shards involved, so they never see half a transfer.
+    In process mode the products returned are copies, change stock through this class.
+
+    :param locations: Warehouse names, or a number of shards named 0..n-1
+    :param processes: Run each shard's inventory in its own worker process
+    :param inventory_class: Inventory class of the shards, created with inventory_kwargs
+    """
+    def __init__(self, locations=4, processes:bool=False, inventory_class=Inventory, **inventory_kwargs):
+        locations = list(range(locations)) if isinstance(locations, int) else list(locations)
+        if not locations:
+            raise ValueError("Please define at least one location")
+        if len(set(locations)) != len(locations):
+            raise ValueError("Location names must be unique")
+        self._shards = {}
+        try:
+            for location in locations:
+                self._shards[location] = (ProcessShard(location, inventory_class, inventory_kwargs) if processes
+                                          else LocalShard(location, inventory_class(**inventory_kwargs)))
+        except BaseException:
+            self.close()
+            raise
+        self._locations = locations
+        self._order = {location: i for i, location in enumerate(locations)}  # lock order
+        self._placement = {}  # product id -> {location: None}, locations stocking the product
+        self._placement_lock = threading.Lock()
+
+    @property
+    def locations(self):
+        return list(self._locations)
+
+    def close(self):
+        for shard in self._shards.values():
+            shard.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    #ROUTING
+    def _shard(self, location):
+        shard = self._shards.get(location)
+        if shard is None:
+            raise ValueError(f"Unknown location: {location!r}, please choose from {self._locations}")
+        return shard
+
+    def home(self, product_id):
+        """Location a product goes to when it is added without one"""
+        return self._locations[hash(product_id) % len(self._locations)]
+
+    def locations_of(self, product_id):
+        """Locations stocking the product, in location order"""
+        with self._placement_lock:
+            placed = self._placement.get(product_id, {})
+        return [location for location in self._locations if location in placed]
+
+    def _located(self, product_id, location):
+        """The given location, or the only location stocking the product"""
+        if location is not None:
+            return location
+        placed = self.locations_of(product_id)
+        if len(placed) > 1:
+            raise ValueError(f"Product {product_id} is stocked in {placed}, please give a location")
+        return placed[0] if placed else None
+
+    def _place(self, product_id, location):
+        with self._placement_lock:
+            self._placement.setdefault(product_id, {})[location] = None
+
+    def _unplace(self, product_id, location):
+        with self._placement_lock:
+            placed = self._placement.get(product_id)
+            if placed is not None:
+                placed.pop(location, None)
+                if not placed:
+                    del self._placement[product_id]
+
+    def run_on(self, location, function, *args):
+        """
+        Call function(inventory, *args) inside one shard and return its result.
+        In process mode function must be importable (module level) and the result picklable.
+        """
+        shard = self._shard(location)
+        with shard.lock:
+            shard.send(function, args)
+            return shard.receive()
+
+    def _locked(self, shards):
+        """Acquire the locks of the shards in location order, returns them for release"""
+        shards = sorted(shards, key=lambda shard: self._order[shard.location])
+        acquired = []
+        try:
+            for shard in shards:
+                shard.lock.acquire()
+                acquired.append(shard)
+        except BaseException:
+            ShardedInventory._release(acquired)
+            raise
+        return acquired
+
+    @staticmethod
+    def _release(shards):
+        for shard in reversed(shards):
+            shard.lock.release()
+
+    def scatter(self, function, *args, locations=None):
+        """
+        Call function (an Inventory method name or function(inventory, *args)) on every shard at once
+        and gather the results: {location: result}. Process shards all work in parallel.
+        """
+        shards = self._locked(self._shards.values() if locations is None else map(self._shard, locations))
+        try:
+            for shard in shards:
+                shard.send(function, args)
+            results, error = {}, None
+            for shard in shards:  # every reply is read, even after an error, to keep the pipes in step
+                try:
+                    results[shard.location] = shard.receive()
+                except Exception as failure:
+                    error = error or failure
+            if error is not None:
+                raise error
+            return {location: results[location] for location in self._locations if location in results}
+        finally:
+            ShardedInventory._release(shards)
+
+    def _gather(self, function, *args):
+        """Scatter and chain the list results in location order"""
+        return [item for result in self.scatter(function, *args).values() for item in result]
+
+    #MUTATORS
+    @staticmethod
+    def _detached(product:Product):
+        """A product already held by an inventory is copied, two shards must not share one object"""
+        return copy.copy(product) if product._events is not None else product
+
+    def add_product(self, product:Product, location=None):
+        location = self.home(product.id) if location is None else location
+        product = ShardedInventory._detached(product)
+        self.run_on(location, "add_product", product)
+        self._place(product.id, location)
+
+    def add_products(self, products, location=None, batch_size:int=10000):
+        """
+        Add many products, grouped per location and added on all the shards at once
+        :param location: Location of every product, else each goes to its home location
+        :return: Number of products processed
+        """
+        groups = {}
+        for product in map(ShardedInventory._detached, products):
+            groups.setdefault(self.home(product.id) if location is None else location, []).append(product)
+        if not groups:
+            return 0
+        shards = self._locked(map(self._shard, groups))
+        try:
+            for shard in shards:
+                shard.send("add_products", (groups[shard.location], batch_size))
+            counts = [shard.receive() for shard in shards]
+        finally:
+            ShardedInventory._release(shards)
+        for where, group in groups.items():
+            for product in group:
+                self._place(product.id, where)
+        return sum(counts)
+
+    def adjust_inventory(self, product_id, adjustment_amount, reason="", location=None):
+        location = self._located(product_id, location)
+        return location is not None and self.run_on(location, "adjust_inventory", product_id, adjustment_amount, reason)
+
+    def correct_inventory(self, product_id, new_quantity, reason="", location=None):
+        location = self._located(product_id, location)
+        return location is not None and self.run_on(location, "correct_inventory", product_id, new_quantity, reason)
+
+    def remove_product(self, product:Product, location=None):
+        """Remove the product from one location, or from every location stocking it"""
+        locations = [location] if location is not None else self.locations_of(product.id)
+        if not locations:
+            return f"There is no product that has id:{product.id}"
+        for where in locations:
+            self.run_on(where, "remove_product", product)
+            self._unplace(product.id, where)
+
+    def transfer_stock(self, product_id, quantity:int, source, target, reason:str=""):
+        """
+        Move stock between two locations, all or nothing. The product is created at the target if it
+        is not stocked there yet. If the target fails the source gets its stock back.
+        :raise ValueError: Unknown product or location, or not enough available stock at the source
+        """
+        if quantity <= 0:
+            raise ValueError("Transfer quantity must be positive")
+        if source == target:
+            raise ValueError("Source and target must differ")
+        shards = self._locked([self._shard(source), self._shard(target)])
+        try:
+            source_shard, target_shard = self._shards[source], self._shards[target]
+            source_shard.send(_take, (product_id, quantity, reason or f"transfer to {target}"))
+            moved = source_shard.receive()
+            try:
+                target_shard.send(_put, (moved, reason or f"transfer from {source}"))
+                target_shard.receive()
+            except Exception:
+                source_shard.send("adjust_inventory", (product_id, quantity, f"transfer to {target} rolled back"))
+                source_shard.receive()
+                raise
+        finally:
+            ShardedInventory._release(shards)
+        self._place(product_id, target)
+        return True
+
+    #FILTERS
+    def find_product_by_id(self, product_id, location=None):
+        """The product at the given location, else at the first location stocking it"""
+        placed = self.locations_of(product_id) if location is None else [location]
+        if placed:
+            product = self.run_on(placed[0], "find_product_by_id", product_id)
+            if isinstance(product, Product):
+                return product
+        return f"There is no product that has id: {product_id}"
+
+    def stock_by_location(self, product_id):
+        """{location: quantity} of one product"""
+        placed = self.locations_of(product_id)
+        if not placed:
+            return {}
+        found = self.scatter("find_product_by_id", product_id, locations=placed)
+        return {location: product.quantity for location, product in found.items() if isinstance(product, Product)}
+
+    def find_product_by_name(self, name:str):
+        """The first product with that name, in location order, or None"""
+        if name or len(name) > 0:
+            for product in self.scatter("find_product_by_name", name).values():
+                if product is not None:
+                    return product
+        return None
+
+    def find_product_by_type(self, type:str):
+        return self._gather("find_product_by_type", type)
+
+    def find_product_by_price(self, start:int, end:int):
+        return self._gather("find_product_by_price", start, end)
+
+    def find_product_by_quantity(self, start:int, end:int):
+        return self._gather("find_product_by_quantity", start, end)
+
+    def find_product_by_date(self, start, end):
+        return self._gather("find_product_by_date", start, end)
+
+    #REPORTS
+    def product_count(self):
+        return sum(self.scatter("product_count").values())
+
+    def total_value(self):
+        return sum(self.scatter("total_value").values())
+
+    def value_by_type(self):
+        merged = {}
+        for values in self.scatter("value_by_type").values():
+            for type, value in values.items():
+                merged[type] = merged.get(type, 0) + value
+        return merged
+
+    @staticmethod
+    def _merge_summaries(summaries):
+        merged = {}
+        for summary in summaries:
+            for type, (count, quantity, value) in summary.items():
+                c, q, v = merged.get(type, (0, 0, 0))
+                merged[type] = (c + count, q + quantity, v + value)
+        return merged
+
+    def type_summary(self):
+        """{type: (count, quantity, value)} summed over the locations, a stock row per location counts once"""
+        return ShardedInventory._merge_summaries(self.scatter("type_summary").values())
+
+    def low_stock_products(self):
+        return self._gather("low_stock_products")
+
+    def expiring_products(self, days:int):
+        return self._gather("expiring_products", days)
+
+    def generate_inventory_report(self, format:str="text"):
+        """
+        Inventory report over every location, the shards' parts are gathered in one scatter
+        :param format: "text", "csv" or "json"
+        """
+        return "".join(_ShardedReport(self, list(self.scatter(_report_part).values())).stream(format))
+
+    def inventory_summary(self, format:str="text"):
+        """Per-type totals over every location without walking the products"""
+        return InventoryReport(self).summary(format)
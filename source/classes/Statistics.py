@@ -0,0 +1,90 @@
+"""Constant-memory running statistics for supplier performance tracking."""
+import math
+
+class RunningStats:
+    """
+    Count, mean, variance (Welford), exponentially weighted mean, min/max and approximate percentiles
+    from a fixed-width histogram. Every add() is O(1) and memory doesn't grow with the number of values.
+    :param low: Lower edge of the histogram
+    :param high: Upper edge of the histogram, values outside [low, high] land in the edge bins
+    :param bins: Number of histogram bins
+    :param alpha: Weight of the newest value in the exponentially weighted mean
+    """
+    __slots__ = ("_low", "_width", "_alpha", "_count", "_mean", "_m2", "_ewma", "_min", "_max", "_bins")
+
+    def __init__(self, low:float, high:float, bins:int=64, alpha:float=0.2):
+        if high <= low or bins < 1:
+            raise ValueError("Histogram needs high > low and at least one bin")
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self._low = low
+        self._width = (high - low) / bins
+        self._alpha = alpha
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._ewma = None
+        self._min = None
+        self._max = None
+        self._bins = [0] * bins
+
+    def add(self, value:float):
+        self._count += 1
+        delta = value - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (value - self._mean)
+        self._ewma = value if self._ewma is None else self._ewma + self._alpha * (value - self._ewma)
+        self._min = value if self._min is None else min(self._min, value)
+        self._max = value if self._max is None else max(self._max, value)
+        i = int((value - self._low) // self._width)
+        self._bins[min(max(i, 0), len(self._bins) - 1)] += 1
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def mean(self):
+        return self._mean if self._count else 0
+
+    @property
+    def variance(self):
+        """Sample variance, 0 with fewer than two values"""
+        return self._m2 / (self._count - 1) if self._count > 1 else 0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def ewma(self):
+        return self._ewma if self._ewma is not None else 0
+
+    @property
+    def min(self):
+        return self._min
+
+    @property
+    def max(self):
+        return self._max
+
+    def percentile(self, p:float):
+        """Approximate p-th percentile (0-100), interpolated inside the histogram bin it falls in"""
+        if not 0 <= p <= 100:
+            raise ValueError("Percentile must be between 0 and 100")
+        if not self._count:
+            return 0
+        rank = p / 100 * self._count
+        seen = 0
+        for i, count in enumerate(self._bins):
+            if count and seen + count >= rank:
+                value = self._low + (i + (rank - seen) / count) * self._width
+                return min(max(value, self._min), self._max)
+            seen += count
+        return self._max
+
+    def __repr__(self):
+        return f"RunningStats(count: {self._count}, mean: {self.mean:.2f}, stdev: {self.stdev:.2f}, ewma: {self.ewma:.2f})"
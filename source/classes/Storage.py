@@ -0,0 +1,295 @@
+"""Write-ahead log and snapshots that persist Inventory state between restarts."""
+import glob
+import os
+import pickle
+import struct
+import threading
+import zlib
+
+from classes.Events import ProductChanged
+from classes.Order import Order
+from classes.Product import Product
+
+class WriteAheadLog:
+    """
+    Append-only file of mutation records. Each record is framed as
+    length + crc32 + pickled (seq, op, args) so a torn write at the tail is detected and ignored.
+    """
+    _header = struct.Struct("<II")
+
+    def __init__(self, path:str, sync_every_write:bool=False):
+        self._path = path
+        self._sync_every_write = sync_every_write
+        self._file = open(path, "ab")
+
+    @property
+    def path(self):
+        return self._path
+
+    def append(self, seq:int, op:str, args:tuple):
+        payload = pickle.dumps((seq, op, args), pickle.HIGHEST_PROTOCOL)
+        self._file.write(WriteAheadLog._header.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._file.flush()
+        if self._sync_every_write:
+            os.fsync(self._file.fileno())
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    @staticmethod
+    def read(path:str):
+        """Yield (seq, op, args) records up to the first incomplete or corrupt one"""
+        header = WriteAheadLog._header
+        with open(path, "rb") as f:
+            while True:
+                raw = f.read(header.size)
+                if len(raw) < header.size:
+                    return
+                length, crc = header.unpack(raw)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    return
+                yield pickle.loads(payload)
+
+
+class InventoryStore:
+    """
+    Directory holding snapshots (snapshot-<seq>.bin) and WAL segments (wal-<seq>.log).
+    A segment named after seq n holds the records that follow snapshot n.
+
+    store = InventoryStore("data")
+    inventory = store.load()       # latest snapshot + WAL tail, journaling attached
+    inventory.adjust_inventory(1, 5)
+    store.snapshot()               # forked serializer, writers keep going
+    """
+    def __init__(self, directory:str, sync_every_write:bool=False):
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._sync_every_write = sync_every_write
+        self._seq = 0
+        self._wal = None
+        self._inventory = None
+        self._reapers = []   # threads waiting on forked snapshot writers
+        self._lock = threading.Lock()  # keeps records from interleaving with a snapshot's seq capture, WAL swap and fork
+
+    def _path(self, kind:str, seq:int):
+        return os.path.join(self._directory, f"{kind}-{seq:020d}.{'bin' if kind == 'snapshot' else 'log'}")
+
+    def _listing(self, kind:str):
+        paths = glob.glob(os.path.join(self._directory, f"{kind}-*.{'bin' if kind == 'snapshot' else 'log'}"))
+        return sorted((int(os.path.basename(p).split("-")[1].split(".")[0]), p) for p in paths)
+
+    #STARTUP
+    def load(self, inventory_class=None, **kwargs):
+        """Rebuild an inventory from the latest snapshot and the WAL tail, then journal into this store"""
+        if inventory_class is None:
+            from classes.Inventory import Inventory
+            inventory_class = Inventory
+        from classes.SQLiteInventory import SQLiteInventory
+        if issubclass(inventory_class, SQLiteInventory):
+            raise ValueError("SQLiteInventory persists its own state, it cannot be loaded from an InventoryStore")
+        inventory = inventory_class(**kwargs)
+        snapshot_seq = 0
+        snapshots = self._listing("snapshot")
+        if snapshots:
+            snapshot_seq, path = snapshots[-1]
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+            inventory._restore(state["products"], state["suppliers"], state["orders"])
+        self._seq = snapshot_seq
+        for start, path in self._listing("wal"):
+            if start < snapshot_seq:
+                continue
+            for seq, op, args in WriteAheadLog.read(path):
+                if seq > self._seq:
+                    InventoryStore._replay(inventory, op, args)
+                    self._seq = seq
+        InventoryStore._bump_counters(inventory)
+        self.attach(inventory)
+        return inventory
+
+    @staticmethod
+    def _replay(inventory, op:str, args:tuple):
+        # a record may already be part of the snapshot (state changes before it is journaled),
+        # so every record is applied only where it has not taken effect yet
+        if op == "add":
+            if args[0].id not in inventory._products:
+                inventory.add_product(args[0])
+        elif op == "add_many":
+            inventory.add_products([p for p in args[0] if p.id not in inventory._products])
+        elif op == "set":
+            product_id, field, value = args
+            product = inventory._products.get(product_id)
+            if product is not None:
+                # straight to the slot, a setter would reject values that were valid when journaled (past expiry dates)
+                setattr(product, "_" + field, value)
+                inventory._retrack(product)
+        elif op == "remove":
+            if args[0] in inventory._products:
+                inventory.remove_product(inventory._products[args[0]])
+        elif op == "supplier":
+            position, supplier = args
+            if position < len(inventory._suppliers):
+                return
+            # the pickled supplier carries copies of its products, point it back at the live ones
+            supplier._products = {id: inventory._products.get(id, p) for id, p in supplier._products.items()}
+            inventory.add_supplier(supplier)
+        elif op == "order":
+            order_id, order_type = args
+            if inventory._orders.get(order_id) is not None:
+                return
+            order = Order(order_type)
+            order._order_id = order_id
+            inventory._register_order(order)
+            inventory._logs.record(order, "ORDER", 1, note=order_type)
+        elif op == "item_added":
+            order_id, product, quantity = args
+            order = inventory._orders.get(order_id)
+            line = order._items.get(product.id) if order is not None else None
+            added = quantity - (line[1] if line is not None else 0)
+            if order is not None and added > 0:
+                # the line points at the live product when the inventory holds it
+                order._put_item(inventory._products.get(product.id, product), added)
+        elif op == "item_removed":
+            order_id, product_id = args
+            order = inventory._orders.get(order_id)
+            if order is not None:
+                order.remove_items([product_id])
+        elif op == "order_changed":
+            order_id, change, value = args
+            order = inventory._orders.get(order_id)
+            if order is not None:
+                if change == "status":
+                    order._set_status(value)
+                else:
+                    order.order_type = value
+        elif op == "supplier_changed":
+            InventoryStore._replay_supplier(inventory, *args)
+        else:
+            raise ValueError(f"Unknown WAL operation: {op}")
+
+    @staticmethod
+    def _replay_supplier(inventory, position:int, change:str, value):
+        supplier = inventory._suppliers[position]
+        if change == "rename":
+            supplier.name = value
+        elif change == "contact":
+            supplier.contact_info = value
+        elif change == "add":
+            supplier.add_product(inventory._products.get(value.id, value))
+        elif change == "remove":
+            supplier.remove_product(supplier._products.get(value))
+        elif change == "order":
+            order = inventory._orders.get(value["order"])
+            if order is None:
+                return
+            if supplier.find_order_record(order.order_id) is None:
+                supplier._add_order_to_history(dict(value, order=order))
+            else:
+                supplier._update_order_record(order.order_id, **dict(value, order=order))
+        elif change == "delivery":
+            days, count = value
+            if supplier.delivery_stats.count < count:
+                supplier.add_delivery_record(days)
+        elif change == "quality":
+            rating, count = value
+            if supplier.quality_stats.count < count:
+                supplier.add_quality_rating(rating)
+
+    @staticmethod
+    def _bump_counters(inventory):
+        """Keep newly created products and orders from reusing restored ids"""
+        if inventory._products:
+            Product.ids.advance(max(inventory._products))
+        if inventory._orders:
+            Order.ids.advance(max(o.order_id for o in inventory._orders))
+
+    #JOURNALING
+    def attach(self, inventory):
+        """Start journaling the mutations of an inventory into a fresh WAL segment"""
+        self._inventory = inventory
+        self._wal = WriteAheadLog(self._path("wal", self._seq), self._sync_every_write)
+        inventory._storage = self
+        inventory.events.subscribe(inventory._journal_change, (ProductChanged,))
+
+    def record(self, op:str, *args):
+        """Called by Inventory for every journaled mutation"""
+        with self._lock:
+            self._seq += 1
+            self._wal.append(self._seq, op, args)
+
+    #SNAPSHOTS
+    def snapshot(self, background:bool=True):
+        """
+        Write a snapshot of the attached inventory and start a new WAL segment.
+        With background=True the state is serialized by a forked child that sees a copy-on-write
+        image of memory, so the caller returns immediately. Without fork support it runs inline.
+        """
+        pid = None
+        with self._lock:
+            seq = self._seq
+            self._wal.close()
+            self._wal = WriteAheadLog(self._path("wal", seq), self._sync_every_write)
+            if background and hasattr(os, "fork"):
+                pid = os.fork()
+                if pid == 0:
+                    code = 1
+                    try:
+                        self._write_snapshot(seq)
+                        code = 0
+                    finally:
+                        os._exit(code)
+        if pid is None:
+            self._write_snapshot(seq)
+            self._compact(seq)
+        else:
+            reaper = threading.Thread(target=self._reap, args=(pid, seq), daemon=True)
+            reaper.start()
+            self._reapers.append(reaper)
+        return seq
+
+    def _write_snapshot(self, seq:int):
+        state = {"version": 1, "seq": seq,
+                 "products": list(self._inventory._products.values()),
+                 "suppliers": list(self._inventory._suppliers),
+                 "orders": list(self._inventory._orders)}
+        path = self._path("snapshot", seq)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    def _reap(self, pid:int, seq:int):
+        _, status = os.waitpid(pid, 0)
+        if status == 0:
+            self._compact(seq)
+
+    def _compact(self, seq:int):
+        """Drop snapshots and WAL segments made obsolete by snapshot seq"""
+        for start, path in self._listing("snapshot"):
+            if start < seq:
+                os.remove(path)
+        for start, path in self._listing("wal"):
+            if start < seq:
+                os.remove(path)
+
+    def wait(self):
+        """Block until background snapshots have finished"""
+        while self._reapers:
+            self._reapers.pop().join()
+
+    def close(self):
+        self.wait()
+        if self._wal is not None:
+            with self._lock:
+                self._wal.close()
+        if self._inventory is not None:
+            self._inventory.events.unsubscribe(self._inventory._journal_change)
+            self._inventory._storage = None
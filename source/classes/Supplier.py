@@ -1,14 +1,18 @@
 from classes.Product import Product
+from classes.Statistics import RunningStats
 class Supplier:
     """Supplier class for managing product suppliers"""
     _supplier_count = 0
     def __init__(self, name:str, contact_info:str):
         self._name = name
         self._contact = contact_info
-        self._products = []
-        self._delivery_times = []  # List of delivery time in days
-        self._quality_ratings = []  # List of quality ratings (1-5)
+        self._products = {}  # product id -> product, keeps the order products were added in
+        self._type_counts = {}  # product type -> number of supplied products of that type
+        self._delivery_times = RunningStats(0, 120, 120)  # Delivery times in days, one bin per day
+        self._quality_ratings = RunningStats(1, 5, 40)  # Quality ratings (1-5)
         self._order_history = []   # List of order information
+        self._order_index = {}  # order id -> its record in _order_history
+        self._listeners = []  # callback(supplier, change, value), see _notify
         Supplier._supplier_count += 1
 
     @property
@@ -17,7 +21,8 @@ class Supplier:
     @name.setter
     def name(self, value:str):
         if value and 0 < len(value.strip()) <= 25:
-            self._name = value
+            old, self._name = self._name, value
+            self._notify("rename", old)
         else:
             raise ValueError(f"The value range isnt between 0-25")
     
@@ -27,48 +32,104 @@ class Supplier:
     @contact_info.setter
     def contact_info(self, value:str):
         if value:
-            self._contact = value
+            old, self._contact = self._contact, value
+            self._notify("contact", old)
         else:
             raise ValueError("Check the contact_info value!!!")
     
     def add_product(self, *products:Product):
-        if products:
-            for product in products:
-                self._products.append(product)
+        for product in products:
+            if product.id not in self._products:
+                self._products[product.id] = product
+                type = product.get_product_type()
+                self._type_counts[type] = self._type_counts.get(type, 0) + 1
+                self._notify("add", product)
 
     def remove_product(self, product:Product):
-        if product and product in self._products:
-            self._products.remove(product)
+        if product and self._products.pop(product.id, None) is not None:
+            type = product.get_product_type()
+            self._type_counts[type] -= 1
+            if not self._type_counts[type]:
+                del self._type_counts[type]
+            self._notify("remove", product)
 
     def get_supplied_products(self):
-        return self._products
+        return list(self._products.values())
+
+    def supplies(self, product_type:str):
+        """Whether at least one supplied product is of the given type"""
+        return product_type in self._type_counts
+
+    def product_types(self):
+        return list(self._type_counts)
+
+    #LISTENERS
+    def subscribe(self, callback):
+        """
+        Call callback(supplier, change, value) on "rename"/"contact" (old value), "add" and "remove" (product),
+        "order" (the order's history record), "delivery" (days to deliver) and "quality" (rating)
+        """
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        self._listeners.remove(callback)
+
+    def _notify(self, change:str, value):
+        for callback in self._listeners:
+            callback(self, change, value)
 
     #DELIVERY TRACKERS
     def add_delivery_record(self, days_to_deliver):
         """Add a delivery time record"""
         if days_to_deliver > 0:
-            self._delivery_times.append(days_to_deliver)
+            self._delivery_times.add(days_to_deliver)
+            self._notify("delivery", days_to_deliver)
 
     def _get_avg_delivery_time(self):
         """Calculate average delivery time"""
-        if self._delivery_times:
-            return sum(self._delivery_times) / len(self._delivery_times)
-        return 0
+        return self._delivery_times.mean
     
     def add_quality_rating(self, rating):
         """Add a quality rating (1-5)"""
         if 1 <= rating <= 5:
-            self._quality_ratings.append(rating)
+            self._quality_ratings.add(rating)
+            self._notify("quality", rating)
 
     def _get_avg_quality_rating(self):
         """Calculate average quality rating"""
-        if self._quality_ratings:
-            return sum(self._quality_ratings) / len(self._quality_ratings)
-        return 0
+        return self._quality_ratings.mean
+
+    @property
+    def delivery_stats(self):
+        """RunningStats of the delivery times in days"""
+        return self._delivery_times
+
+    @property
+    def quality_stats(self):
+        """RunningStats of the quality ratings"""
+        return self._quality_ratings
     
     def _add_order_to_history(self, order_info):
         """Add order information to history"""
         self._order_history.append(order_info)
+        self._order_index[order_info['order'].order_id] = order_info
+        self._notify("order", order_info)
+
+    def _update_order_record(self, order_id, **fields):
+        """Change fields of the history record of an order"""
+        record = self._order_index[order_id]
+        record.update(fields)
+        self._notify("order", record)
+
+    def find_order_record(self, order_id):
+        """History record of an order placed with this supplier, None if there is none"""
+        return self._order_index.get(order_id)
+
+    def __getstate__(self):
+        # listeners belong to the inventory holding this supplier, they are re-attached on load
+        state = self.__dict__.copy()
+        state["_listeners"] = []
+        return state
 
     def __repr__(self):
         return f"Supplier(Name: {self._name}, Contact info: {self._contact}, Product count: {len(self._products)})"
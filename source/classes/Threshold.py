@@ -0,0 +1,167 @@
+"""Low-stock threshold rules loaded lazily from JSON and reloaded when the file changes."""
+import json
+import os
+import threading
+import time
+import weakref
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "products", "product_stock_threshold.json")
+
+class ThresholdTable:
+    """
+    Precompiled thresholds: one dict for the product ids with their own rule, one for the types.
+    Per-SKU rules win over per-supplier rules, which win over the type's threshold.
+    """
+    __slots__ = ("_by_id", "_by_type")
+
+    def __init__(self, by_id:dict, by_type:dict):
+        self._by_id = by_id
+        self._by_type = by_type
+
+    def get(self, product):
+        threshold = self._by_id.get(product.id)
+        if threshold is None:
+            return self._by_type.get(product.get_product_type(), 0)
+        return threshold
+
+    @property
+    def types(self):
+        return self._by_type
+
+    @property
+    def overrides(self):
+        return self._by_id
+
+    def changes(self, other):
+        """(types, product ids) whose threshold differs between this table and other"""
+        types = {t for t in self._by_type.keys() | other._by_type.keys() if self._by_type.get(t) != other._by_type.get(t)}
+        ids = {i for i in self._by_id.keys() | other._by_id.keys() if self._by_id.get(i) != other._by_id.get(i)}
+        return types, ids
+
+
+class StockThresholdProvider:
+    """
+    Reads the threshold file on first use and re-reads it when its modification time changes.
+    File format, only "Products" is required:
+        {"Products": {type: threshold}, "SKU": {product id: threshold}, "Suppliers": {supplier name: threshold}}
+    Listeners registered with subscribe() are called with no arguments after every reload.
+    :param path: Threshold JSON file, defaults to source/products/product_stock_threshold.json
+    :param poll_interval: Minimum seconds between two modification time checks in poll()
+    """
+    def __init__(self, path:str=DEFAULT_PATH, poll_interval:float=2.0):
+        self._path = path
+        self._poll_interval = poll_interval
+        self._lock = threading.RLock()
+        self._config = None
+        self._mtime = None
+        self._checked = 0.0
+        self._version = 0
+        self._listeners = []
+        self._watcher = None
+        self._stop = threading.Event()
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def version(self):
+        """Number of times the file was (re)loaded"""
+        return self._version
+
+    @property
+    def config(self):
+        """The raw JSON rules, loaded on first access"""
+        if self._config is None:
+            with self._lock:
+                if self._config is None:
+                    self._load()
+        return self._config
+
+    def _load(self):
+        mtime = os.stat(self._path).st_mtime_ns
+        with open(self._path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if not isinstance(config.get("Products"), dict):
+            raise ValueError(f"{self._path}: missing \"Products\" thresholds")
+        self._config = config
+        self._mtime = mtime
+        self._checked = time.monotonic()
+        self._version += 1
+
+    def compile(self, suppliers=()):
+        """Build a ThresholdTable, supplier rules are expanded to the products each supplier carries"""
+        config = self.config
+        by_id = {}
+        rules = {name.casefold(): int(value) for name, value in config.get("Suppliers", {}).items()}
+        if rules:
+            for supplier in suppliers:
+                threshold = rules.get(supplier.name.casefold())
+                if threshold is None:
+                    continue
+                for product in supplier.get_supplied_products():
+                    # a product carried by several suppliers keeps the highest of their thresholds
+                    by_id[product.id] = max(threshold, by_id.get(product.id, threshold))
+        for id, value in config.get("SKU", {}).items():
+            by_id[int(id)] = int(value)
+        return ThresholdTable(by_id, {type: int(value) for type, value in config["Products"].items()})
+
+    #RELOADING
+    def subscribe(self, callback):
+        """Call callback() after each reload, bound methods are held weakly"""
+        reference = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+        with self._lock:
+            self._listeners.append(reference)
+
+    def poll(self, force:bool=False):
+        """Reload if the file changed, at most one stat per poll_interval. Returns whether it reloaded"""
+        now = time.monotonic()
+        if self._config is None or (not force and now - self._checked < self._poll_interval):
+            return False
+        with self._lock:
+            self._checked = now
+            try:
+                mtime = os.stat(self._path).st_mtime_ns
+            except OSError:
+                return False  # keep the last good rules while the file is being replaced
+            if mtime == self._mtime:
+                return False
+            try:
+                self._load()
+            except ValueError:
+                self._mtime = mtime  # half-written or invalid file, retried once it changes again
+                return False
+            listeners = [reference() for reference in self._listeners]
+            self._listeners = [reference for reference, listener in zip(self._listeners, listeners) if listener is not None]
+        for listener in listeners:
+            if listener is not None:
+                listener()
+        return True
+
+    def watch(self, interval:float=None):
+        """Poll the file from a daemon thread until stop() is called"""
+        interval = self._poll_interval if interval is None else interval
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), name="threshold-watcher", daemon=True)
+            self._watcher.start()
+
+    def _watch(self, interval:float):
+        while not self._stop.wait(interval):
+            self.poll(force=True)
+
+    def stop(self):
+        with self._lock:
+            watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            self._stop.set()
+            watcher.join()
+
+
+class ThresholdConfig:
+    """Class attribute that reads like the old Inventory.stock_threshold dict but loads on first access"""
+    def __get__(self, instance, owner):
+        return owner.thresholds.config
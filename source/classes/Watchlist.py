@@ -0,0 +1,115 @@
+"""Incrementally maintained low-stock and expiry watchlists."""
+import datetime
+from bisect import bisect_left, insort
+
+class LowStockWatchlist:
+    """
+    Products whose quantity is below their threshold, updated on every quantity change.
+    Subscribers are called as callback(product, is_low) whenever a product crosses its threshold.
+    :param threshold_for: Function returning the threshold of a product
+    """
+    def __init__(self, threshold_for):
+        self._threshold_for = threshold_for
+        self._low = {}          # product id -> product
+        self._subscribers = []
+
+    def __len__(self):
+        return len(self._low)
+
+    def __contains__(self, product_id):
+        return product_id in self._low
+
+    @property
+    def subscribed(self):
+        return bool(self._subscribers)
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    def update(self, product):
+        """Re-check one product, fires the subscribers if it crossed its threshold"""
+        is_low = product.quantity < self._threshold_for(product)
+        was_low = product.id in self._low
+        if is_low == was_low:
+            return
+        if is_low:
+            self._low[product.id] = product
+        else:
+            del self._low[product.id]
+        self._fire(product, is_low)
+
+    def notify(self, product, previous_quantity:int):
+        """Fire the subscribers from a known previous quantity, for stores that don't keep the set in memory"""
+        threshold = self._threshold_for(product)
+        is_low = product.quantity < threshold
+        if is_low != (previous_quantity < threshold):
+            self._fire(product, is_low)
+
+    def _fire(self, product, is_low:bool):
+        for callback in self._subscribers:
+            callback(product, is_low)
+
+    def remove(self, product):
+        self._low.pop(product.id, None)
+
+    def products(self):
+        """Products currently below threshold, O(number of them)"""
+        return list(self._low.values())
+
+
+class ExpiryWatchlist:
+    """Calendar of products with an expiry_date, bucketed by day with a sorted list of the days in use"""
+    def __init__(self):
+        self._buckets = {}      # expiry date -> {product id: product}
+        self._days = []         # sorted expiry dates that have a bucket
+        self._expiry = {}       # product id -> expiry date it is filed under
+
+    def __len__(self):
+        return len(self._expiry)
+
+    def update(self, product):
+        """File or re-file a product under its current expiry date, products without one are ignored"""
+        expiry = getattr(product, "expiry_date", None)
+        old = self._expiry.get(product.id)
+        if expiry == old:
+            return
+        if old is not None:
+            self._discard(old, product.id)
+        if expiry is None:
+            return
+        bucket = self._buckets.get(expiry)
+        if bucket is None:
+            bucket = self._buckets[expiry] = {}
+            insort(self._days, expiry)
+        bucket[product.id] = product
+        self._expiry[product.id] = expiry
+
+    def remove(self, product):
+        old = self._expiry.get(product.id)
+        if old is not None:
+            self._discard(old, product.id)
+
+    def _discard(self, day, product_id):
+        del self._expiry[product_id]
+        bucket = self._buckets[day]
+        del bucket[product_id]
+        if not bucket:
+            del self._buckets[day]
+            del self._days[bisect_left(self._days, day)]
+
+    def expiring_before(self, day:datetime.date):
+        """Products whose expiry date is before the given day"""
+        result = []
+        for expiry in self._days[:bisect_left(self._days, day)]:
+            result.extend(self._buckets[expiry].values())
+        return result
+
+    def expired(self):
+        return self.expiring_before(datetime.date.today())
+
+    def expiring_within(self, days:int):
+        """Products that are expired or expire in the next given number of days"""
+        return self.expiring_before(datetime.date.today() + datetime.timedelta(days=days + 1))
@@ -1,13 +1,17 @@
+import sys
 from classes.Product import Product
+from classes.Events import ProductChanged
 
 class Clothing(Product):
+    __slots__ = ("_size", "_material", "_info")
     materials = ["cotton", "silk", "leather", "linen", "wool", "hemp"]
     clothing_sizes = ["XS", "S", "M", "L", "XL", "XXL"]
     def __init__(self, name:str, price:float, quantity:int, size:str, material:str, additional_info:str=""):
         super().__init__(name, price, quantity,)
-        self._size = size
-        self._material = material
-        self._info = additional_info
+        # sizes and materials come from small vocabularies, interning lets every instance share one string
+        self._size = sys.intern(size)
+        self._material = sys.intern(material)
+        self._info = sys.intern(additional_info)
 
     @property
     def size(self):
@@ -16,7 +20,9 @@ class Clothing(Product):
     def size(self, size_of_clothing:str):
         if not size_of_clothing or size_of_clothing not in Clothing.clothing_sizes:
             raise ValueError(f"Please choose from {Clothing.clothing_sizes}")
-        self._size = size_of_clothing
+        old, self._size = self._size, sys.intern(size_of_clothing)
+        if self._events is not None:
+            self._events.changed(ProductChanged, self, "size", old, self._size)
 
     @property
     def info(self):
@@ -29,7 +35,9 @@ class Clothing(Product):
     def material(self, material_type:str):
         if not material_type or material_type not in Clothing.materials:
             raise ValueError(f"Please choose from {Clothing.materials}")
-        self._material = material_type
+        old, self._material = self._material, sys.intern(material_type)
+        if self._events is not None:
+            self._events.changed(ProductChanged, self, "material", old, self._material)
 
     def get_product_type(self):
         return "Clothing"
@@ -1,10 +1,13 @@
+import sys
 from classes.Product import Product
+from classes.Events import ProductChanged
 
 class Electronics(Product):
+    __slots__ = ("_warranty_months", "_info")
     def __init__(self, name:str, price:float, quantity:int, warranty_months:int, additional_info:str=""):
         super().__init__(name, price, quantity)
         self._warranty_months = warranty_months
-        self._info = additional_info
+        self._info = sys.intern(additional_info)
     
     @property
     def warranty_months(self):
@@ -14,7 +17,9 @@ class Electronics(Product):
     def warranty_months(self, value):
         if value < 0:
             raise ValueError("Warranty Months Value must be above zero")
-        self._warranty_months = value
+        old, self._warranty_months = self._warranty_months, value
+        if self._events is not None:
+            self._events.changed(ProductChanged, self, "warranty_months", old, value)
 
     @property
     def info(self):
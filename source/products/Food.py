@@ -1,11 +1,15 @@
 from classes.Product import Product
+from classes.Events import ProductChanged
 import datetime
+import sys
 
 class Food(Product):
+    __slots__ = ("_expiry_date", "_info")
+    _shared_dates = {}  # flyweight pool, products expiring on the same day share one date object
     def __init__(self, name:str, price:float, quantity:int, expiry_date:datetime.date, additional_info:str=""):
         super().__init__(name, price, quantity)
-        self._expiry_date = expiry_date
-        self._info = additional_info
+        self._expiry_date = Food._shared_date(expiry_date)
+        self._info = sys.intern(additional_info)
 
     @property
     def expiry_date(self):
@@ -15,7 +19,13 @@ class Food(Product):
     def expiry_date(self, value:datetime.date):
         if value < datetime.date.today():
             raise ValueError("Expiry date cannot be in the past")
-        self._expiry_date = value
+        old, self._expiry_date = self._expiry_date, Food._shared_date(value)
+        if self._events is not None:
+            self._events.changed(ProductChanged, self, "expiry_date", old, self._expiry_date)
+
+    @staticmethod
+    def _shared_date(value:datetime.date):
+        return Food._shared_dates.setdefault(value, value)
 
     @property
     def info(self):
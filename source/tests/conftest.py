@@ -0,0 +1,5 @@
+import os
+import sys
+
+# tests import the packages the same way run.py does, from the source directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
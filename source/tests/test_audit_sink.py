@@ -0,0 +1,55 @@
+"""Audit sinks persist every record and keep sequence numbers unique across restarts."""
+import json
+import os
+
+from classes.Audit import AuditLog, AuditTrail
+from classes.AuditSink import AuditSink, JsonlBackend
+from classes.Ids import LocalIdAllocator
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_restarted_process_continues_after_the_stored_seqs(tmp_path, monkeypatch):
+    path = os.path.join(str(tmp_path), "audit.jsonl")
+    trail = AuditTrail()
+    trail.sink = AuditSink(JsonlBackend(path))
+    trail.record("Phone", "ADD", 5)
+    trail.sink.close()
+    monkeypatch.setattr(AuditLog, "sequence", LocalIdAllocator())  # a fresh process starts counting at 1
+    trail.sink = AuditSink(JsonlBackend(path))
+    trail.record("Phone", "ADD", 5)
+    trail.sink.close()
+    first, second = read(path)
+    assert second["seq"] > first["seq"]
+
+
+class FlakyBackend(JsonlBackend):
+    """Refuses records that carry a note, like a backend hitting a value it can't store"""
+    def write(self, records:list):
+        if any(record["note"] for record in records):
+            raise ValueError("unsupported value")
+        super().write(records)
+
+
+def test_one_bad_record_does_not_drop_its_batch(tmp_path):
+    path = os.path.join(str(tmp_path), "audit.jsonl")
+    sink = AuditSink(FlakyBackend(path), flush_interval=60)
+    trail = AuditTrail()
+    trail.sink = sink
+    trail.record("Phone", "ADD", 5)
+    trail.record("Phone", "ADJUST", 4, note="bad")
+    trail.record("Phone", "ADJUST", 3)
+    sink.close()
+    assert [record["quantity"] for record in read(path)] == [5, 3]
+    assert sink.failed == 1
+
+
+def test_jsonl_backend_writes_values_json_has_no_type_for(tmp_path):
+    path = os.path.join(str(tmp_path), "audit.jsonl")
+    backend = JsonlBackend(path)
+    backend.write([{"seq": 1, "quantity": {1, 2}}, {"seq": 2, "quantity": 3}])
+    backend.close()
+    assert [record["seq"] for record in read(path)] == [1, 2]
@@ -0,0 +1,38 @@
+"""BinaryCodec and Catalogue must hand back the values that were encoded, types included."""
+import os
+
+from classes.Catalogue import Catalogue
+from classes.Codec import BinaryCodec
+from classes.Inventory import Inventory
+from products.Clothing import Clothing
+from products.Electronics import Electronics
+
+
+def test_int_and_float_prices_round_trip_with_their_type():
+    products = [Electronics("Phone", 100, 5, 12), Clothing("Shirt", 19.5, 3, "M", "cotton")]
+    codec = BinaryCodec()
+    decoded = codec.decode_products(codec.encode_products(products))
+    assert [repr(p) for p in decoded] == [repr(p) for p in products]
+    assert type(codec.product_at(codec.encode_products(products), 0).price) is int
+
+
+def test_order_totals_round_trip_with_their_type():
+    inventory = Inventory()
+    phone = Electronics("Phone", 100, 5, 12)
+    inventory.add_product(phone)
+    order = inventory.create_order("Sale")
+    order.add_item(phone, 2)
+    codec = BinaryCodec()
+    decoded, = codec.decode_orders(codec.encode_orders([order]), inventory.products)
+    assert repr(decoded) == repr(order)
+
+
+def test_catalogue_views_keep_int_prices(tmp_path):
+    path = os.path.join(str(tmp_path), "catalogue.bin")
+    phone = Electronics("Phone", 100, 5, 12)
+    Catalogue.export([phone, Clothing("Shirt", 19.5, 3, "M", "cotton")], path)
+    with Catalogue(path) as catalogue:
+        view = catalogue.find_product_by_id(phone.id)
+        assert type(view.price) is int
+        assert view.get_product_type() == "Electronics"
+        assert repr(view) == repr(phone)
@@ -0,0 +1,18 @@
+"""Products publish their changes to every inventory holding them."""
+from classes.Inventory import Inventory
+from products.Electronics import Electronics
+
+
+def test_product_held_by_two_inventories_keeps_both_indexed():
+    first, second = Inventory(), Inventory()
+    phone = Electronics("Phone", 100, 20, 12)
+    first.add_product(phone)
+    second.add_product(phone)
+    first.adjust_inventory(phone.id, -15)
+    for inventory in (first, second):
+        assert inventory.find_product_by_quantity(0, 10) == [phone]
+        assert inventory.type_summary()["Electronics"] == (1, 5, 500)
+    second.remove_product(phone)
+    phone.quantity = 7
+    assert first.find_product_by_quantity(7, 7) == [phone]
+    assert second.find_product_by_quantity(0, 100) == []
@@ -0,0 +1,19 @@
+"""Order lines as seen through the public Order API."""
+from classes.Inventory import Inventory
+from products.Electronics import Electronics
+
+
+def test_order_items_is_an_indexable_list():
+    phone = Electronics("Phone", 100, 10, 12)
+    order = Inventory().create_order("Purchase")
+    order.add_item(phone, 2)
+    assert order.order_items[0] == (phone, 2)
+
+
+def test_removing_a_line_takes_back_what_it_added():
+    phone = Electronics("Phone", 100, 10, 12)
+    order = Inventory().create_order("Purchase")
+    order.add_item(phone, 2)
+    phone.price = 150
+    order.remove_items([phone.id])
+    assert order.order_amount == 0
@@ -0,0 +1,42 @@
+"""Parallel inventories answer valuations from the running totals and scan only on request."""
+from classes.Inventory import Inventory
+from products.Electronics import Electronics
+from products.Food import Food
+import datetime
+import pytest
+
+
+def test_valuations_match_a_full_scan_and_close_stops_the_pool():
+    inventory = Inventory(parallel=2)
+    inventory.add_products([Electronics("Phone", 100, 5, 12),
+                            Food("Milk", 2, 10, datetime.date.today() + datetime.timedelta(days=5))])
+    inventory.adjust_inventory(next(iter(inventory.products)), -1)
+    scan = inventory.scan_products()
+    assert inventory.total_value() == scan["total_value"] == 420
+    assert inventory.value_by_type() == scan["value_by_type"]
+    assert inventory._scanner._pool is None
+    inventory._scanner._executor()
+    inventory.close()
+    assert inventory._scanner._pool is None
+
+
+def test_workers_scan_the_shared_columns_and_skip_emptied_types():
+    inventory = Inventory(parallel=2)
+    inventory._scanner._min_rows = 0
+    phone = Electronics("Phone", 100, 5, 12)
+    milk = Food("Milk", 2, 10, datetime.date.today() + datetime.timedelta(days=5))
+    inventory.add_products([phone, milk] + [Electronics(f"Cable {i}", 3, 1, 12) for i in range(2000)])
+    inventory.remove_product(milk)
+    scan = inventory.scan_products()
+    assert scan["count_by_type"] == {"Electronics": 2001}
+    assert scan["value_by_type"] == inventory.value_by_type() == {"Electronics": 6500}
+    inventory.close()
+
+
+def test_one_worker_scans_in_process_and_plain_inventories_do_not_scan():
+    inventory = Inventory(parallel=1)
+    inventory.add_product(Electronics("Phone", 100, 5, 12))
+    assert inventory.scan_products()["total_value"] == 500
+    assert inventory._scanner._pool is None
+    with pytest.raises(ValueError):
+        Inventory().scan_products()
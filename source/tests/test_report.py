@@ -0,0 +1,26 @@
+"""Running per-type totals must agree with a recount of the products."""
+import math
+
+from classes.Inventory import Inventory
+from products.Electronics import Electronics
+
+
+def test_value_totals_do_not_drift_over_adjustments():
+    inventory = Inventory()
+    products = [Electronics(f"Cable {i}", 0.1, 1, 12) for i in range(3)]
+    inventory.add_products(products)
+    for _ in range(10):
+        for product in products:
+            inventory.adjust_inventory(product.id, 1)
+            inventory.adjust_inventory(product.id, -1)
+    inventory.remove_product(products[0])
+    recount = math.fsum(p.calculate_value_of_stock() for p in inventory.products.values())
+    assert inventory.total_value() == recount == 0.2
+    assert inventory.value_by_type() == {"Electronics": 0.2}
+
+
+def test_int_values_stay_ints():
+    inventory = Inventory()
+    inventory.add_products([Electronics("Phone", 100, 2, 12), Electronics("Tablet", 300, 1, 12)])
+    assert inventory.total_value() == 500
+    assert isinstance(inventory.total_value(), int)
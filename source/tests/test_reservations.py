@@ -0,0 +1,56 @@
+"""Reserved stock must never be committed past what is on hand."""
+import threading
+
+import pytest
+
+from classes.Inventory import Inventory
+from products.Electronics import Electronics
+
+
+def test_correction_below_reserved_stock_fails_the_sale():
+    inventory = Inventory()
+    phone = Electronics("Phone", 100, 10, 12)
+    inventory.add_product(phone)
+    order = inventory.create_order("Sale")
+    order.add_item(phone, 8)
+    order.reserve()
+    assert inventory.correct_inventory(phone.id, 2)
+    assert phone.available_quantity == 0
+    with pytest.raises(ValueError):
+        order.execute_order()
+    assert phone.quantity == 2
+    assert phone.reserved_quantity == 0
+    assert order.status == "reserved"
+
+
+def test_reserved_sale_commits_its_hold():
+    inventory = Inventory()
+    phone = Electronics("Phone", 100, 10, 12)
+    inventory.add_product(phone)
+    order = inventory.create_order("Sale")
+    order.add_item(phone, 8)
+    order.reserve()
+    order.execute_order()
+    assert phone.quantity == 2
+    assert order.status == "executed"
+
+
+def test_expiry_sweeps_from_several_readers_at_once_do_not_fail():
+    phone = Electronics("Phone", 100, 10, 12)
+    errors = []
+
+    def read():
+        try:
+            for _ in range(2000):
+                phone.reserve(1, ttl=0)
+                phone.available_quantity
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert phone.available_quantity == 10
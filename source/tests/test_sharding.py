@@ -0,0 +1,11 @@
+"""Scatter/gather queries over the shards of a ShardedInventory."""
+from classes.Sharding import ShardedInventory
+from products.Electronics import Electronics
+
+
+def test_find_product_by_name_returns_one_product_or_none():
+    with ShardedInventory(["north", "south"]) as inventory:
+        phone = Electronics("Phone", 100, 5, 12)
+        inventory.add_product(phone, "south")
+        assert inventory.find_product_by_name("phone").id == phone.id
+        assert inventory.find_product_by_name("Tablet") is None
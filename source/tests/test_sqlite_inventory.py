@@ -0,0 +1,53 @@
+"""SQLiteInventory state written to the database file and read back on reopen."""
+import os
+
+import pytest
+
+from classes.SQLiteInventory import SQLiteInventory
+from classes.Storage import InventoryStore
+from classes.Supplier import Supplier
+from products.Electronics import Electronics
+
+
+def test_pending_order_lines_survive_a_reopen(tmp_path):
+    path = os.path.join(str(tmp_path), "inventory.db")
+    inventory = SQLiteInventory(path)
+    phone = Electronics("Phone", 100, 5, 12)
+    tablet = Electronics("Tablet", 300, 5, 12)
+    inventory.add_products([phone, tablet])
+    order = inventory.create_order("Sale")
+    order.add_item(phone, 2)
+    order.add_item(phone, 1)
+    order.add_item(tablet, 1)
+    order.remove_item(tablet)
+    inventory.close()
+    reopened = SQLiteInventory(path)
+    restored = reopened.find_order_by_id(order.order_id)
+    assert [(p.id, q) for p, q in restored.order_items] == [(phone.id, 3)]
+    assert restored.order_amount == 300
+    assert restored.status == "pending"
+    reopened.close()
+
+
+def test_inventory_store_refuses_sqlite_inventories(tmp_path):
+    with pytest.raises(ValueError):
+        InventoryStore(str(tmp_path)).load(SQLiteInventory, path=os.path.join(str(tmp_path), "inventory.db"))
+
+
+def test_supplier_changes_after_adding_survive_a_reopen(tmp_path):
+    path = os.path.join(str(tmp_path), "inventory.db")
+    inventory = SQLiteInventory(path)
+    phone = Electronics("Phone", 100, 5, 12)
+    tablet = Electronics("Tablet", 300, 5, 12)
+    inventory.add_products([phone, tablet])
+    supplier = Supplier("Acme", "acme@example.com")
+    inventory.add_supplier(supplier)
+    supplier.add_product(phone, tablet)
+    supplier.remove_product(phone)
+    supplier.name = "Acme Ltd"
+    inventory.close()
+    reopened = SQLiteInventory(path)
+    restored = reopened.find_supplier_by_name("Acme Ltd")
+    assert [p.id for p in restored.get_supplied_products()] == [tablet.id]
+    assert reopened.find_suppliers_by_product(tablet.id) == [restored]
+    reopened.close()